@@ -1,20 +1,50 @@
 import json
-from sentence_transformers import SentenceTransformer
 import chromadb
 from chromadb.utils import embedding_functions
 import uuid
 
+from research_copilot.core.chunking import chunk_spans
+from research_copilot.core.embeddings.onnx_backend import load_encoder
+from research_copilot.core.vector_store.ivfpq import PQ_CENTROIDS, IvfPqIndex
+
+MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+
+# Training vectors per coarse centroid: faiss warns below 39, the fewest
+# for k-means to place a centroid reliably
+TRAINING_POINTS_PER_CENTROID = 39
+
+class EncoderEmbeddingFunction(embedding_functions.EmbeddingFunction):
+    """Chroma embedding function over an encoder with a SentenceTransformer encode()"""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def __call__(self, input):
+        return self.encoder.encode(list(input)).tolist()
+
 class PaperProcessor:
-    def __init__(self, chunk_size=1000):
+    def __init__(self, chunk_size=1000, embedding_backend="torch", ivfpq_path=None, save_every=10000):
         self.chunk_size = chunk_size
         
-        self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+        # embedding_backend: torch, onnx or onnx-int8 (ONNX Runtime on CPU)
+        self.embedding_model = load_encoder(MODEL_NAME, embedding_backend)
+
+        # With ivfpq_path chunk vectors go to a compressed IVF-PQ index
+        # instead of Chroma, for corpora whose full vectors do not fit in
+        # RAM; train_index() must have run once before process_papers()
+        self.index = None
+        self.save_every = save_every
+        if ivfpq_path is not None:
+            self.index = IvfPqIndex(ivfpq_path)
+            return
+        if embedding_backend == "torch":
+            embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=MODEL_NAME)
+        else:
+            embedding_function = EncoderEmbeddingFunction(self.embedding_model)
         self.client = chromadb.PersistentClient(path="./chroma_db")
         self.collection = self.client.get_or_create_collection(
             name="paper_chunks",
-            embedding_function=embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name="sentence-transformers/all-MiniLM-L6-v2"
-            )
+            embedding_function=embedding_function
         )
 
     def create_chunks(self, text, metadata):
@@ -24,24 +54,50 @@ class PaperProcessor:
         # Combine title and abstract for complete context
         full_text = f"{metadata['title']} {text}"
         
-        # Create chunks with overlap
-        for i in range(0, len(full_text), self.chunk_size // 2):
-            chunk = full_text[i:i + self.chunk_size]
-            if len(chunk) >= 100:  # Minimum chunk size
-                chunks.append({
-                    'id': str(uuid.uuid4()),
-                    'text': chunk,
-                    'metadata': {
-                        'paper_id': metadata['id'],
-                        'title': metadata['title'],
-                        'authors': metadata['authors'],
-                        'categories': metadata['categories'],
-                        'chunk_start': i,
-                        'chunk_end': i + len(chunk)
-                    }
-                })
+        # Create chunks with overlap, dropping any under 100 characters
+        spans = chunk_spans(full_text, self.chunk_size, overlap=self.chunk_size // 2,
+                            min_length=100, unit="char")
+        for i, end in spans.spans():
+            chunks.append({
+                'id': str(uuid.uuid4()),
+                'text': full_text[i:end],
+                'metadata': {
+                    'paper_id': metadata['id'],
+                    'title': metadata['title'],
+                    'authors': metadata['authors'],
+                    'categories': metadata['categories'],
+                    'chunk_start': i,
+                    'chunk_end': end
+                }
+            })
         return chunks
 
+    def iter_chunks(self, json_file):
+        """Chunks of every paper with an abstract in a JSON lines file"""
+        with open(json_file, 'r') as f:
+            for line in f:
+                try:
+                    paper = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if paper.get('abstract'):
+                    yield from self.create_chunks(paper['abstract'], paper)
+
+    def train_index(self, json_file, sample_size=50000, nlist=1024, subvectors=48):
+        """Train the IVF-PQ index on the first sample_size chunks of json_file"""
+        texts = []
+        for chunk in self.iter_chunks(json_file):
+            texts.append(chunk['text'])
+            if len(texts) == sample_size:
+                break
+        if len(texts) < PQ_CENTROIDS:
+            # Each PQ codebook is fitted with 256 centroids
+            raise ValueError(f"IVF-PQ training needs at least {PQ_CENTROIDS} chunks, {json_file} has {len(texts)}")
+        sample = self.embedding_model.encode(texts, batch_size=64, show_progress_bar=False)
+        nlist = max(1, min(nlist, len(texts) // TRAINING_POINTS_PER_CENTROID))
+        self.index.train(sample, nlist=nlist, subvectors=subvectors)
+        print(f"Trained IVF-PQ index on {len(texts)} chunks")
+
     def process_papers(self, json_file):
         """Process JSON papers file"""
         processed = 0
@@ -60,17 +116,24 @@ class PaperProcessor:
                         texts = [chunk['text'] for chunk in chunks]
                         metadatas = [chunk['metadata'] for chunk in chunks]
                         
-                        # Add to ChromaDB
+                        # Add to the IVF-PQ index or ChromaDB
                         if chunks:
-                            self.collection.upsert(
-                                ids=ids,
-                                documents=texts,
-                                metadatas=metadatas
-                            )
+                            if self.index is not None:
+                                embeddings = self.embedding_model.encode(texts, show_progress_bar=False)
+                                self.index.add(ids, embeddings,
+                                               [dict(meta, text=text) for meta, text in zip(metadatas, texts)])
+                            else:
+                                self.collection.upsert(
+                                    ids=ids,
+                                    documents=texts,
+                                    metadatas=metadatas
+                                )
                             
                             processed += 1
                             if processed % 100 == 0:
                                 print(f"Processed {processed} papers")
+                            if self.index is not None and processed % self.save_every == 0:
+                                self.index.save()
                                 
                 except json.JSONDecodeError:
                     continue
@@ -78,10 +141,23 @@ class PaperProcessor:
                     print(f"Error processing paper: {e}")
                     continue
         
+        if self.index is not None:
+            self.index.save()
         print(f"Processing complete. Total papers processed: {processed}")
 
-    def query_papers(self, query_text, n_results=5):
+    def query_papers(self, query_text, n_results=5, nprobe=16, oversample=4):
         """Search for similar chunks"""
+        if self.index is not None:
+            # n_results * oversample PQ candidates reranked by their full vectors, shaped
+            # like a Chroma query result with similarities as distances' complement
+            hits = self.index.search(self.embedding_model.encode([query_text])[0], n_results, nprobe=nprobe,
+                                     oversample=oversample)
+            return {
+                'ids': [[hit.id for hit in hits]],
+                'documents': [[hit.payload.get('text') for hit in hits]],
+                'metadatas': [[{key: value for key, value in hit.payload.items() if key != 'text'} for hit in hits]],
+                'distances': [[1.0 - hit.score for hit in hits]]
+            }
         return self.collection.query(
             query_texts=[query_text],
             n_results=n_results
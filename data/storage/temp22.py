@@ -11,13 +11,20 @@ from chromadb.utils import embedding_functions
 import uuid
 from datetime import datetime, timedelta
 
+from research_copilot.core.chunking import chunk_spans
+from research_copilot.core.embeddings.dedupe import NearDuplicateIndex
+
 class MLPapersPipeline:
-    def __init__(self, pdf_dir="ml_papers", chunk_size=1000, chunk_overlap=200):
+    def __init__(self, pdf_dir="ml_papers", chunk_size=1000, chunk_overlap=200, dedupe_index=None):
         # Initialize directories
         self.pdf_dir = pdf_dir
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         
+        # Near-duplicate chunks (boilerplate, other arXiv versions of a
+        # paper) are dropped before Chroma embeds them
+        self.dedupe = NearDuplicateIndex(dedupe_index) if dedupe_index else None
+        
         if not os.path.exists(pdf_dir):
             os.makedirs(pdf_dir)
             
@@ -84,25 +91,28 @@ class MLPapersPipeline:
             text = re.sub(r'\s+', ' ', text).strip()
             
             chunks = []
-            for i in range(0, len(text), self.chunk_size - self.chunk_overlap):
-                chunk = text[i:i + self.chunk_size]
-                if len(chunk) >= 100:
-                    chunk_id = str(uuid.uuid4())
-                    metadata = {
-                        'paper_id': paper_metadata.get('id'),
-                        'title': paper_metadata.get('title'),
-                        'authors': ', '.join(paper_metadata.get('authors', [])),
-                        'categories': ', '.join(paper_metadata.get('categories', [])),
-                        'chunk_index': len(chunks),
-                        'chunk_start': i,
-                        'chunk_end': i + len(chunk)
-                    }
-                    chunks.append({
-                        'id': chunk_id,
-                        'text': chunk,
-                        'metadata': metadata
-                    })
+            spans = chunk_spans(text, self.chunk_size, overlap=self.chunk_overlap,
+                                min_length=100, unit="char")
+            for i, end in spans.spans():
+                chunk_id = str(uuid.uuid4())
+                metadata = {
+                    'paper_id': paper_metadata.get('id'),
+                    'title': paper_metadata.get('title'),
+                    'authors': ', '.join(paper_metadata.get('authors', [])),
+                    'categories': ', '.join(paper_metadata.get('categories', [])),
+                    'chunk_index': len(chunks),
+                    'chunk_start': i,
+                    'chunk_end': end
+                }
+                chunks.append({
+                    'id': chunk_id,
+                    'text': text[i:end],
+                    'metadata': metadata
+                })
             
+            if self.dedupe is not None:
+                keep = self.dedupe.filter(paper_metadata.get('id'), [chunk['text'] for chunk in chunks])
+                chunks = [chunks[i] for i in keep]
             return chunks
         except Exception as e:
             print(f"Error processing PDF {pdf_path}: {e}")
@@ -176,6 +186,9 @@ class MLPapersPipeline:
                     continue
             
             print(f"\nBatch complete. Processed {processed_count} new papers")
+            if self.dedupe is not None:
+                self.dedupe.save()
+                print(f"Near-duplicate chunks skipped: {self.dedupe.stats()}")
             return processed_count
             
         except Exception as e:
@@ -1,21 +1,110 @@
 # app.py
 import os
+from typing import Any, List
 from flask import Flask, render_template, request, jsonify
 import torch
 from llama_index.core import (
     SimpleDirectoryReader,
+    StorageContext,
     VectorStoreIndex,
     Settings,
-    PromptTemplate
+    PromptTemplate,
+    load_index_from_storage
 )
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.embeddings import BaseEmbedding
 from llama_index.llms.huggingface import HuggingFaceLLM
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.embeddings.huggingface.utils import format_query, format_text
+
+from research_copilot.api.binary_vector_store import BinaryVectorStore
+from research_copilot.config.settings import Config
+from research_copilot.core.embeddings.onnx_backend import load_encoder
+from research_copilot.core.pdf_processing.manifest import IngestManifest
 
 app = Flask(__name__)
 
+class EncoderEmbedding(BaseEmbedding):
+    """
+    LlamaIndex embedding backed by any encoder with a SentenceTransformer encode()
+
+    Used to run the query/document embedder on ONNX Runtime; queries and
+    texts get the same model-specific instructions HuggingFaceEmbedding adds.
+    """
+
+    _encoder: Any = PrivateAttr()
+
+    def __init__(self, encoder, model_name: str, **kwargs):
+        super().__init__(model_name=model_name, **kwargs)
+        self._encoder = encoder
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._encoder.encode([format_query(query, self.model_name)])[0].tolist()
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        texts = [format_text(text, self.model_name) for text in texts]
+        return self._encoder.encode(texts, batch_size=self.embed_batch_size).tolist()
+
+def load_index(data_path: str, persist_dir: str) -> VectorStoreIndex:
+    """
+    Load the persisted index and bring it up to date with data_path
+
+    Only new and changed files are read and embedded; the nodes of changed
+    and removed files are deleted first. An unchanged directory costs one
+    stat() per file on top of loading the index.
+    """
+    manifest = IngestManifest(os.path.join(persist_dir, "ingest_manifest.jsonl"))
+    # Without a manifest the persisted nodes cannot be matched to files
+    if manifest.entries and os.path.exists(os.path.join(persist_dir, "docstore.json")):
+        vector_store = BinaryVectorStore.from_persist_dir(persist_dir, namespace="default",
+                                                         dtype=Config.VECTOR_STORE_DTYPE)
+        index = load_index_from_storage(StorageContext.from_defaults(persist_dir=persist_dir,
+                                                                     vector_store=vector_store))
+    else:
+        manifest.entries.clear()
+        vector_store = BinaryVectorStore(dtype=Config.VECTOR_STORE_DTYPE)
+        index = VectorStoreIndex([], storage_context=StorageContext.from_defaults(vector_store=vector_store))
+
+    files = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(data_path)
+        for name in names if not name.startswith('.')
+    ]
+    plan = manifest.plan(files)
+    for path in plan['changed'] + plan['removed']:
+        for doc_id in manifest.get(path).get('chunk_ids', []):
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+
+    inserted = {}
+    for path in plan['new'] + plan['changed']:
+        documents = SimpleDirectoryReader(input_files=[path], filename_as_id=True).load_data()
+        for document in documents:
+            index.insert(document)
+        inserted[path] = [document.doc_id for document in documents]
+
+    print(f"Index update: {len(plan['new'])} new, {len(plan['changed'])} changed, "
+          f"{len(plan['unchanged'])} unchanged, {len(plan['removed'])} removed")
+    if inserted or plan['removed']:
+        # The manifest only records what the persisted index contains
+        index.storage_context.persist(persist_dir=persist_dir)
+        for path in plan['removed']:
+            manifest.mark_removed(path)
+        for path, doc_ids in inserted.items():
+            manifest.mark_done(path, chunk_ids=doc_ids)
+        manifest.compact()
+    return index
+
 def initialize_rag():
     """Initialize the RAG pipeline"""
     data_path = "../../data/uploads/"
+    # Untracked: persisting rewrites these files on every change
+    persist_dir = "../../data/index/"
     if not os.path.exists(data_path):
         os.makedirs(data_path)
         return None
@@ -50,10 +139,16 @@ def initialize_rag():
         model_kwargs={"torch_dtype": torch.float16}
     )
     
-    embed_model = HuggingFaceEmbedding(
-        model_name="BAAI/bge-small-en",
-        device=device
-    )
+    embed_model_name = "BAAI/bge-small-en"
+    # The ONNX backends are CPU runtimes; a GPU keeps the PyTorch model
+    if Config.EMBEDDING_BACKEND == "torch" or device == "cuda":
+        embed_model = HuggingFaceEmbedding(
+            model_name=embed_model_name,
+            device=device
+        )
+    else:
+        embed_model = EncoderEmbedding(load_encoder(embed_model_name, Config.EMBEDDING_BACKEND),
+                                       model_name=embed_model_name)
     
     Settings.chunk_size = 256
     Settings.chunk_overlap = 20
@@ -63,8 +158,7 @@ def initialize_rag():
     Settings.llm = llm
     Settings.embed_model = embed_model
     
-    documents = SimpleDirectoryReader(data_path).load_data()
-    index = VectorStoreIndex.from_documents(documents)
+    index = load_index(data_path, persist_dir)
     
     return index.as_query_engine(
         response_mode="compact",
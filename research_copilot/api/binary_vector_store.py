@@ -0,0 +1,191 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.simple import NAMESPACE_SEP, SimpleVectorStore, SimpleVectorStoreData
+from llama_index.core.vector_stores.types import (
+    DEFAULT_PERSIST_DIR,
+    DEFAULT_PERSIST_FNAME,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+
+from research_copilot.core.vector_store.binary_store import VectorTable, binary_path, convert_simple_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+class BinaryVectorStore(SimpleVectorStore):
+    """
+    SimpleVectorStore persisted as a memory-mapped binary file
+
+    Rows loaded from disk stay in a VectorTable (see binary_store) instead
+    of being parsed into embedding_dict, so loading costs a header read
+    rather than decoding every embedding from JSON; nodes added since sit
+    in embedding_dict as usual. Plain similarity queries score the table
+    with one matrix-vector product per block; filtered and MMR/learner
+    queries first move the table into embedding_dict and run the
+    SimpleVectorStore code. persist() writes <name>.bin next to the
+    <name>.json the caller asks for and leaves any JSON file there
+    alone; loading converts the JSON file when there is no .bin yet or
+    the JSON was written after it (e.g. by a stock SimpleVectorStore).
+    Only the vectors move to the binary format: the docstore, index store
+    and graph store of a StorageContext stay JSON files, parsed in full at
+    load. Only the local filesystem is supported.
+    """
+
+    _table: Optional[VectorTable] = PrivateAttr(default=None)
+    _removed: Set[int] = PrivateAttr(default_factory=set)
+    _dtype: str = PrivateAttr(default='float32')
+
+    def __init__(self, table: Optional[VectorTable] = None, dtype: str = 'float32',
+                 data: Optional[SimpleVectorStoreData] = None, **kwargs: Any):
+        super().__init__(data=data, **kwargs)
+        self._table = table
+        self._removed = set()
+        self._dtype = dtype
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "BinaryVectorStore"
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str = DEFAULT_PERSIST_DIR, namespace: Optional[str] = None,
+                         fs: Any = None, dtype: str = 'float32') -> "BinaryVectorStore":
+        persist_fname = f"{namespace}{NAMESPACE_SEP}{DEFAULT_PERSIST_FNAME}" if namespace else DEFAULT_PERSIST_FNAME
+        return cls.from_persist_path(os.path.join(persist_dir, persist_fname), dtype=dtype)
+
+    @classmethod
+    def from_persist_path(cls, persist_path: str, fs: Any = None, dtype: str = 'float32') -> "BinaryVectorStore":
+        """Open the binary file for persist_path, converting the JSON file if it is missing or older"""
+        path = binary_path(persist_path)
+        if not os.path.exists(path) and not os.path.exists(persist_path):
+            raise ValueError(f"No existing vector store found at {persist_path}, skipping load.")
+        if os.path.exists(persist_path) and (not os.path.exists(path)
+                                             or os.path.getmtime(persist_path) > os.path.getmtime(path)):
+            logger.info("Converting %s to %s", persist_path, path)
+            convert_simple_vector_store(persist_path, dtype, path)
+        table = VectorTable(path)
+        return cls(table, dtype=table.dtype)
+
+    def _live_rows(self) -> np.ndarray:
+        if self._table is None:
+            return np.zeros(0, dtype=np.int64)
+        live = np.ones(len(self._table), dtype=bool)
+        live[list(self._removed)] = False
+        return np.flatnonzero(live)
+
+    def _table_row(self, node_id: str) -> Optional[int]:
+        row = self._table.row(node_id) if self._table is not None else None
+        return None if row in self._removed else row
+
+    def _materialize(self):
+        """Move the table rows into embedding_dict so that SimpleVectorStore code sees every node"""
+        if self._table is None:
+            return
+        data = SimpleVectorStoreData()
+        for row in self._live_rows().tolist():
+            node_id = self._table.id(row)
+            data.embedding_dict[node_id] = self._table.vector(row).tolist()
+            data.text_id_to_ref_doc_id[node_id] = self._table.ref_doc_id(row)
+            metadata = self._table.metadata(row)
+            if metadata is not None:
+                data.metadata_dict[node_id] = metadata
+        data.embedding_dict.update(self.data.embedding_dict)
+        data.text_id_to_ref_doc_id.update(self.data.text_id_to_ref_doc_id)
+        data.metadata_dict.update(self.data.metadata_dict)
+        self.data = data
+        self._table = None
+        self._removed = set()
+
+    def get(self, text_id: str) -> List[float]:
+        if text_id in self.data.embedding_dict:
+            return self.data.embedding_dict[text_id]
+        row = self._table_row(text_id)
+        if row is None:
+            raise KeyError(text_id)
+        return self._table.vector(row).tolist()
+
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        for node in nodes:
+            row = self._table_row(node.node_id)
+            if row is not None:
+                self._removed.add(row)
+        return super().add(nodes, **add_kwargs)
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        if self._table is not None:
+            self._removed.update(self._table.rows_of(ref_doc_id).tolist())
+        super().delete(ref_doc_id, **delete_kwargs)
+
+    def delete_nodes(self, node_ids: Optional[List[str]] = None, filters: Optional[MetadataFilters] = None,
+                     **delete_kwargs: Any) -> None:
+        self._materialize()
+        super().delete_nodes(node_ids, filters, **delete_kwargs)
+
+    def clear(self) -> None:
+        self._table = None
+        self._removed = set()
+        super().clear()
+
+    def to_dict(self, **kwargs: Any) -> Dict[str, Any]:
+        self._materialize()
+        return super().to_dict(**kwargs)
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if self._table is None or query.mode != VectorStoreQueryMode.DEFAULT or query.filters is not None:
+            self._materialize()
+            return super().query(query, **kwargs)
+
+        embedding = np.asarray(query.query_embedding, dtype=np.float32)
+        scores = self._table.scores(embedding)
+        rows = self._live_rows()
+        overlay = list(self.data.embedding_dict)
+        if query.node_ids is not None:
+            wanted = set(query.node_ids)
+            wanted_rows = np.array([row for row in map(self._table.row, wanted) if row is not None], dtype=np.int64)
+            rows = np.intersect1d(rows, wanted_rows)
+            overlay = [node_id for node_id in overlay if node_id in wanted]
+        if len(rows) > query.similarity_top_k:
+            rows = rows[np.argpartition(-scores[rows], query.similarity_top_k - 1)[:query.similarity_top_k]]
+        candidates = [(float(score), self._table.id(row))
+                      for score, row in zip(scores[rows].tolist(), rows.tolist())]
+        if overlay:
+            vectors = np.array([self.data.embedding_dict[node_id] for node_id in overlay], dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(embedding)
+            similarities = np.divide(vectors @ embedding, norms, out=np.zeros(len(overlay), dtype=np.float32),
+                                     where=norms > 0)
+            candidates.extend(zip(similarities.tolist(), overlay))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        top = candidates[:query.similarity_top_k]
+        return VectorStoreQueryResult(similarities=[score for score, _ in top], ids=[node_id for _, node_id in top])
+
+    def persist(self, persist_path: str = os.path.join(DEFAULT_PERSIST_DIR, DEFAULT_PERSIST_FNAME),
+                fs: Any = None) -> None:
+        """Write table rows and added nodes to the binary file for persist_path"""
+        path = binary_path(persist_path)
+        unchanged = (self._table is not None and self._table.path == path
+                     and not self._removed and not self.data.embedding_dict)
+        if not unchanged:
+            rows = self._live_rows().tolist()
+            ids = [self._table.id(row) for row in rows]
+            ref_doc_ids = [self._table.ref_doc_id(row) for row in rows]
+            metadata = [self._table.metadata(row) for row in rows]
+            vectors = [self._table.vectors(rows)] if rows else []
+            overlay = self.data.embedding_dict
+            if overlay:
+                ids.extend(overlay)
+                ref_doc_ids.extend(self.data.text_id_to_ref_doc_id.get(node_id, "None") for node_id in overlay)
+                metadata.extend(self.data.metadata_dict.get(node_id) for node_id in overlay)
+                vectors.append(np.array(list(overlay.values()), dtype=np.float32))
+            dim = self._table.dim if self._table is not None else None
+            vectors = np.concatenate(vectors) if vectors else np.zeros((0, dim or 0), dtype=np.float32)
+            VectorTable.write(path, ids, ref_doc_ids, vectors, metadata, self._dtype, dim)
+            self._table = VectorTable(path)
+            self._removed = set()
+            self.data = SimpleVectorStoreData()
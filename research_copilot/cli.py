@@ -0,0 +1,635 @@
+import argparse
+import collections
+import glob
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from research_copilot.config.settings import Config
+from research_copilot.core.chunking import DEFAULT_SKIP_SECTIONS
+from research_copilot.core.embeddings.onnx_backend import EMBEDDING_BACKENDS
+from research_copilot.core.vector_store.binary_store import VECTOR_DTYPES
+from research_copilot.core.vector_store.local import LOCAL_INDEX_KINDS
+from research_copilot.core.vector_store.projection import PROJECTION_METHODS
+from research_copilot.core.vector_store.quantization import QUANTIZATION_KINDS
+from research_copilot.core.pdf_processing.manifest import IngestManifest
+
+STAGES = ('extract', 'chunk', 'embed', 'store')
+
+# Papers a local vector store may hold unsaved while more are queued
+_STORE_SAVE_EVERY = 16
+
+
+def collect_pdfs(paths: List[str]) -> List[str]:
+    """Expand directories (recursively) and glob patterns into PDF paths"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = glob.glob(os.path.join(path, '**', '*.pdf'), recursive=True)
+        else:
+            matches = glob.glob(path, recursive=True) or [path]
+        found.extend(m for m in matches if m.lower().endswith('.pdf'))
+    # Keep the first occurrence of each file
+    return list(dict.fromkeys(os.path.abspath(p) for p in sorted(found)))
+
+
+def _count(counters, stage: str, papers: int = 0, chunks: int = 0):
+    stage_papers, stage_chunks = counters[stage]
+    with stage_papers.get_lock():
+        stage_papers.value += papers
+    with stage_chunks.get_lock():
+        stage_chunks.value += chunks
+
+
+def _extract_stage(in_queue, out_queue, done_queue, counters, backend: str, storage_path: str):
+    """Pull paths and push extracted documents until a None sentinel"""
+    from research_copilot.core.pdf_processing.extractor import PDFExtractor
+
+    extractor = PDFExtractor(storage_path=storage_path, backend=backend)
+    while True:
+        pdf_path = in_queue.get()
+        if pdf_path is None:
+            break
+        document = extractor.extract_text_with_sections(pdf_path)
+        error = document['metadata'].get('error')
+        if error:
+            done_queue.put((pdf_path, 'error', f"extract: {error}"))
+            continue
+        document['metadata']['filename'] = os.path.basename(pdf_path)
+        # Chunk ids are derived from the content, and the manifest records it
+        document['metadata']['content_hash'] = IngestManifest.file_hash(pdf_path)
+        out_queue.put((pdf_path, document))
+        _count(counters, 'extract', papers=1)
+    out_queue.put(None)
+
+
+def _chunk_stage(in_queue, out_queue, done_queue, counters, upstream: int, chunk_size: int,
+                 by_section: bool, skip_sections: List[str], tokenizer_name: Optional[str]):
+    """Chunk documents; finishes once every extract worker has finished"""
+    from research_copilot.core.chunking import TokenChunker
+    from research_copilot.core.pdf_processing.data_ingestion import chunk_section_text, chunk_text
+
+    # Only the tokenizer is loaded here, not the model weights
+    token_chunker = TokenChunker(tokenizer_name) if tokenizer_name else None
+
+    remaining = upstream
+    while remaining:
+        item = in_queue.get()
+        if item is None:
+            remaining -= 1
+            continue
+        pdf_path, document = item
+        if by_section and document['sections']:
+            chunks, sections = chunk_section_text(document['sections'], chunk_size, skip_sections,
+                                                  token_chunker)
+        else:
+            chunks, sections = chunk_text(document['full_text'], chunk_size, token_chunker), None
+        if not chunks:
+            done_queue.put((pdf_path, 'error', "chunk: no text extracted"))
+            continue
+        out_queue.put((pdf_path, document['metadata'], chunks, sections))
+        _count(counters, 'chunk', papers=1, chunks=len(chunks))
+    out_queue.put(None)
+
+
+def _embed_stage(in_queue, out_queue, done_queue, counters, model_name: str, batch_size: int,
+                 cache_dir: Optional[str], encode_workers: int, embedding_backend: str,
+                 dedupe_index_path: Optional[str]):
+    """
+    Encode chunks with a model loaded once in this process
+
+    Chunks from consecutive papers are pooled into fixed-size,
+    length-sorted batches. Whenever the upstream queue runs dry the pool
+    is flushed, so papers are not held back waiting for a full window.
+    With encode_workers > 1 batches are encoded by an EncodingPool.
+    embedding_backend selects PyTorch or an ONNX Runtime export. With
+    dedupe_index_path, near-duplicates of already stored chunks are
+    dropped before encoding; this process's copy of the index is never
+    saved, the store stage records papers once they are written.
+    """
+    from research_copilot.core.embeddings.batcher import EmbeddingBatcher
+    from research_copilot.core.embeddings.cache import EmbeddingCache, model_identity
+    from research_copilot.core.embeddings.dedupe import NearDuplicateIndex
+    from research_copilot.core.embeddings.onnx_backend import load_encoder
+    from research_copilot.core.embeddings.pool import EncodingPool
+
+    if encode_workers > 1:
+        model = EncodingPool(model_name, workers=encode_workers, backend=embedding_backend)
+    else:
+        model = load_encoder(model_name, embedding_backend)
+    cache = None
+    if cache_dir is not None:
+        cache = EmbeddingCache(cache_dir, model_name, model_identity(model)[1])
+    dedupe = NearDuplicateIndex(dedupe_index_path) if dedupe_index_path is not None else None
+
+    def encode_batch(texts):
+        kwargs = {'batch_size': len(texts), 'show_progress_bar': False}
+        if cache is not None:
+            return cache.encode(model, texts, **kwargs)
+        return model.encode(texts, **kwargs)
+
+    batcher = EmbeddingBatcher(encode_batch, batch_size)
+    papers = {}
+
+    def forward(run):
+        nonlocal batcher
+        try:
+            completed = run()
+        except Exception as e:
+            # A failed batch can hold chunks of every pooled paper
+            for pdf_path, (_, metadata, _, _) in papers.items():
+                if dedupe is not None:
+                    dedupe.remove_source(metadata['content_hash'])
+                done_queue.put((pdf_path, 'error', f"embed: {e}"))
+            papers.clear()
+            batcher = EmbeddingBatcher(encode_batch, batch_size)
+            return
+        for pdf_path, embeddings in completed:
+            _, metadata, chunks, sections = papers.pop(pdf_path)
+            near_duplicates = None
+            if dedupe is not None:
+                source = metadata['content_hash']
+                near_duplicates = (dedupe.source_signatures(source), dedupe.depends_on(source))
+            out_queue.put((pdf_path, metadata, chunks, sections, embeddings, near_duplicates))
+            _count(counters, 'embed', papers=1, chunks=len(chunks))
+
+    while True:
+        try:
+            item = in_queue.get(timeout=0.5 if len(batcher) else None)
+        except queue.Empty:
+            forward(lambda: batcher.flush())
+            continue
+        if item is None:
+            break
+        if dedupe is not None:
+            # Keyed by content hash, as DataIngestion.source_key and the manifest's sha256
+            pdf_path, metadata, chunks, sections = item
+            dedupe.remove_source(metadata['content_hash'])
+            keep = dedupe.filter(metadata['content_hash'], chunks)
+            item = (pdf_path, metadata, [chunks[i] for i in keep],
+                    None if sections is None else [sections[i] for i in keep])
+        papers[item[0]] = item
+        forward(lambda: batcher.add(item[0], item[2]))
+    forward(lambda: batcher.flush())
+    if encode_workers > 1:
+        model.close()
+
+    if cache is not None:
+        cache.flush()
+        stats = cache.stats()
+        print(f"Embedding cache: {stats['hit_ratio']:.1%} hit ratio, {stats['entries']} entries, "
+              f"{stats['size_bytes'] / 1e6:.1f} MB")
+    if dedupe is not None:
+        stats = dedupe.stats()
+        print(f"Near-duplicates: {stats['duplicates']} of {stats['checked']} chunks skipped "
+              f"({stats['duplicate_ratio']:.1%}), saving as many encoder inputs and stored vectors")
+    out_queue.put(None)
+
+
+def _store_stage(in_queue, done_queue, counters, collection: str, vector_quantization: Optional[str],
+                 projection_path: Optional[str], vector_store_path: Optional[str], vector_store_index: str,
+                 hnsw_m: Optional[int], dedupe_index_path: Optional[str]):
+    """
+    Write metadata rows and vectors; reports every paper on done_queue
+
+    A paper is reported done only once its vectors are durable, since the
+    parent then records it in the manifest and a resumed run skips it.
+    Qdrant has them when upsert returns; a local vector store (with
+    vector_store_path) has them once saved, so papers are reported after
+    the save that wrote them. Saves are grouped while more papers are
+    waiting, at most _STORE_SAVE_EVERY papers apart. With
+    dedupe_index_path, the MinHash signatures of a reported paper's chunks
+    are added to the dedupe index, which is saved when the stage ends.
+    """
+    from research_copilot.core.embeddings.dedupe import NearDuplicateIndex
+    from research_copilot.core.pdf_processing.data_ingestion import DataIngestion
+
+    ingestion = DataIngestion(
+        Config.POSTGRES_URI, Config.QDRANT_HOST, int(Config.QDRANT_PORT),
+        collection_name=collection, embedding_model=None, vector_quantization=vector_quantization,
+        projection_path=projection_path, vector_store_path=vector_store_path,
+        vector_store_index=vector_store_index, hnsw_m=hnsw_m
+    )
+    dedupe = NearDuplicateIndex(dedupe_index_path) if dedupe_index_path is not None else None
+    unsaved = []
+
+    def commit():
+        try:
+            ingestion.save_vectors()
+        except Exception as e:
+            for pdf_path, _, _ in unsaved:
+                done_queue.put((pdf_path, 'error', f"store: saving vectors failed: {e}"))
+        else:
+            for pdf_path, details, near_duplicates in unsaved:
+                if dedupe is not None:
+                    dedupe.add_source(details['sha256'], *near_duplicates)
+                done_queue.put((pdf_path, 'ok', details))
+        unsaved.clear()
+
+    while True:
+        item = in_queue.get()
+        if item is None:
+            break
+        pdf_path, metadata, chunks, sections, embeddings, near_duplicates = item
+        try:
+            paper_id = ingestion.store_paper({'metadata': metadata}, chunks=chunks, embeddings=embeddings,
+                                             chunk_section_names=sections)
+        except Exception as e:
+            done_queue.put((pdf_path, 'error', f"store: {e}"))
+            continue
+        details = {
+            'paper_id': paper_id,
+            'sha256': metadata['content_hash'],
+            'chunks': len(chunks),
+            'chunk_ids': ingestion.chunk_ids(ingestion.source_key(metadata), len(chunks))
+        }
+        if near_duplicates is not None:
+            # Also kept in the manifest, which survives a run killed before the index is saved
+            details['near_duplicate_of'] = near_duplicates[1]
+        unsaved.append((pdf_path, details, near_duplicates))
+        _count(counters, 'store', papers=1, chunks=len(chunks))
+        if vector_store_path is None or len(unsaved) >= _STORE_SAVE_EVERY or in_queue.empty():
+            commit()
+    if unsaved:
+        commit()
+    if dedupe is not None:
+        dedupe.save()
+    ingestion.close()
+
+
+def _delete_stale_chunks(manifest: IngestManifest, stale_paths: List[str], collection: str,
+                         vector_store_path: Optional[str] = None, vector_store_index: str = 'exact'):
+    """Delete the vectors previously stored for changed or removed files"""
+    from research_copilot.core.pdf_processing.data_ingestion import DataIngestion
+
+    ingestion = DataIngestion(
+        Config.POSTGRES_URI, Config.QDRANT_HOST, int(Config.QDRANT_PORT),
+        collection_name=collection, embedding_model=None, vector_store_path=vector_store_path,
+        vector_store_index=vector_store_index
+    )
+    # Identical copies of a file share chunk ids; keep those another file still uses
+    stale = set(stale_paths)
+    live = {chunk_id for path, entry in manifest.entries.items() if path not in stale
+            for chunk_id in entry.get('chunk_ids', [])}
+    for path in stale_paths:
+        ingestion.delete_chunks([chunk_id for chunk_id in manifest.get(path).get('chunk_ids', [])
+                                 if chunk_id not in live])
+    ingestion.close()
+
+
+def _forget_near_duplicate_sources(manifest: IngestManifest, stale_paths: List[str], unchanged: List[str],
+                                   dedupe_index_path: str) -> List[str]:
+    """
+    Drop stale files from the dedupe index; returns unchanged files to re-ingest
+
+    Chunks of an unchanged file that were dropped as near-duplicates of a
+    stale file's chunks are stored nowhere once those are deleted, so that
+    file is ingested again, and so on for files deduplicated against it.
+    The same goes for files deduplicated against a file whose vectors were
+    never written (its store failed, or the run was killed), which the
+    index does not hold.
+    """
+    from research_copilot.core.embeddings.dedupe import NearDuplicateIndex
+
+    dedupe = NearDuplicateIndex(dedupe_index_path)
+    stale = set(stale_paths)
+    # Identical copies of a file share a source; keep those another file still uses
+    live = {entry.get('sha256') for path, entry in manifest.entries.items() if path not in stale}
+    by_source = collections.defaultdict(list)
+    dependents = collections.defaultdict(set)
+    pending = [manifest.get(path).get('sha256') for path in stale_paths]
+    for path in unchanged:
+        entry = manifest.get(path)
+        by_source[entry.get('sha256')].append(path)
+        for source in entry.get('near_duplicate_of', []):
+            dependents[source].add(entry.get('sha256'))
+            if source not in dedupe:
+                pending.append(source)
+
+    sources = set()
+    readmit = []
+    while pending:
+        source = pending.pop()
+        if source is None or source in sources or (source in live and source in dedupe):
+            continue
+        sources.add(source)
+        for dependent in dependents[source].union(dedupe.dependents(source)):
+            paths = by_source.pop(dependent, [])
+            if paths:
+                readmit += paths
+                live.discard(dependent)
+                pending.append(dependent)
+    if not sources:
+        return readmit
+    for source in sources:
+        dedupe.remove_source(source)
+    dedupe.save()
+    return readmit
+
+
+def _report(counters, elapsed: float, finished: int, total: int):
+    parts = []
+    for stage in STAGES:
+        papers, chunks = (value.value for value in counters[stage])
+        rate = f"{stage} {papers / elapsed:.2f} papers/s"
+        if stage != 'extract':
+            rate += f" {chunks / elapsed:.1f} chunks/s"
+        parts.append(rate)
+    print(f"[{finished}/{total}] " + " | ".join(parts), flush=True)
+
+
+def ingest(
+    paths: List[str],
+    workers: int = 2,
+    backend: Optional[str] = None,
+    manifest_path: str = "data/processed/ingest_manifest.jsonl",
+    storage_path: str = "data/processed",
+    collection: str = "research_papers",
+    model_name: str = "allenai/specter",
+    chunk_size: int = 1000,
+    by_section: bool = False,
+    skip_sections: Optional[List[str]] = None,
+    token_chunks: bool = False,
+    embedding_cache_dir: Optional[str] = "data/processed/embedding_cache",
+    batch_size: int = 32,
+    encode_workers: int = 1,
+    embedding_backend: str = "torch",
+    vector_quantization: Optional[str] = None,
+    projection_path: Optional[str] = None,
+    dedupe_index_path: Optional[str] = None,
+    vector_store_path: Optional[str] = None,
+    vector_store_index: str = 'exact',
+    hnsw_m: Optional[int] = None,
+    queue_size: int = 8,
+    report_interval: float = 5.0
+) -> Dict[str, int]:
+    """
+    Run extract -> chunk -> embed -> store over PDFs as a process pipeline
+
+    Each stage runs in its own process and stages are joined by bounded
+    queues, so a slow stage applies backpressure. Only new and changed
+    files are processed, and each is recorded in the manifest as soon as
+    it is stored, so an interrupted run resumes where it stopped. Returns
+    counts of found, skipped, stored, failed and removed files.
+    """
+    if skip_sections is None:
+        skip_sections = list(DEFAULT_SKIP_SECTIONS)
+    # Unchanged files cost a stat() each against the manifest
+    manifest = IngestManifest(manifest_path)
+    pdfs = collect_pdfs(paths)
+    plan = manifest.plan(pdfs)
+    todo = plan['new'] + plan['changed']
+    summary = {'found': len(pdfs), 'skipped': len(plan['unchanged']), 'stored': 0, 'failed': 0,
+               'removed': len(plan['removed'])}
+    print(f"Found {len(pdfs)} PDFs: {len(plan['new'])} new, {len(plan['changed'])} changed, "
+          f"{len(plan['unchanged'])} unchanged, {len(plan['removed'])} removed")
+
+    # Chunks of changed and removed files are deleted up front; a changed
+    # file that then fails stays "changed" and is retried on the next run
+    stale = plan['changed'] + plan['removed']
+    readmit = []
+    if dedupe_index_path is not None:
+        # Unchanged files that had chunks skipped as near-duplicates of a
+        # changed, removed or never-stored file are ingested again
+        readmit = _forget_near_duplicate_sources(manifest, stale, plan['unchanged'], dedupe_index_path)
+        if readmit:
+            print(f"Re-ingesting {len(readmit)} unchanged files whose chunks were dropped as "
+                  f"near-duplicates of changed, removed or unstored ones")
+            plan['unchanged'] = [path for path in plan['unchanged'] if path not in readmit]
+            todo += readmit
+            summary['skipped'] = len(plan['unchanged'])
+            stale += readmit
+    if any(manifest.get(path).get('chunk_ids') for path in stale):
+        _delete_stale_chunks(manifest, stale, collection, vector_store_path, vector_store_index)
+    # Their chunks are gone, so they are new files until stored again
+    for path in plan['removed'] + readmit:
+        manifest.mark_removed(path)
+    if not todo:
+        if plan['removed']:
+            manifest.compact()
+        return summary
+
+    # Every queue holds at most queue_size items, so memory stays bounded
+    # however far one stage runs ahead of the next
+    workers = max(1, min(workers, len(todo)))
+    ctx = multiprocessing.get_context('spawn')
+    paths_queue = ctx.Queue(maxsize=queue_size)
+    documents_queue = ctx.Queue(maxsize=queue_size)
+    chunks_queue = ctx.Queue(maxsize=queue_size)
+    vectors_queue = ctx.Queue(maxsize=queue_size)
+    done_queue = ctx.Queue()
+    counters = {stage: (ctx.Value('l', 0), ctx.Value('l', 0)) for stage in STAGES}
+
+    # Extraction runs in `workers` processes sharing the paths queue
+    processes = [
+        ctx.Process(target=_extract_stage, name=f"extract-{i}",
+                    args=(paths_queue, documents_queue, done_queue, counters,
+                          backend or Config.PDF_BACKEND, storage_path))
+        for i in range(workers)
+    ]
+    # by_section chunks each section on its own and leaves out
+    # skip_sections; token_chunks sizes chunks in the model's tokens
+    # instead of chunk_size characters
+    processes.append(ctx.Process(target=_chunk_stage, name="chunk",
+                                 args=(documents_queue, chunks_queue, done_queue, counters,
+                                       workers, chunk_size, by_section, skip_sections,
+                                       model_name if token_chunks else None)))
+    # Cached chunks are not encoded again; encode_workers > 1 spreads
+    # encoding over CPU processes, embedding_backend picks PyTorch or ONNX
+    # Runtime (onnx, onnx-int8), and dedupe_index_path skips near-duplicate
+    # chunks before they are embedded
+    processes.append(ctx.Process(target=_embed_stage, name="embed",
+                                 args=(chunks_queue, vectors_queue, done_queue, counters,
+                                       model_name, batch_size, embedding_cache_dir, encode_workers,
+                                       embedding_backend, dedupe_index_path)))
+    # Vectors go to Qdrant, or to the local memory-mapped store at
+    # vector_store_path searched exactly or through an HNSW graph
+    # (vector_store_index). vector_quantization (int8, binary) searches
+    # compact codes and rescores with full vectors on disk, projection_path
+    # reduces vectors with a fitted Projection, and hnsw_m sets the links
+    # per HNSW node of either backend
+    processes.append(ctx.Process(target=_store_stage, name="store",
+                                 args=(vectors_queue, done_queue, counters, collection, vector_quantization,
+                                       projection_path, vector_store_path, vector_store_index, hnsw_m,
+                                       dedupe_index_path)))
+    for process in processes:
+        process.start()
+
+    def feed():
+        for pdf_path in todo:
+            paths_queue.put(pdf_path)
+        for _ in range(workers):
+            paths_queue.put(None)
+
+    threading.Thread(target=feed, daemon=True).start()
+
+    start = last_report = time.monotonic()
+    finished = 0
+    try:
+        while finished < len(todo):
+            try:
+                pdf_path, status, details = done_queue.get(timeout=1.0)
+            except queue.Empty:
+                # A stage that died takes its queue's items with it
+                dead = [p.name for p in processes if p.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(f"Pipeline stage(s) exited unexpectedly: {', '.join(dead)}")
+            else:
+                finished += 1
+                if status == 'ok':
+                    manifest.mark_done(pdf_path, **details)
+                    summary['stored'] += 1
+                else:
+                    print(f"Failed {pdf_path}: {details}")
+                    summary['failed'] += 1
+
+            now = time.monotonic()
+            if now - last_report >= report_interval:
+                _report(counters, now - start, finished, len(todo))
+                last_report = now
+    except BaseException:
+        for process in processes:
+            process.kill()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+
+    manifest.compact()
+    _report(counters, time.monotonic() - start, finished, len(todo))
+    print(f"Stored {summary['stored']} papers, {summary['failed']} failed, {summary['skipped']} skipped")
+    return summary
+
+
+def fit_projection(cache_dir: str, model_name: str, dim: int, method: str, sample: int, output: str) -> int:
+    """
+    Fit a Projection on a sample of the cached embeddings of model_name
+
+    The collection has to be re-ingested with the new file: vectors
+    projected by different fits are not comparable.
+    """
+    from research_copilot.core.embeddings.cache import cached_vectors
+    from research_copilot.core.vector_store.projection import Projection, sample_rows
+
+    vectors = cached_vectors(cache_dir, model_name)
+    if len(vectors) < dim:
+        print(f"Need at least {dim} cached vectors of {model_name} in {cache_dir}, found {len(vectors)}")
+        return 1
+    projection = Projection.fit(sample_rows(vectors, sample), dim, method)
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    projection.save(output)
+    print(f"Fitted {method} projection {projection.input_dim} -> {projection.dim} "
+          f"on {min(len(vectors), sample)} vectors: {output}")
+    return 0
+
+
+def convert_vector_store(persist_dir: str, dtype: str) -> int:
+    """
+    Write the binary file for every SimpleVectorStore JSON file in persist_dir
+
+    The JSON files are kept, and the app reads the binary files from
+    then on unless a JSON file is rewritten after its binary file.
+    """
+    from research_copilot.core.vector_store.binary_store import convert_simple_vector_store
+
+    json_paths = sorted(glob.glob(os.path.join(persist_dir, '*vector_store.json')))
+    if not json_paths:
+        print(f"No vector store JSON files in {persist_dir}")
+        return 1
+    for json_path in json_paths:
+        start = time.perf_counter()
+        path = convert_simple_vector_store(json_path, dtype)
+        print(f"{json_path} ({os.path.getsize(json_path) / 2**20:.2f} MB) -> {path} "
+              f"({os.path.getsize(path) / 2**20:.2f} MB) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="research-copilot", description="Research Copilot command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Extract, chunk, embed and store a batch of PDFs")
+    ingest_parser.add_argument("paths", nargs="+", help="PDF files, directories or glob patterns")
+    ingest_parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                               help="Extraction processes")
+    ingest_parser.add_argument("--backend", default=None, help="PDF text backend (defaults to PDF_BACKEND)")
+    ingest_parser.add_argument("--manifest", default="data/processed/ingest_manifest.jsonl",
+                               help="Record of completed files used to resume")
+    ingest_parser.add_argument("--storage-path", default="data/processed", help="Extraction cache location")
+    ingest_parser.add_argument("--collection", default="research_papers", help="Qdrant collection")
+    ingest_parser.add_argument("--model", default="allenai/specter", help="SentenceTransformer model")
+    ingest_parser.add_argument("--chunk-size", type=int, default=1000)
+    ingest_parser.add_argument("--by-section", action="store_true",
+                               help="Chunk each section separately and label chunks with it")
+    ingest_parser.add_argument("--skip-section", action="append", dest="skip_sections",
+                               help="Section not to store with --by-section (repeatable; default: references)")
+    ingest_parser.add_argument("--token-chunks", action="store_true",
+                               help="Size chunks to fill the model's token window instead of --chunk-size")
+    ingest_parser.add_argument("--embedding-cache", default="data/processed/embedding_cache",
+                               help="Directory of cached chunk embeddings")
+    ingest_parser.add_argument("--no-embedding-cache", dest="embedding_cache", action="store_const", const=None,
+                               help="Encode every chunk, even if it was encoded before")
+    ingest_parser.add_argument("--batch-size", type=int, default=32, help="Embedding batch size")
+    ingest_parser.add_argument("--encode-workers", type=int, default=1,
+                               help="CPU processes for embedding, each with its own model")
+    ingest_parser.add_argument("--embedding-backend", default="torch", choices=EMBEDDING_BACKENDS,
+                               help="Run the model on PyTorch or an ONNX Runtime export (onnx-int8: quantized)")
+    ingest_parser.add_argument("--vector-quantization", default=None, choices=QUANTIZATION_KINDS,
+                               help="Search int8 or binary codes in RAM, rescoring with full vectors on disk")
+    ingest_parser.add_argument("--projection", default=None,
+                               help="Projection file from fit-projection; reduces stored vectors to its dimension")
+    ingest_parser.add_argument("--dedupe-index", default=None,
+                               help="Directory of a MinHash index; near-duplicate chunks are not embedded or stored")
+    ingest_parser.add_argument("--vector-store", default=None, dest="vector_store_path",
+                               help="Directory of a local memory-mapped vector store to use instead of Qdrant")
+    ingest_parser.add_argument("--vector-store-index", default="exact", choices=LOCAL_INDEX_KINDS,
+                               help="Search the local store exactly or through an HNSW graph (hnswlib: native, needs hnswlib)")
+    ingest_parser.add_argument("--hnsw-m", type=int, default=None, help="Links per HNSW node (Qdrant or local)")
+    ingest_parser.add_argument("--queue-size", type=int, default=8, help="Capacity of each inter-stage queue")
+    ingest_parser.add_argument("--report-interval", type=float, default=5.0, help="Seconds between throughput reports")
+
+    projection_parser = subparsers.add_parser(
+        "fit-projection", help="Fit a PCA or random projection on cached chunk embeddings"
+    )
+    projection_parser.add_argument("--embedding-cache", default="data/processed/embedding_cache",
+                                   help="Embedding cache to sample vectors from")
+    projection_parser.add_argument("--model", default="allenai/specter", help="Model whose vectors to sample")
+    projection_parser.add_argument("--dim", type=int, default=256, help="Output dimension")
+    projection_parser.add_argument("--method", default="pca", choices=PROJECTION_METHODS)
+    projection_parser.add_argument("--sample", type=int, default=100000, help="Vectors to fit on")
+    projection_parser.add_argument("--output", default="data/processed/projection.npz")
+
+    convert_parser = subparsers.add_parser(
+        "convert-vector-store", help="Convert the app's JSON vector store files to memory-mapped binary files"
+    )
+    convert_parser.add_argument("persist_dir", nargs="?", default="data/index", help="Index storage directory")
+    convert_parser.add_argument("--dtype", default="float32", choices=VECTOR_DTYPES,
+                                help="Stored precision of the embeddings")
+
+    args = parser.parse_args(argv)
+    if args.command == "ingest":
+        summary = ingest(
+            args.paths, workers=args.workers, backend=args.backend, manifest_path=args.manifest,
+            storage_path=args.storage_path, collection=args.collection, model_name=args.model,
+            chunk_size=args.chunk_size, by_section=args.by_section, skip_sections=args.skip_sections,
+            token_chunks=args.token_chunks, embedding_cache_dir=args.embedding_cache,
+            batch_size=args.batch_size, encode_workers=args.encode_workers,
+            embedding_backend=args.embedding_backend, vector_quantization=args.vector_quantization,
+            projection_path=args.projection, dedupe_index_path=args.dedupe_index,
+            vector_store_path=args.vector_store_path, vector_store_index=args.vector_store_index,
+            hnsw_m=args.hnsw_m, queue_size=args.queue_size, report_interval=args.report_interval
+        )
+        return 1 if summary['failed'] else 0
+    if args.command == "fit-projection":
+        return fit_projection(args.embedding_cache, args.model, args.dim, args.method, args.sample, args.output)
+    if args.command == "convert-vector-store":
+        return convert_vector_store(args.persist_dir, args.dtype)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,15 @@ class Config:
     QDRANT_HOST = os.getenv('QDRANT_HOST', 'localhost')
     QDRANT_PORT = os.getenv('QDRANT_PORT', 6333)
     
+    # PDF text backend: pdfplumber, pypdf or pypdfium2
+    PDF_BACKEND = os.getenv('PDF_BACKEND', 'pdfplumber')
+    
+    # Embedding model runtime: torch, onnx or onnx-int8
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')
+    
+    # Stored precision of the app's vector store embeddings: float32 or float16
+    VECTOR_STORE_DTYPE = os.getenv('VECTOR_STORE_DTYPE', 'float32')
+    
     # OpenAI settings
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     
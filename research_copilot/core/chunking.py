@@ -0,0 +1,316 @@
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Lookup table of the code points str.split() treats as whitespace; all are
+# below U+3001, so higher code points are clipped to a non-space entry
+_IS_SPACE = np.array([chr(c).isspace() for c in range(0x3002)], dtype=bool)
+
+_UTF32 = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+# Sections that cost vectors without helping retrieval
+DEFAULT_SKIP_SECTIONS = ('references', 'bibliography', 'acknowledgements', 'acknowledgments')
+
+# Section of text before the first recognised header, or of unsectioned text
+UNKNOWN_SECTION = 'unknown'
+
+
+class ChunkSpans:
+    """
+    Chunks of a text stored as (start, end) offsets in two int64 arrays
+
+    No chunk strings exist until one is asked for: indexing or iterating
+    slices them out of the source text on demand, and slicing a ChunkSpans
+    returns another view over the same text.
+    """
+
+    def __init__(self, text: str, starts: np.ndarray, ends: np.ndarray):
+        self.text = text
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[str, 'ChunkSpans']:
+        if isinstance(idx, slice):
+            return ChunkSpans(self.text, self.starts[idx], self.ends[idx])
+        return self.text[self.starts[idx]:self.ends[idx]]
+
+    def __iter__(self) -> Iterator[str]:
+        text = self.text
+        for start, end in self.spans():
+            yield text[start:end]
+
+    def spans(self) -> Iterator[Tuple[int, int]]:
+        """(start, end) offsets as plain ints"""
+        return zip(self.starts.tolist(), self.ends.tolist())
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self.ends - self.starts
+
+    def texts(self) -> List[str]:
+        """Materialize every chunk as a string"""
+        return list(self)
+
+
+def word_bounds(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end offsets of the whitespace-separated words in text"""
+    if not text:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    codes = np.frombuffer(text.encode(_UTF32), dtype=np.uint32)
+    is_word = ~_IS_SPACE[np.minimum(codes, 0x3001)]
+    # +1 where a word starts and -1 where one ends, padded on both sides
+    edges = np.diff(np.concatenate(([False], is_word, [False])).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _pack_words(
+    word_starts: np.ndarray,
+    word_ends: np.ndarray,
+    size: int,
+    overlap: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Greedily pack words into spans of at most size characters"""
+    starts, ends = [], []
+    count = len(word_starts)
+    first = 0
+    while first < count:
+        start = word_starts[first]
+        # Last word that still ends within size characters of start; a
+        # single word longer than size becomes a chunk of its own
+        last = max(first, int(np.searchsorted(word_ends, start + size, side='right')) - 1)
+        starts.append(start)
+        ends.append(word_ends[last])
+        if last == count - 1:
+            break
+        if overlap:
+            # Restart at the first word inside the last overlap characters
+            next_first = int(np.searchsorted(word_starts, word_ends[last] - overlap, side='left'))
+            first = min(max(next_first, first + 1), last + 1)
+        else:
+            first = last + 1
+    return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+
+
+def chunk_spans(
+    text: str,
+    size: int = 1000,
+    overlap: int = 0,
+    min_length: int = 0,
+    unit: str = "word"
+) -> ChunkSpans:
+    """
+    Split text into chunks of at most size characters
+
+    unit="word" packs whole words, so chunks never cut a word and span from
+    the first word's start to the last word's end. unit="char" takes fixed
+    windows text[i:i + size] every size - overlap characters. In both
+    modes consecutive chunks share about overlap characters, and chunks
+    shorter than min_length are dropped.
+    """
+    if size <= 0:
+        raise ValueError("size must be positive")
+    if not 0 <= overlap < size:
+        raise ValueError("overlap must be at least 0 and smaller than size")
+
+    if unit == "word":
+        starts, ends = _pack_words(*word_bounds(text), size, overlap)
+    elif unit == "char":
+        starts = np.arange(0, len(text), size - overlap, dtype=np.int64)
+        ends = np.minimum(starts + size, len(text))
+    else:
+        raise ValueError(f"Unknown chunk unit '{unit}', expected 'word' or 'char'")
+
+    if min_length > 0:
+        keep = (ends - starts) >= min_length
+        starts, ends = starts[keep], ends[keep]
+    return ChunkSpans(text, starts, ends)
+
+
+def _fold_tail(spans: ChunkSpans, size: int, overlap: int, unit: str) -> ChunkSpans:
+    """spans with the last chunk merged into the one before, or the two evened out if merged they exceed size"""
+    text, start, end = spans.text, int(spans.starts[-2]), int(spans.ends[-1])
+    if end - start <= size:
+        return ChunkSpans(text, np.append(spans.starts[:-2], start), np.append(spans.ends[:-2], end))
+    # Cut near the middle, the second chunk starting overlap characters back
+    middle = start + (end - start + overlap) // 2
+    if unit == "word":
+        word_starts, word_ends = word_bounds(text[start:end])
+        last = max(0, int(np.searchsorted(word_ends, middle - start, side='right')) - 1)
+        next_first = last + 1
+        if overlap:
+            next_first = min(next_first, max(1, int(np.searchsorted(word_starts, word_ends[last] - overlap))))
+        if next_first == len(word_starts):
+            return spans
+        cut, next_start = start + int(word_ends[last]), start + int(word_starts[next_first])
+    else:
+        cut, next_start = middle, middle - overlap
+    if cut - start > size or end - next_start > size:
+        return spans
+    return ChunkSpans(text, np.append(spans.starts[:-2], [start, next_start]),
+                      np.append(spans.ends[:-2], [cut, end]))
+
+
+def chunk_sections(
+    sections: Union[Dict[str, str], Iterable[Tuple[str, str]]],
+    size: int = 1000,
+    overlap: int = 0,
+    min_length: int = 0,
+    unit: str = "word",
+    skip_sections: Iterable[str] = DEFAULT_SKIP_SECTIONS,
+    min_tail: int = 0
+) -> List[Tuple[str, ChunkSpans]]:
+    """
+    Chunk each section on its own so no chunk crosses a section boundary
+
+    sections is the extractor's {name: text} map or (name, text) pairs.
+    Returns (section_name, spans) for every section that produced chunks,
+    leaving out the sections named in skip_sections. A section's last
+    chunk shorter than min_tail characters is folded into the chunk before
+    it, or when the two do not fit in size together their text is split
+    evenly between them, so section ends do not each add a near-empty
+    vector and no chunk grows past size.
+    """
+    skip = {name.lower() for name in skip_sections}
+    items = sections.items() if isinstance(sections, dict) else sections
+    chunked = []
+    for name, text in items:
+        if name.lower() in skip:
+            continue
+        spans = chunk_spans(text, size, overlap, min_length, unit)
+        if len(spans) > 1 and spans.lengths[-1] < min_tail:
+            spans = _fold_tail(spans, size, overlap, unit)
+        if len(spans):
+            chunked.append((name, spans))
+    return chunked
+
+
+def token_chunk_spans(
+    text: str,
+    offsets: np.ndarray,
+    max_tokens: int,
+    overlap: int = 0
+) -> ChunkSpans:
+    """
+    Cut text into windows of at most max_tokens tokens
+
+    offsets holds each token's (start, end) character offsets, as returned
+    by a fast tokenizer with return_offsets_mapping. Windows are cut only
+    before a token that starts a whitespace-separated word, never inside a
+    word split into several pieces, so a chunk re-tokenizes to the same
+    tokens and stays within the budget; only a single word longer than
+    max_tokens is cut inside. Consecutive windows share about overlap
+    tokens, and each chunk spans from its first token's start to its last
+    token's end.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    if not 0 <= overlap < max_tokens:
+        raise ValueError("overlap must be at least 0 and smaller than max_tokens")
+    offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+    # Special and empty tokens have (0, 0) offsets and carry no text
+    offsets = offsets[offsets[:, 1] > offsets[:, 0]]
+    count = len(offsets)
+    if count == 0:
+        return ChunkSpans(text, offsets[:, 0], offsets[:, 1])
+
+    # Indices of the tokens a window may start at
+    word_starts = np.flatnonzero(np.isin(offsets[:, 0], word_bounds(text)[0]))
+    if not len(word_starts) or word_starts[0] != 0:
+        word_starts = np.concatenate(([0], word_starts))
+
+    firsts, lasts = [], []
+    first = 0
+    while True:
+        limit = first + max_tokens
+        if limit >= count:
+            firsts.append(first)
+            lasts.append(count - 1)
+            break
+        # Last word start that keeps the window within budget
+        cut = int(word_starts[np.searchsorted(word_starts, limit, side='right') - 1])
+        if cut <= first:
+            # One word longer than the budget
+            cut = limit
+        firsts.append(first)
+        lasts.append(cut - 1)
+        if overlap:
+            # Restart at the first word inside the last overlap tokens
+            next_first = int(word_starts[np.searchsorted(word_starts, cut - overlap, side='left')])
+            first = next_first if first < next_first < cut else cut
+        else:
+            first = cut
+    return ChunkSpans(text, offsets[firsts, 0], offsets[lasts, 1])
+
+
+class TokenChunker:
+    """
+    Chunk text by the embedding model's own tokenizer
+
+    Each text is tokenized once with a fast (Rust) tokenizer, batched
+    across texts, and cut on token offsets so that every chunk fits the
+    encoder window without truncation. max_tokens defaults to the model's
+    window minus the special tokens the encoder adds.
+    """
+
+    def __init__(self, tokenizer, max_tokens: Optional[int] = None, overlap: int = 0,
+                 max_seq_length: Optional[int] = None):
+        if isinstance(tokenizer, str):
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer, use_fast=True)
+        if not getattr(tokenizer, 'is_fast', False):
+            raise ValueError("TokenChunker needs a fast tokenizer for offset mappings")
+        self.tokenizer = tokenizer
+
+        if max_tokens is None:
+            window = max_seq_length or tokenizer.model_max_length
+            # Tokenizers without a limit report a huge sentinel value
+            if not window or window > 100_000:
+                window = 512
+            max_tokens = window - tokenizer.num_special_tokens_to_add()
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+
+    @classmethod
+    def from_model(cls, model, **kwargs) -> 'TokenChunker':
+        """Use a SentenceTransformer's tokenizer and max_seq_length"""
+        if not hasattr(model, 'tokenizer'):
+            # The model lives in other processes (EncodingPool); load its tokenizer here
+            return cls(model.model_name, **kwargs)
+        return cls(model.tokenizer, max_seq_length=model.max_seq_length, **kwargs)
+
+    def chunk_batch(self, texts: List[str]) -> List[ChunkSpans]:
+        """Chunk several texts with one tokenizer call"""
+        if not texts:
+            return []
+        encoded = self.tokenizer(
+            list(texts),
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False
+        )
+        return [
+            token_chunk_spans(text, offsets, self.max_tokens, self.overlap)
+            for text, offsets in zip(texts, encoded['offset_mapping'])
+        ]
+
+    def chunk(self, text: str) -> ChunkSpans:
+        return self.chunk_batch([text])[0]
+
+    def chunk_sections(
+        self,
+        sections: Union[Dict[str, str], Iterable[Tuple[str, str]]],
+        skip_sections: Iterable[str] = DEFAULT_SKIP_SECTIONS
+    ) -> List[Tuple[str, ChunkSpans]]:
+        """Token-budget counterpart of chunk_sections(), one tokenizer call per document"""
+        skip = {name.lower() for name in skip_sections}
+        items = sections.items() if isinstance(sections, dict) else sections
+        kept = [(name, text) for name, text in items if name.lower() not in skip]
+        spans = self.chunk_batch([text for _, text in kept])
+        return [(name, section_spans) for (name, _), section_spans in zip(kept, spans) if len(section_spans)]
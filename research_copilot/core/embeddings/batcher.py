@@ -0,0 +1,78 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """
+    Encode chunks from many papers in fixed-size, length-sorted batches
+
+    Papers are added with add(); their chunks join a shared pool. Once the
+    pool holds window chunks it is sorted by length and encoded in batches
+    of batch_size, so similar-length chunks share a batch (little padding)
+    and short papers no longer produce tiny batches. Each vector is routed
+    back to its paper, and add()/flush() return the papers whose chunks are
+    all encoded, in the order they were added.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        batch_size: int = 32,
+        window: Optional[int] = None
+    ):
+        self.encode = encode
+        self.batch_size = batch_size
+        # Sorting a few batches' worth of chunks at a time keeps the last,
+        # partial batch a small share of the work
+        self.window = window or batch_size * 8
+        self._pending: List[Tuple[int, int, str]] = []
+        self._papers: Dict[int, Dict[str, Any]] = {}
+        self._next_slot = 0
+        self.batches = 0
+        self.chunks = 0
+
+    def __len__(self) -> int:
+        """Chunks waiting to be encoded"""
+        return len(self._pending)
+
+    def add(self, key: Hashable, chunks: Sequence[str]) -> List[Tuple[Hashable, np.ndarray]]:
+        """Queue a paper's chunks; returns papers that completed as a result"""
+        slot = self._next_slot
+        self._next_slot += 1
+        self._papers[slot] = {'key': key, 'vectors': [None] * len(chunks), 'remaining': len(chunks)}
+        self._pending.extend((slot, idx, chunk) for idx, chunk in enumerate(chunks))
+        if len(self._pending) >= self.window:
+            self._encode_pending()
+        return self._pop_completed()
+
+    def flush(self) -> List[Tuple[Hashable, np.ndarray]]:
+        """Encode everything still pending and return the remaining papers"""
+        self._encode_pending()
+        return self._pop_completed()
+
+    def _encode_pending(self):
+        pending = sorted(self._pending, key=lambda item: len(item[2]))
+        self._pending = []
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            vectors = self.encode([chunk for _, _, chunk in batch])
+            for (slot, idx, _), vector in zip(batch, vectors):
+                paper = self._papers[slot]
+                paper['vectors'][idx] = vector
+                paper['remaining'] -= 1
+            self.batches += 1
+            self.chunks += len(batch)
+
+    def _pop_completed(self) -> List[Tuple[Hashable, np.ndarray]]:
+        completed = []
+        # Hand papers back in insertion order, stopping at the first one
+        # still waiting for vectors
+        for slot in sorted(self._papers):
+            paper = self._papers[slot]
+            if paper['remaining']:
+                break
+            del self._papers[slot]
+            vectors = np.stack(paper['vectors']) if paper['vectors'] else np.zeros((0, 0), dtype=np.float32)
+            completed.append((paper['key'], vectors))
+        return completed
@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KEY_BYTES = 16
+
+
+def normalize_chunk(text: str) -> str:
+    """Canonical form of a chunk for hashing: NFC with whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def chunk_key(text: str) -> bytes:
+    """128-bit digest of the normalized chunk"""
+    return hashlib.blake2b(normalize_chunk(text).encode('utf-8'), digest_size=KEY_BYTES).digest()
+
+
+def model_identity(model) -> Tuple[str, str]:
+    """Best-effort (name, revision) of a loaded SentenceTransformer's weights"""
+    if hasattr(model, 'identity'):
+        # Encoders wrapping models in other processes (EncodingPool)
+        return model.identity()
+    try:
+        config = model[0].auto_model.config
+    except (AttributeError, IndexError, KeyError, TypeError):
+        return type(model).__name__, "unknown"
+    name = getattr(config, '_name_or_path', None) or type(model).__name__
+    revision = getattr(config, '_commit_hash', None) or "unknown"
+    return name, revision
+
+
+def cached_vectors(cache_dir: str, model_name: str) -> np.ndarray:
+    """
+    Memory map of the vectors cached for model_name
+
+    When several revisions or variants of the model are cached, the one
+    with the most rows is used. Returns an empty array if there is none.
+    """
+    best = np.zeros((0, 0), dtype=np.float32)
+    names = sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []
+    for name in names:
+        directory = os.path.join(cache_dir, name)
+        meta_path = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_path):
+            continue
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        vectors_path = os.path.join(directory, 'vectors.f32')
+        keys_path = os.path.join(directory, 'keys.bin')
+        if meta.get('model') != model_name or not meta.get('dim') or not os.path.exists(keys_path):
+            continue
+        # Rows are only valid once their key has been written
+        rows = min(os.path.getsize(keys_path) // KEY_BYTES, os.path.getsize(vectors_path) // (4 * meta['dim']))
+        if rows > len(best):
+            best = np.memmap(vectors_path, dtype=np.float32, mode='r', shape=(rows, meta['dim']))
+    return best
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding cache keyed by (model, revision, chunk hash)
+
+    Each model/revision gets its own directory holding three flat files
+    with one row per chunk: vectors.f32 (float32, memory-mapped for
+    reads), keys.bin (16-byte BLAKE2b digests of the normalized chunk) and
+    used.u64 (a last-used counter for LRU eviction). Rows are appended,
+    and vectors are written before keys, so a torn write only loses the
+    unkeyed tail. Once the files grow past max_bytes the least recently
+    used rows are dropped by rewriting the files down to 80% of the
+    budget. A cache directory expects a single writing process.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_name: str,
+        revision: str = "unknown",
+        max_bytes: int = 1024 * 1024 * 1024,
+        variant: str = ""
+    ):
+        namespace = json.dumps([model_name, revision, variant])
+        self.directory = os.path.join(cache_dir, hashlib.sha1(namespace.encode()).hexdigest()[:16])
+        self.model_name = model_name
+        self.revision = revision
+        self.variant = variant
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._meta_path = os.path.join(self.directory, 'meta.json')
+        self._vectors_path = os.path.join(self.directory, 'vectors.f32')
+        self._keys_path = os.path.join(self.directory, 'keys.bin')
+        self._used_path = os.path.join(self.directory, 'used.u64')
+
+        self.dim: Optional[int] = None
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                self.dim = json.load(f)['dim']
+        self._load()
+
+    def _write_meta(self):
+        with open(self._meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': self.model_name, 'revision': self.revision,
+                       'variant': self.variant, 'dim': self.dim}, f)
+
+    def _load(self):
+        keys = b''
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, 'rb') as f:
+                keys = f.read()
+        rows = len(keys) // KEY_BYTES
+        if self.dim and os.path.exists(self._vectors_path):
+            rows = min(rows, os.path.getsize(self._vectors_path) // (4 * self.dim))
+        else:
+            rows = 0
+        self.rows = rows
+        self._index = {keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(rows)}
+
+        used = np.zeros(rows, dtype=np.uint64)
+        if os.path.exists(self._used_path):
+            stored = np.fromfile(self._used_path, dtype=np.uint64)[:rows]
+            used[:len(stored)] = stored
+        self._used = used
+        self._clock = int(used.max()) if rows else 0
+        self._vectors = None
+
+    def _mapped_vectors(self) -> np.ndarray:
+        """Read-only memory map of the stored vectors, remapped after appends"""
+        if self._vectors is None or len(self._vectors) != self.rows:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r',
+                                      shape=(self.rows, self.dim))
+        return self._vectors
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def get_many(self, texts: Sequence[str]) -> Tuple[List[Optional[np.ndarray]], List[int]]:
+        """
+        Look up a batch of chunks
+
+        Returns one vector (or None) per text and the positions of the
+        misses.
+        """
+        return self._get_keys([chunk_key(text) for text in texts])
+
+    def _get_keys(self, keys: List[bytes]) -> Tuple[List[Optional[np.ndarray]], List[int]]:
+        rows = [self._index.get(key) for key in keys]
+        found = [row for row in rows if row is not None]
+        vectors: List[Optional[np.ndarray]] = [None] * len(keys)
+        if found:
+            # One fancy-indexed read copies all hits out of the memory map
+            stored = iter(self._mapped_vectors()[np.array(found)])
+            self._clock += 1
+            self._used[found] = self._clock
+            for position, row in enumerate(rows):
+                if row is not None:
+                    vectors[position] = next(stored)
+        misses = [position for position, row in enumerate(rows) if row is None]
+        self.hits += len(found)
+        self.misses += len(misses)
+        return vectors, misses
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray):
+        """Append vectors for chunks not cached yet"""
+        self._put_keys([chunk_key(text) for text in texts], vectors)
+
+    def _put_keys(self, keys: List[bytes], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(keys):
+            raise ValueError("put_many expects one vector per text")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._write_meta()
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+        new_keys, new_rows = [], []
+        for idx, key in enumerate(keys):
+            if key not in self._index:
+                self._index[key] = self.rows + len(new_keys)
+                new_keys.append(key)
+                new_rows.append(idx)
+        if not new_keys:
+            return
+
+        with open(self._vectors_path, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors[new_rows]).tobytes())
+        with open(self._keys_path, 'ab') as f:
+            f.write(b''.join(new_keys))
+        self._clock += 1
+        used = np.full(len(new_keys), self._clock, dtype=np.uint64)
+        used_bytes = os.path.getsize(self._used_path) if os.path.exists(self._used_path) else 0
+        if used_bytes == self.rows * 8:
+            with open(self._used_path, 'ab') as f:
+                f.write(used.tobytes())
+        self.rows += len(new_keys)
+        self._used = np.concatenate([self._used, used])
+
+        if self.size_bytes > self.max_bytes:
+            self._evict()
+
+    def encode(self, model, texts: Sequence[str], **encode_kwargs) -> np.ndarray:
+        """
+        Return embeddings for texts, encoding only the cache misses
+
+        Misses are encoded in one model.encode call, and chunks repeated
+        within the batch are encoded once.
+        """
+        texts = list(texts)
+        keys = [chunk_key(text) for text in texts]
+        vectors, misses = self._get_keys(keys)
+        if misses:
+            # First position of each distinct missing chunk
+            unique: Dict[bytes, int] = {}
+            for position in misses:
+                unique.setdefault(keys[position], position)
+            encoded = np.asarray(
+                model.encode([texts[position] for position in unique.values()], **encode_kwargs),
+                dtype=np.float32
+            )
+            by_key = dict(zip(unique, encoded))
+            for position in misses:
+                vectors[position] = by_key[keys[position]]
+            self._put_keys(list(unique), encoded)
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.stack(vectors)
+
+    @property
+    def size_bytes(self) -> int:
+        return self.rows * ((self.dim or 0) * 4 + KEY_BYTES + 8)
+
+    def flush(self):
+        """
+        Persist the LRU counters of cache hits
+
+        Vectors, keys and the counters of new rows are written by put_many;
+        without a flush only the recency of hits is lost.
+        """
+        tmp_path = f"{self._used_path}.tmp"
+        self._used.tofile(tmp_path)
+        os.replace(tmp_path, self._used_path)
+
+    def _evict(self):
+        """Keep the most recently used rows that fit in 80% of max_bytes"""
+        row_bytes = self.size_bytes // self.rows
+        keep_count = int(self.max_bytes * 0.8) // row_bytes
+        keep = np.sort(np.argsort(self._used, kind='stable')[::-1][:keep_count])
+
+        vectors = np.array(self._mapped_vectors()[keep])
+        keys = [None] * self.rows
+        for key, row in self._index.items():
+            keys[row] = key
+        self._vectors = None
+
+        for path, data in (
+            (self._vectors_path, vectors.tobytes()),
+            (self._keys_path, b''.join(keys[row] for row in keep)),
+        ):
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(data)
+            os.replace(f"{path}.tmp", path)
+        self.evictions += self.rows - len(keep)
+        self._used = self._used[keep]
+        self.flush()
+        self._load()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'entries': self.rows,
+            'size_bytes': self.size_bytes
+        }
@@ -0,0 +1,257 @@
+import json
+import os
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from research_copilot.core.embeddings.cache import normalize_chunk
+
+# splitmix64 finalizer constants; uint64 products wrap, which is what mixes the bits
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of chunks, to skip near-duplicates before embedding
+
+    Each chunk is reduced to its set of word shingles (shingle_words
+    consecutive words, whitespace- and case-normalized) and a MinHash
+    signature of num_perm values. Signatures are split into bands; chunks
+    sharing any band land in the same bucket, so candidates are found
+    without pairwise comparison, and a candidate counts as a duplicate
+    when the signatures estimate a Jaccard similarity of at least
+    threshold. Rows are owned by a source (the file's content hash, see
+    DataIngestion.source_key) so a re-ingested source can drop its old
+    rows with remove_source().
+
+    A dropped chunk's content lives on only in the row it matched, so the
+    index records which sources had chunks dropped against each source's
+    rows. When that source is changed or removed, dependents() names the
+    sources that have to be ingested again to get their content back.
+
+    With a path the index is loaded from and saved to that directory
+    (signatures.u32 plus sources.json, which maps each source to its
+    rows); save() rewrites both.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        num_perm: int = 128,
+        bands: int = 16,
+        threshold: float = 0.85,
+        shingle_words: int = 5,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        self.shingle_words = shingle_words
+        self.seed = seed
+        # One random 64-bit key per permutation
+        self._keys = np.random.default_rng(seed).integers(0, 2**63, num_perm, dtype=np.uint64) << np.uint64(1)
+
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._pending: List[np.ndarray] = []
+        self._sources: List[Optional[str]] = []
+        self._rows: Dict[str, List[int]] = defaultdict(list)
+        self._buckets: Dict[bytes, List[int]] = defaultdict(list)
+        # _dependents[source]: sources with chunks dropped against source; _depends_on the reverse
+        self._dependents: Dict[str, Set[str]] = defaultdict(set)
+        self._depends_on: Dict[str, Set[str]] = defaultdict(set)
+        self.checked = 0
+        self.duplicates = 0
+        if path is not None and os.path.exists(os.path.join(path, 'sources.json')):
+            self._load()
+
+    def _load(self):
+        with open(os.path.join(self.path, 'sources.json'), 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        settings = (stored['num_perm'], stored['shingle_words'], stored['seed'])
+        if settings != (self.num_perm, self.shingle_words, self.seed):
+            raise ValueError(f"{self.path} was built with different MinHash settings")
+        self._signatures = np.fromfile(os.path.join(self.path, 'signatures.u32'),
+                                       dtype=np.uint32).reshape(-1, self.num_perm)
+        self._sources = [None] * len(self._signatures)
+        for source, rows in stored['rows'].items():
+            self._rows[source] = rows
+            for row in rows:
+                self._sources[row] = source
+        for source, dependents in stored['dependents'].items():
+            for dependent in dependents:
+                self._depend(dependent, source)
+        for row, signature in enumerate(self._signatures):
+            self._bucket(row, signature)
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._rows.values())
+
+    def __contains__(self, source: str) -> bool:
+        return source in self._rows
+
+    def shingles(self, text: str) -> np.ndarray:
+        """32-bit hashes of the chunk's word shingles"""
+        words = normalize_chunk(text).lower().split()
+        width = min(self.shingle_words, len(words))
+        grams = {' '.join(words[i:i + width]) for i in range(len(words) - width + 1)} if words else {''}
+        return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature: per permutation, the minimum hash over the shingles"""
+        permuted = self._keys[:, None] ^ self.shingles(text)[None, :]
+        permuted ^= permuted >> np.uint64(30)
+        permuted *= _MIX1
+        permuted ^= permuted >> np.uint64(27)
+        permuted *= _MIX2
+        permuted ^= permuted >> np.uint64(31)
+        # Minima of the upper halves: the best-mixed bits
+        return (permuted.min(axis=1) >> np.uint64(32)).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        width = self.rows_per_band
+        return [bytes([band]) + signature[band * width:(band + 1) * width].tobytes() for band in range(self.bands)]
+
+    def _bucket(self, row: int, signature: np.ndarray):
+        for key in self._band_keys(signature):
+            self._buckets[key].append(row)
+
+    def _row_signature(self, row: int) -> np.ndarray:
+        stored = len(self._signatures)
+        return self._signatures[row] if row < stored else self._pending[row - stored]
+
+    def find(self, signature: np.ndarray) -> Optional[int]:
+        """Row of an indexed near-duplicate of signature, if any"""
+        seen = set()
+        for key in self._band_keys(signature):
+            for row in self._buckets.get(key, ()):
+                if row in seen or self._sources[row] is None:
+                    continue
+                seen.add(row)
+                if np.mean(self._row_signature(row) == signature) >= self.threshold:
+                    return row
+        return None
+
+    def add(self, source: str, signature: np.ndarray) -> int:
+        row = len(self._sources)
+        self._pending.append(signature)
+        self._sources.append(source)
+        self._rows[source].append(row)
+        self._bucket(row, signature)
+        return row
+
+    def _depend(self, dependent: str, source: str):
+        self._dependents[source].add(dependent)
+        self._depends_on[dependent].add(source)
+
+    def filter(self, source: str, chunks: Sequence[str]) -> List[int]:
+        """
+        Positions of the chunks to keep, indexing them under source
+
+        A chunk is dropped when it is a near-duplicate of anything already
+        indexed, including earlier chunks of the same source; source is
+        recorded as a dependent of the other sources it was dropped against.
+        """
+        keep = []
+        for position, chunk in enumerate(chunks):
+            signature = self.signature(chunk)
+            self.checked += 1
+            row = self.find(signature)
+            if row is not None:
+                if self._sources[row] != source:
+                    self._depend(source, self._sources[row])
+                self.duplicates += 1
+                continue
+            self.add(source, signature)
+            keep.append(position)
+        return keep
+
+    def remove_source(self, source: str) -> int:
+        """
+        Forget the rows of source (e.g. a changed or removed file)
+
+        source also stops being a dependent of others: re-ingesting it
+        records its dependencies again. Its own dependents are kept, since
+        a source re-ingested with the same content matches them again.
+        """
+        rows = self._rows.pop(source, [])
+        for row in rows:
+            self._sources[row] = None
+        for owner in self._depends_on.pop(source, ()):
+            self._dependents[owner].discard(source)
+            if not self._dependents[owner]:
+                del self._dependents[owner]
+        return len(rows)
+
+    def dependents(self, source: str) -> List[str]:
+        """Sources that had chunks dropped as near-duplicates of source's chunks"""
+        return sorted(self._dependents.get(source, ()))
+
+    def depends_on(self, source: str) -> List[str]:
+        """Sources that source had chunks dropped against"""
+        return sorted(self._depends_on.get(source, ()))
+
+    def source_signatures(self, source: str) -> np.ndarray:
+        """Signatures of source's rows, in the order they were added"""
+        rows = self._rows.get(source, [])
+        if not rows:
+            return np.zeros((0, self.num_perm), dtype=np.uint32)
+        return np.stack([self._row_signature(row) for row in rows])
+
+    def add_source(self, source: str, signatures: np.ndarray, depends_on: Sequence[str] = ()):
+        """
+        Index signatures computed elsewhere under source, replacing its rows
+
+        This is how an ingest pipeline records a paper once its vectors are
+        stored: filter() runs where chunks are embedded, and the
+        signatures it kept (source_signatures) and the sources it matched
+        (depends_on) are added here after the write succeeded.
+        """
+        self.remove_source(source)
+        for signature in signatures:
+            self.add(source, np.asarray(signature, dtype=np.uint32))
+        for owner in depends_on:
+            self._depend(source, owner)
+
+    def save(self):
+        """Write live rows to path, dropping removed ones"""
+        if self._pending:
+            self._signatures = np.concatenate([self._signatures, np.stack(self._pending)])
+            self._pending = []
+        if len(self) != len(self._sources):
+            live = [row for row, source in enumerate(self._sources) if source is not None]
+            self._signatures = self._signatures[live]
+            self._sources = [self._sources[row] for row in live]
+            self._rows = defaultdict(list)
+            self._buckets = defaultdict(list)
+            for row, (source, signature) in enumerate(zip(self._sources, self._signatures)):
+                self._rows[source].append(row)
+                self._bucket(row, signature)
+        if self.path is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        signatures_path = os.path.join(self.path, 'signatures.u32')
+        sources_path = os.path.join(self.path, 'sources.json')
+        self._signatures.tofile(f"{signatures_path}.tmp")
+        with open(f"{sources_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({'num_perm': self.num_perm, 'shingle_words': self.shingle_words,
+                       'seed': self.seed, 'rows': self._rows,
+                       'dependents': {source: sorted(dependents) for source, dependents in self._dependents.items()}},
+                      f)
+        os.replace(f"{signatures_path}.tmp", signatures_path)
+        os.replace(f"{sources_path}.tmp", sources_path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Chunks checked and duplicates skipped (neither encoded nor stored) in this process"""
+        return {
+            'checked': self.checked,
+            'duplicates': self.duplicates,
+            'duplicate_ratio': self.duplicates / self.checked if self.checked else 0.0,
+            'indexed': len(self)
+        }
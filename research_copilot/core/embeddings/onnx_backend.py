@@ -0,0 +1,205 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EMBEDDING_BACKENDS = ('torch', 'onnx', 'onnx-int8')
+DEFAULT_EXPORT_DIR = "data/models/onnx"
+
+
+def pool_token_embeddings(token_embeddings: np.ndarray, attention_mask: np.ndarray,
+                          mode: str = "mean") -> np.ndarray:
+    """Sentence vectors from (batch, seq, dim) token outputs, as SentenceTransformer's Pooling"""
+    if mode == "cls":
+        return token_embeddings[:, 0]
+    mask = attention_mask[..., None].astype(token_embeddings.dtype)
+    if mode == "max":
+        return np.where(mask > 0, token_embeddings, -np.inf).max(axis=1)
+    if mode == "mean":
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+    raise ValueError(f"Unsupported pooling mode '{mode}', expected cls, mean or max")
+
+
+def cosine_parity(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Row-wise cosine similarity between two encoders' vectors for the same inputs"""
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    similarity = (reference * candidate).sum(axis=1) / np.maximum(
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1), 1e-12
+    )
+    return {'min': float(similarity.min()), 'mean': float(similarity.mean())}
+
+
+def export_dir_for(model_name: str, export_dir: str = DEFAULT_EXPORT_DIR) -> str:
+    return os.path.join(export_dir, model_name.replace('/', '--'))
+
+
+def export_onnx(model_name: str, export_dir: str = DEFAULT_EXPORT_DIR, quantize: bool = True,
+                opset: int = 14) -> str:
+    """
+    Export a SentenceTransformer's transformer to ONNX
+
+    Writes model.onnx (fp32), model.int8.onnx (dynamic int8 weights) when
+    quantize is set, the tokenizer files and meta.json with the pooling
+    mode, normalization and window the model was configured with, so
+    OnnxEncoder reproduces its encode() output. Returns the directory.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from research_copilot.core.embeddings.cache import model_identity
+
+    model = SentenceTransformer(model_name, device='cpu')
+    directory = export_dir_for(model_name, export_dir)
+    os.makedirs(directory, exist_ok=True)
+
+    pooling, normalize = "mean", False
+    for module in model:
+        if hasattr(module, 'get_pooling_mode_str'):
+            pooling = module.get_pooling_mode_str()
+        elif type(module).__name__ == 'Normalize':
+            normalize = True
+    transformer = model[0].auto_model.eval()
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs):
+            return self.transformer(**dict(zip(input_names, inputs))).last_hidden_state
+
+    sample = model.tokenizer(["export sample"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    fp32_path = os.path.join(directory, 'model.onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(),
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(directory, 'model.int8.onnx'), weight_type=QuantType.QInt8)
+
+    model.tokenizer.save_pretrained(directory)
+    name, revision = model_identity(model)
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'model': name,
+            'revision': revision,
+            'pooling': pooling,
+            'normalize': normalize,
+            'max_seq_length': model.max_seq_length,
+            'dim': model.get_sentence_embedding_dimension()
+        }, f, indent=2)
+    return directory
+
+
+class OnnxEncoder:
+    """
+    SentenceTransformer-compatible encoder running an ONNX export on ONNX Runtime
+
+    The model is exported on first use (see export_onnx) and loaded from
+    export_dir afterwards. With quantize the dynamically quantized int8
+    weights are used: about 4x smaller and usually faster on CPU, at a
+    small cost in fidelity that cosine_parity() measures against the fp32
+    model. encode() follows SentenceTransformer.encode: batches are
+    length-sorted, pooled and normalized as the original model was.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantize: bool = False,
+        export_dir: str = DEFAULT_EXPORT_DIR,
+        threads: Optional[int] = None,
+        max_seq_length: Optional[int] = None
+    ):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.quantize = quantize
+        self.directory = export_dir_for(model_name, export_dir)
+        model_file = 'model.int8.onnx' if quantize else 'model.onnx'
+        model_path = os.path.join(self.directory, model_file)
+        if not os.path.exists(model_path) or not os.path.exists(os.path.join(self.directory, 'meta.json')):
+            export_onnx(model_name, export_dir, quantize=quantize)
+        with open(os.path.join(self.directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.directory, use_fast=True)
+        self.max_seq_length = max_seq_length or self.meta['max_seq_length']
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self._input_names = [node.name for node in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.meta['dim']
+
+    def identity(self) -> Tuple[str, str]:
+        """(name, revision) with the backend appended, so caches keep fp32 and int8 vectors apart"""
+        backend = 'onnx-int8' if self.quantize else 'onnx'
+        return self.meta['model'], f"{self.meta['revision']}+{backend}"
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        features = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors='np'
+        )
+        inputs = {name: features[name].astype(np.int64) for name in self._input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+        return pool_token_embeddings(token_embeddings, features['attention_mask'], self.meta['pooling'])
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """Encode sentences; returns one float32 row per sentence"""
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        if not sentences:
+            return np.zeros((0, self.meta['dim']), dtype=np.float32)
+
+        order = sorted(range(len(sentences)), key=lambda idx: -len(sentences[idx]))
+        embeddings = np.concatenate([
+            self._encode_batch([sentences[idx] for idx in order[start:start + batch_size]])
+            for start in range(0, len(order), batch_size)
+        ]).astype(np.float32)
+        if self.meta['normalize'] or normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+        unsorted = np.empty_like(embeddings)
+        unsorted[order] = embeddings
+        return unsorted[0] if single else unsorted
+
+
+def load_encoder(model_name: str, backend: str = "torch", device: Optional[str] = None,
+                 threads: Optional[int] = None, **kwargs: Any):
+    """Load an embedding model with the named backend (torch, onnx or onnx-int8)"""
+    if backend == "torch":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name, device=device, **kwargs)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEncoder(model_name, quantize=backend == "onnx-int8", threads=threads, **kwargs)
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {list(EMBEDDING_BACKENDS)}")
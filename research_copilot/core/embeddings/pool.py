@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+THREAD_VARIABLES = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+# Set in each worker process by _init_worker
+_model = None
+
+
+@contextmanager
+def _worker_environment(threads: int):
+    """
+    Export the thread-pool variables while worker processes are spawned
+
+    The OpenMP and BLAS runtimes read these only when they load, and a
+    spawned worker imports numpy (and the main module's imports) before
+    its initializer runs, so they must be in the environment the process
+    starts with. The parent's own values are restored afterwards.
+    """
+    values = dict.fromkeys(THREAD_VARIABLES, str(threads))
+    values['TOKENIZERS_PARALLELISM'] = os.environ.get('TOKENIZERS_PARALLELISM', 'false')
+    saved = {variable: os.environ.get(variable) for variable in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for variable, value in saved.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+
+
+def _init_worker(model_name: str, backend: str, threads: int, device: str, model_kwargs: Dict[str, Any],
+                 counter, cores_per_worker: Optional[int], encoder_factory: Optional[Callable[..., Any]]):
+    """Pin the worker's cores (optionally), then load its model"""
+    global _model
+    if cores_per_worker and hasattr(os, 'sched_setaffinity'):
+        with counter.get_lock():
+            worker_index = counter.value
+            counter.value += 1
+        cores = sorted(os.sched_getaffinity(0))
+        start = (worker_index * cores_per_worker) % len(cores)
+        os.sched_setaffinity(0, cores[start:start + cores_per_worker] or cores)
+
+    if encoder_factory is None:
+        from research_copilot.core.embeddings.onnx_backend import load_encoder
+        encoder_factory = load_encoder
+    _model = encoder_factory(model_name, backend, device=device, threads=threads, **model_kwargs)
+
+
+def _encode_shard(shard: List[str], encode_kwargs: Dict[str, Any]) -> np.ndarray:
+    return np.asarray(_model.encode(shard, **encode_kwargs))
+
+
+def _worker_identity() -> Tuple[str, str]:
+    from research_copilot.core.embeddings.cache import model_identity
+    return model_identity(_model)
+
+
+class EncodingPool:
+    """
+    Encode with a pool of worker processes, each holding its own model
+
+    Meant for CPU-only nodes, where one process's encode() leaves cores
+    idle. Workers load the model with the given backend (torch, onnx or
+    onnx-int8) and pin their thread count (threads_per_worker defaults to
+    an even split of the cores) and, with pin_cores, their own set of
+    cores. encode() has the SentenceTransformer signature: inputs
+    are length-sorted, cut into shards that are encoded in parallel and
+    returned in input order. Use as a context manager or call close().
+
+    Workers are spawned on demand with the thread-pool variables already
+    in their environment. encoder_factory replaces load_encoder in the
+    workers; it is called with the same arguments and must be picklable.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: Optional[int] = None,
+        backend: str = "torch",
+        threads_per_worker: Optional[int] = None,
+        device: str = "cpu",
+        shard_size: int = 64,
+        pin_cores: bool = True,
+        model_kwargs: Optional[Dict[str, Any]] = None,
+        encoder_factory: Optional[Callable[..., Any]] = None
+    ):
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+        self.model_name = model_name
+        self.workers = workers or cpus
+        self.threads_per_worker = threads_per_worker or max(1, cpus // self.workers)
+        self.shard_size = shard_size
+
+        ctx = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(model_name, backend, self.threads_per_worker, device, model_kwargs or {},
+                      ctx.Value('i', 0), self.threads_per_worker if pin_cores else None, encoder_factory)
+        )
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """Encode sentences across the workers; returns one row per sentence"""
+        if self._executor is None:
+            raise RuntimeError("EncodingPool has been closed")
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        if not sentences:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Similar lengths in a shard pad less, as in SentenceTransformer.encode
+        order = sorted(range(len(sentences)), key=lambda idx: -len(sentences[idx]))
+        shards = [
+            [sentences[idx] for idx in order[start:start + self.shard_size]]
+            for start in range(0, len(order), self.shard_size)
+        ]
+        encode_kwargs = dict(kwargs, batch_size=batch_size, show_progress_bar=False)
+        # map() submits every shard now, and submitting is what spawns workers
+        with _worker_environment(self.threads_per_worker):
+            results = self._executor.map(_encode_shard, shards, [encode_kwargs] * len(shards))
+
+        embeddings = np.concatenate(list(results))
+        unsorted = np.empty_like(embeddings)
+        unsorted[order] = embeddings
+        return unsorted[0] if single else unsorted
+
+    def identity(self) -> Tuple[str, str]:
+        """(name, revision) of the workers' model"""
+        with _worker_environment(self.threads_per_worker):
+            future = self._executor.submit(_worker_identity)
+        return future.result()
+
+    def close(self):
+        """Stop the workers, dropping queued shards"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
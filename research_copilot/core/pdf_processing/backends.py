@@ -0,0 +1,153 @@
+from typing import Dict, List, Optional, Type
+
+from research_copilot.core.pdf_processing.layout import LayoutLine, summarize_line
+
+
+class PDFDocument:
+    """
+    Minimal interface shared by the PDF text backends
+
+    A document is opened on construction, reports its page count through
+    len() and returns plain text per page (None when a page has no text
+    layer). Backend libraries are imported lazily so only the selected one
+    needs to be installed.
+    """
+
+    name = None
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def page_text(self, page_num: int) -> Optional[str]:
+        raise NotImplementedError
+
+    def page_lines(self, page_num: int) -> List[LayoutLine]:
+        """Text lines with font size and weight (layout mode)"""
+        raise NotImplementedError(f"The {self.name} backend does not support layout mode")
+
+    def release_page(self, page_num: int):
+        """Drop any per-page caches once a page has been extracted"""
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class PdfPlumberDocument(PDFDocument):
+    """Layout-aware extraction; slowest, but best for layout-sensitive cases"""
+
+    name = "pdfplumber"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        import pdfplumber
+        self.pdf = pdfplumber.open(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self.pdf.pages)
+
+    def page_text(self, page_num: int) -> Optional[str]:
+        return self.pdf.pages[page_num].extract_text()
+
+    def page_lines(self, page_num: int) -> List[LayoutLine]:
+        # Lines are assembled from the page's parsed chars, so text and
+        # typography come from a single pass over the page
+        lines = self.pdf.pages[page_num].extract_text_lines(return_chars=True)
+        return [summarize_line(line['text'], line['chars']) for line in lines]
+
+    def release_page(self, page_num: int):
+        page = self.pdf.pages[page_num]
+        # Page.close() (pdfplumber >= 0.11) also clears the cached text map
+        if hasattr(page, 'close'):
+            page.close()
+        else:
+            page.flush_cache()
+        # pdfminer keeps every parsed object (content streams included) for
+        # the life of the document; later pages re-parse what they need
+        cached_objs = getattr(self.pdf.doc, '_cached_objs', None)
+        if cached_objs is not None:
+            cached_objs.clear()
+
+    def close(self):
+        self.pdf.close()
+
+
+class PyPDFDocument(PDFDocument):
+    """Pure-Python extraction via pypdf, falling back to PyPDF2"""
+
+    name = "pypdf"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            from PyPDF2 import PdfReader
+        self.reader = PdfReader(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self.reader.pages)
+
+    def page_text(self, page_num: int) -> Optional[str]:
+        return self.reader.pages[page_num].extract_text() or None
+
+
+class PdfiumDocument(PDFDocument):
+    """Native PDFium text extraction; the fast path for bulk ingest"""
+
+    name = "pypdfium2"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        import pypdfium2
+        self.pdf = pypdfium2.PdfDocument(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self.pdf)
+
+    def page_text(self, page_num: int) -> Optional[str]:
+        page = self.pdf[page_num]
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+        # PDFium separates lines with \r\n
+        return text.replace('\r\n', '\n').replace('\r', '\n') or None
+
+    def close(self):
+        self.pdf.close()
+
+
+BACKENDS: Dict[str, Type[PDFDocument]] = {
+    PdfPlumberDocument.name: PdfPlumberDocument,
+    PyPDFDocument.name: PyPDFDocument,
+    PdfiumDocument.name: PdfiumDocument,
+}
+
+
+def read_page(document: PDFDocument, page_num: int, layout: bool = False, low_memory: bool = False):
+    """Raw page text, or typed lines in layout mode"""
+    page = document.page_lines(page_num) if layout else document.page_text(page_num)
+    if low_memory:
+        document.release_page(page_num)
+    return page
+
+
+def open_pdf(pdf_path: str, backend: str = "pdfplumber") -> PDFDocument:
+    """Open a PDF with the named text backend"""
+    try:
+        document_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown PDF backend '{backend}', expected one of {sorted(BACKENDS)}")
+    return document_class(pdf_path)
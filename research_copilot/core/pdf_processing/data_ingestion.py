@@ -1,88 +1,357 @@
 # src/data_ingestion.py
 
 import os
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Optional, Tuple, Union
 from datetime import datetime
 import hashlib
-from sentence_transformers import SentenceTransformer
+import logging
+import uuid
 import numpy as np
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
+from research_copilot.core.chunking import (
+    DEFAULT_SKIP_SECTIONS, UNKNOWN_SECTION, TokenChunker, chunk_sections, chunk_spans
+)
+from research_copilot.core.embeddings.batcher import EmbeddingBatcher
+from research_copilot.core.embeddings.cache import EmbeddingCache, model_identity
+from research_copilot.core.embeddings.dedupe import NearDuplicateIndex
+from research_copilot.core.embeddings.onnx_backend import load_encoder
+from research_copilot.core.embeddings.pool import EncodingPool
+from research_copilot.core.pdf_processing.manifest import IngestManifest
+from research_copilot.core.vector_store.local import LocalVectorStore
+from research_copilot.core.vector_store.projection import Projection
+from research_copilot.core.vector_store.quantization import QUANTIZATION_KINDS
+
+logger = logging.getLogger(__name__)
+
+# SPECTER model for scientific paper embeddings
+EMBEDDING_MODEL = 'allenai/specter'
+
+# Namespace of the uuid5 point ids derived from a source and chunk index
+CHUNK_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'research-copilot/chunks')
+
+
+def chunk_text(text: str, chunk_size: int = 1000, token_chunker: Optional[TokenChunker] = None) -> List[str]:
+    """Split text into chunks of whole words, or of whole encoder windows with a token_chunker"""
+    if token_chunker is not None:
+        return token_chunker.chunk(text).texts()
+    return chunk_spans(text, chunk_size).texts()
+
+
+def chunk_section_text(
+    sections: Dict[str, str],
+    chunk_size: int = 1000,
+    skip_sections: Iterable[str] = DEFAULT_SKIP_SECTIONS,
+    token_chunker: Optional[TokenChunker] = None
+) -> Tuple[List[str], List[str]]:
+    """Chunk sections separately; returns the chunks and each chunk's section"""
+    chunks, chunk_section_names = [], []
+    if token_chunker is not None:
+        spans_by_section = token_chunker.chunk_sections(sections, skip_sections)
+    else:
+        spans_by_section = chunk_sections(sections, chunk_size, skip_sections=skip_sections,
+                                          min_tail=chunk_size // 4)
+    for name, spans in spans_by_section:
+        chunks.extend(spans)
+        chunk_section_names.extend([name] * len(spans))
+    return chunks, chunk_section_names
+
+
 class DataIngestion:
     def __init__(
         self,
         postgres_url: str,
         qdrant_url: str = "localhost",
         qdrant_port: int = 6333,
-        collection_name: str = "research_papers"
+        collection_name: str = "research_papers",
+        embedding_model: Union[str, Any, None] = EMBEDDING_MODEL,
+        chunk_by_section: bool = False,
+        skip_sections: Iterable[str] = DEFAULT_SKIP_SECTIONS,
+        token_chunking: bool = False,
+        embedding_cache_dir: Optional[str] = None,
+        embedding_batch_size: int = 32,
+        encode_workers: int = 0,
+        embedding_backend: str = "torch",
+        vector_quantization: Optional[str] = None,
+        rescore_oversampling: float = 2.0,
+        projection_path: Optional[str] = None,
+        dedupe_index_path: Optional[str] = None,
+        dedupe_threshold: float = 0.85,
+        vector_store_path: Optional[str] = None,
+        vector_store_index: str = 'exact',
+        hnsw_m: Optional[int] = None,
+        hnsw_ef: Optional[int] = None
     ):
         # Initialize database connections
         self.db_engine = create_engine(postgres_url)
         Session = sessionmaker(bind=self.db_engine)
         self.db_session = Session()
         
-        # Initialize Qdrant client
-        self.vector_db = QdrantClient(
-            host=qdrant_url,
-            port=qdrant_port
-        )
+        # Initialize Qdrant client, or with vector_store_path an in-process
+        # store of memory-mapped vectors for machines without a Qdrant server
+        # (vector_store_index exact, hnsw or hnswlib). hnsw_m (links per node) and
+        # hnsw_ef (search beam) tune the HNSW graph of either backend.
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef = hnsw_ef
+        if vector_store_path is not None:
+            self.vector_db = LocalVectorStore(vector_store_path, vector_store_index)
+        else:
+            self.vector_db = QdrantClient(
+                host=qdrant_url,
+                port=qdrant_port
+            )
         self.collection_name = collection_name
+
+        # With vector_quantization (int8 or binary) Qdrant searches compact
+        # in-RAM codes first and rescores the top limit * rescore_oversampling
+        # candidates with the full vectors, which are kept on disk
+        if vector_quantization is not None and vector_quantization not in QUANTIZATION_KINDS:
+            raise ValueError(f"Unknown vector quantization '{vector_quantization}', "
+                             f"expected one of {list(QUANTIZATION_KINDS)}")
+        self.vector_quantization = vector_quantization
+        self.rescore_oversampling = rescore_oversampling
+
+        # A fitted Projection (see `research-copilot fit-projection`) maps
+        # stored and query vectors to fewer dimensions; the embedding cache
+        # keeps the encoder's full vectors so it can be refitted
+        self.projection = Projection.load(projection_path) if projection_path else None
         
-        # Initialize SPECTER model for scientific paper embeddings
-        self.embedding_model = SentenceTransformer('allenai/specter')
+        # A model name is loaded, an encoder object is used as-is and None
+        # skips loading for processes that only store precomputed embeddings.
+        # With encode_workers the model is loaded in that many CPU worker
+        # processes instead of this one; embedding_backend picks PyTorch or
+        # an ONNX Runtime export (onnx, or onnx-int8 for quantized weights).
+        if isinstance(embedding_model, str):
+            if encode_workers > 1:
+                embedding_model = EncodingPool(embedding_model, workers=encode_workers, backend=embedding_backend)
+            else:
+                embedding_model = load_encoder(embedding_model, embedding_backend)
+        self.embedding_model = embedding_model
+
+        # Re-ingested papers and shared boilerplate reuse cached vectors
+        self.embedding_cache = None
+        if embedding_cache_dir is not None and embedding_model is not None:
+            model_name, revision = model_identity(embedding_model)
+            self.embedding_cache = EmbeddingCache(embedding_cache_dir, model_name, revision)
+        self.embedding_batch_size = embedding_batch_size
+
+        # Chunks that are near-duplicates (MinHash Jaccard >= dedupe_threshold)
+        # of anything already stored, such as boilerplate or another version
+        # of the same paper, are neither embedded nor stored
+        self.dedupe_index = None
+        if dedupe_index_path is not None:
+            self.dedupe_index = NearDuplicateIndex(dedupe_index_path, threshold=dedupe_threshold)
+
+        # Section mode chunks each extracted section on its own, labels
+        # chunks with their section and drops skip_sections entirely
+        self.chunk_by_section = chunk_by_section
+        self.skip_sections = tuple(skip_sections)
+
+        # Token mode sizes chunks in the embedding model's own tokens so
+        # each one fills the encoder window without being truncated
+        self.token_chunker = None
+        if token_chunking and self.embedding_model is not None:
+            self.token_chunker = TokenChunker.from_model(self.embedding_model)
         
         # Create Qdrant collection if it doesn't exist
         self._setup_vector_db()
     
+    def close(self):
+        """Shut down encoder worker processes and the database session"""
+        self.save_vectors()
+        if hasattr(self.embedding_model, 'close'):
+            self.embedding_model.close()
+        if self.embedding_cache is not None:
+            self.embedding_cache.flush()
+        if self.dedupe_index is not None:
+            self.dedupe_index.save()
+            stats = self.dedupe_index.stats()
+            logger.info("Near-duplicate chunks skipped: %d of %d (%.1f%%), neither encoded nor stored",
+                        stats['duplicates'], stats['checked'], 100 * stats['duplicate_ratio'])
+        self.db_session.close()
+
+    def _quantization_config(self):
+        if self.vector_quantization == 'int8':
+            return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+            ))
+        if self.vector_quantization == 'binary':
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def save_vectors(self):
+        """Write a local vector store's changes to disk; Qdrant persists upserts itself"""
+        if isinstance(self.vector_db, LocalVectorStore):
+            self.vector_db.save()
+
     def _setup_vector_db(self):
         """Setup Qdrant collection"""
+        quantization_config = self._quantization_config()
         try:
             self.vector_db.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=models.VectorParams(
-                    size=768,  # SPECTER embedding dimension
-                    distance=models.Distance.COSINE
-                )
+                    # SPECTER embedding dimension, unless projected
+                    size=self.projection.dim if self.projection is not None else 768,
+                    # Projected vectors approximate cosine by their dot product
+                    distance=models.Distance.DOT if self.projection is not None else models.Distance.COSINE,
+                    # Full vectors are only read to rescore when codes are in RAM
+                    on_disk=quantization_config is not None
+                ),
+                quantization_config=quantization_config,
+                hnsw_config=models.HnswConfigDiff(m=self.hnsw_m) if self.hnsw_m is not None else None
             )
         except Exception as e:
             print(f"Collection might already exist: {e}")
+            if quantization_config is not None:
+                # Qdrant builds the codes of existing points in the background
+                self.vector_db.update_collection(
+                    collection_name=self.collection_name,
+                    quantization_config=quantization_config
+                )
     
     def _generate_paper_id(self, metadata: Dict) -> str:
-        """Generate unique ID for paper based on metadata"""
-        unique_string = f"{metadata.get('title', '')}-{metadata.get('authors', '')}"
+        """Generate unique ID for paper based on its content hash, or on title and authors"""
+        unique_string = metadata.get('content_hash') or f"{metadata.get('title', '')}-{metadata.get('authors', '')}"
         return hashlib.md5(unique_string.encode()).hexdigest()
+
+    def source_key(self, metadata: Dict) -> str:
+        """
+        What a paper's chunk ids are derived from
+
+        The file's content hash, else its path, so that papers whose
+        extracted titles are equal or empty never share ids; metadata
+        without either falls back to the paper id.
+        """
+        return metadata.get('content_hash') or metadata.get('source_path') or self._generate_paper_id(metadata)
     
+    @staticmethod
+    def chunk_ids(source_key: str, count: int, start_index: int = 0) -> List[str]:
+        """Point ids of a source's chunks: uuid5 of "{source_key}:{index}", valid Qdrant ids"""
+        return [str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{source_key}:{idx}"))
+                for idx in range(start_index, start_index + count)]
+
     def _chunk_text(self, text: str, chunk_size: int = 1000) -> List[str]:
         """Split text into chunks"""
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_size = 0
-        
-        for word in words:
-            current_size += len(word) + 1  # +1 for space
-            if current_size > chunk_size:
-                chunks.append(' '.join(current_chunk))
-                current_chunk = [word]
-                current_size = len(word)
-            else:
-                current_chunk.append(word)
-        
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
-        
-        return chunks
+        return chunk_text(text, chunk_size, self.token_chunker)
+
+    def _chunk_sections(self, sections: Dict[str, str], chunk_size: int = 1000) -> Tuple[List[str], List[str]]:
+        """Split each section into chunks; returns chunks and their section names"""
+        return chunk_section_text(sections, chunk_size, self.skip_sections, self.token_chunker)
     
     def _generate_embeddings(self, chunks: List[str]) -> np.ndarray:
-        """Generate embeddings for text chunks"""
-        return self.embedding_model.encode(chunks, show_progress_bar=True)
+        """Generate embeddings for text chunks, encoding only cache misses"""
+        kwargs = {'batch_size': self.embedding_batch_size, 'show_progress_bar': False}
+        if self.embedding_cache is not None:
+            return self.embedding_cache.encode(self.embedding_model, chunks, **kwargs)
+        return self.embedding_model.encode(chunks, **kwargs)
+
+    def _encode_batch(self, chunks: List[str]) -> np.ndarray:
+        """Encode one batch prepared by the EmbeddingBatcher as a single forward pass"""
+        kwargs = {'batch_size': len(chunks), 'show_progress_bar': False}
+        if self.embedding_cache is not None:
+            return self.embedding_cache.encode(self.embedding_model, chunks, **kwargs)
+        return self.embedding_model.encode(chunks, **kwargs)
+
+    def _drop_near_duplicates(
+        self,
+        source: str,
+        chunks: List[str],
+        sections: Optional[List[str]] = None
+    ) -> Tuple[List[str], Optional[List[str]]]:
+        """Chunks (and their sections) that are not near-duplicates of stored ones"""
+        if self.dedupe_index is None:
+            return chunks, sections
+        keep = self.dedupe_index.filter(source, chunks)
+        return [chunks[i] for i in keep], None if sections is None else [sections[i] for i in keep]
+
+    def _forget_unstored(self, metadata: Dict[str, Any]):
+        """Drop a paper whose store failed from the dedupe index, so nothing is deduplicated against it"""
+        if self.dedupe_index is not None:
+            self.dedupe_index.remove_source(self.source_key(metadata))
+
+    def _chunk_paper(self, paper_data: Dict[str, Any]) -> Tuple[List[str], Optional[List[str]]]:
+        """Chunks of a paper and, in section mode, each chunk's section"""
+        if self.chunk_by_section and paper_data.get('sections'):
+            return self._chunk_sections(paper_data['sections'])
+        return self._chunk_text(paper_data.get('full_text', '')), None
     
-    def store_paper(self, paper_data: Dict[str, Any]) -> str:
+    def _store_metadata(self, metadata: Dict[str, Any]):
+        """Insert or refresh the paper's metadata row in PostgreSQL"""
+        self.db_session.execute(
+            """
+            INSERT INTO papers (
+                paper_id, title, sections_found, total_pages, 
+                processed_date, filename
+            ) VALUES (
+                :paper_id, :title, :sections_found, :total_pages,
+                :processed_date, :filename
+            )
+            ON CONFLICT (paper_id) DO UPDATE SET
+                processed_date = EXCLUDED.processed_date
+            """,
+            metadata
+        )
+        self.db_session.commit()
+
+    def _build_points(
+        self,
+        paper_id: str,
+        chunks: List[str],
+        embeddings: np.ndarray,
+        metadata: Dict[str, Any],
+        start_index: int = 0,
+        sections: Optional[List[str]] = None
+    ) -> List[models.PointStruct]:
+        """
+        Build Qdrant points for a run of chunks starting at start_index
+
+        sections, when given, holds each chunk's section name; it is stored
+        in the payload so searches can filter or group by section, and
+        chunks of unsectioned text are labelled UNKNOWN_SECTION.
+        """
+        if self.projection is not None:
+            embeddings = self.projection.apply(embeddings)
+        points = []
+        point_ids = self.chunk_ids(self.source_key(metadata), len(chunks), start_index)
+        for offset, (point_id, chunk, embedding) in enumerate(zip(point_ids, chunks, embeddings)):
+            payload = {
+                'paper_id': paper_id,
+                'chunk_index': start_index + offset,
+                'section': sections[offset] if sections is not None else UNKNOWN_SECTION,
+                'text': chunk,
+                'metadata': {
+                    'title': metadata.get('title', ''),
+                    'sections_found': list(metadata.get('sections_found', [])),
+                    'total_pages': metadata.get('total_pages', 0)
+                }
+            }
+            points.append(models.PointStruct(
+                id=point_id,
+                vector=embedding.tolist(),
+                payload=payload
+            ))
+        return points
+
+    def store_paper(
+        self,
+        paper_data: Dict[str, Any],
+        chunks: Optional[List[str]] = None,
+        embeddings: Optional[np.ndarray] = None,
+        chunk_section_names: Optional[List[str]] = None
+    ) -> str:
         """
         Store paper data in both PostgreSQL and Qdrant
+
+        Chunks and embeddings computed elsewhere (e.g. by earlier stages of
+        the ingest pipeline) are used as-is instead of being recomputed, and
+        chunk_section_names optionally gives each precomputed chunk's
+        section. Precomputed chunks are expected to be deduplicated
+        already. In section mode paper_data['sections'] is chunked instead
+        of full_text.
         """
         try:
             # Generate unique paper ID
@@ -92,74 +361,189 @@ class DataIngestion:
             metadata = paper_data['metadata']
             metadata['paper_id'] = paper_id
             metadata['processed_date'] = datetime.now()
-            
-            # Insert into PostgreSQL
-            self.db_session.execute(
-                """
-                INSERT INTO papers (
-                    paper_id, title, sections_found, total_pages, 
-                    processed_date, filename
-                ) VALUES (
-                    :paper_id, :title, :sections_found, :total_pages,
-                    :processed_date, :filename
-                )
-                ON CONFLICT (paper_id) DO UPDATE SET
-                    processed_date = EXCLUDED.processed_date
-                """,
-                metadata
-            )
-            self.db_session.commit()
+            self._store_metadata(metadata)
             
             # Process text and generate embeddings
-            full_text = paper_data.get('full_text', '')
-            chunks = self._chunk_text(full_text)
-            embeddings = self._generate_embeddings(chunks)
-            
-            # Store in Qdrant
-            points = []
-            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                points.append(models.PointStruct(
-                    id=f"{paper_id}_{idx}",
-                    vector=embedding.tolist(),
-                    payload={
-                        'paper_id': paper_id,
-                        'chunk_index': idx,
-                        'text': chunk,
-                        'metadata': {
-                            'title': metadata.get('title', ''),
-                            'sections_found': metadata.get('sections_found', []),
-                            'total_pages': metadata.get('total_pages', 0)
-                        }
-                    }
-                ))
+            if chunks is None:
+                chunks, chunk_section_names = self._chunk_paper(paper_data)
+                if self.dedupe_index is not None:
+                    # A re-stored paper must not match its own earlier chunks
+                    source = self.source_key(metadata)
+                    self.dedupe_index.remove_source(source)
+                    chunks, chunk_section_names = self._drop_near_duplicates(source, chunks, chunk_section_names)
+            if embeddings is None:
+                embeddings = self._generate_embeddings(chunks)
             
             # Upload to Qdrant
             self.vector_db.upsert(
                 collection_name=self.collection_name,
-                points=points
+                points=self._build_points(paper_id, chunks, embeddings, metadata,
+                                          sections=chunk_section_names)
             )
             
             return paper_id
             
         except Exception as e:
             self.db_session.rollback()
+            self._forget_unstored(paper_data['metadata'])
+            raise Exception(f"Error storing paper: {str(e)}")
+
+    def delete_chunks(self, chunk_ids: List[str]):
+        """Delete chunk vectors, e.g. those of a changed or removed file"""
+        if not chunk_ids:
+            return
+        self.vector_db.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=list(chunk_ids))
+        )
+
+    def store_papers(self, papers: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Store many papers, batching embedding work across them
+
+        Chunks of consecutive papers are pooled by an EmbeddingBatcher and
+        encoded in fixed-size, length-sorted batches; each paper is stored
+        as soon as all of its vectors are back. Returns the paper ids in
+        input order.
+        """
+        batcher = EmbeddingBatcher(self._encode_batch, self.embedding_batch_size)
+        prepared = {}
+        paper_ids = []
+
+        def store_completed(completed):
+            for idx, embeddings in completed:
+                paper_data, chunks, chunk_section_names = prepared.pop(idx)
+                paper_ids.append(self.store_paper(
+                    paper_data, chunks=chunks, embeddings=embeddings,
+                    chunk_section_names=chunk_section_names
+                ))
+
+        try:
+            for idx, paper_data in enumerate(papers):
+                chunks, chunk_section_names = self._chunk_paper(paper_data)
+                if self.dedupe_index is not None:
+                    source = self.source_key(paper_data['metadata'])
+                    self.dedupe_index.remove_source(source)
+                    chunks, chunk_section_names = self._drop_near_duplicates(source, chunks, chunk_section_names)
+                prepared[idx] = (paper_data, chunks, chunk_section_names)
+                store_completed(batcher.add(idx, chunks))
+            store_completed(batcher.flush())
+        except Exception:
+            # Papers still waiting for vectors were never stored
+            for paper_data, _, _ in prepared.values():
+                self._forget_unstored(paper_data['metadata'])
+            raise
+        return paper_ids
+
+    def store_pdf(self, pdf_path: str, extractor) -> str:
+        """
+        Extract, chunk, embed and store a PDF section by section
+
+        Sections from extractor.iter_sections() are chunked and upserted as
+        soon as they close, so peak memory is bounded by one section rather
+        than the whole document. Chunks never span two sections and carry
+        their section name; in section mode skip_sections are not stored.
+        The metadata row is written once extraction has finished.
+        """
+        metadata = None
+        try:
+            metadata = {'filename': os.path.basename(pdf_path), 'content_hash': IngestManifest.file_hash(pdf_path)}
+            paper_id = None
+            chunk_count = 0
+            source = self.source_key(metadata)
+            if self.dedupe_index is not None:
+                self.dedupe_index.remove_source(source)
+
+            for section_name, section_text, _ in extractor.iter_sections(pdf_path, metadata=metadata):
+                # The title is known once the first page has been read
+                if paper_id is None:
+                    paper_id = self._generate_paper_id(metadata)
+
+                if self.chunk_by_section:
+                    chunks, sections = self._chunk_sections({section_name: section_text})
+                else:
+                    chunks = self._chunk_text(section_text)
+                    sections = [section_name] * len(chunks)
+                chunks, sections = self._drop_near_duplicates(source, chunks, sections)
+                if not chunks:
+                    continue
+                embeddings = self._generate_embeddings(chunks)
+                self.vector_db.upsert(
+                    collection_name=self.collection_name,
+                    points=self._build_points(paper_id, chunks, embeddings, metadata, chunk_count, sections)
+                )
+                chunk_count += len(chunks)
+
+            if paper_id is None:
+                paper_id = self._generate_paper_id(metadata)
+            metadata['paper_id'] = paper_id
+            metadata['processed_date'] = datetime.now()
+            self._store_metadata(metadata)
+
+            return paper_id
+
+        except Exception as e:
+            self.db_session.rollback()
+            if metadata is not None:
+                self._forget_unstored(metadata)
             raise Exception(f"Error storing paper: {str(e)}")
     
+    def _search_params(self) -> Optional[models.SearchParams]:
+        if self.vector_quantization is None and self.hnsw_ef is None:
+            return None
+        quantization = None
+        if self.vector_quantization is not None:
+            quantization = models.QuantizationSearchParams(rescore=True, oversampling=self.rescore_oversampling)
+        return models.SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
     def search_similar(self, query: str, limit: int = 5) -> List[Dict]:
         """
         Search for similar content using query
         """
         # Generate embedding for query
         query_embedding = self.embedding_model.encode([query])[0]
+        if self.projection is not None:
+            query_embedding = self.projection.apply(query_embedding)
         
         # Search in Qdrant
-        results = self.vector_db.search(
+        results = self.vector_db.query_points(
             collection_name=self.collection_name,
-            query_vector=query_embedding.tolist(),
-            limit=limit
+            query=query_embedding.tolist(),
+            limit=limit,
+            search_params=self._search_params()
         )
         
-        # Format results
+        return self._format_results(results.points)
+
+    def search_similar_batch(self, queries: List[str], limit: int = 5) -> List[List[Dict]]:
+        """
+        Search for several queries at once; returns each query's results in order
+
+        All queries are encoded by one encode() call and sent as a single
+        batched search (Qdrant query_batch_points, or one matrix-matrix product
+        in a local exact store), so per-query overhead is paid once.
+        """
+        if not queries:
+            return []
+        query_embeddings = self.embedding_model.encode(
+            list(queries), batch_size=self.embedding_batch_size, show_progress_bar=False
+        )
+        if self.projection is not None:
+            query_embeddings = self.projection.apply(query_embeddings)
+
+        search_params = self._search_params()
+        results = self.vector_db.query_batch_points(
+            collection_name=self.collection_name,
+            requests=[
+                models.QueryRequest(query=embedding.tolist(), limit=limit, filter=None, params=search_params,
+                                    with_payload=True)
+                for embedding in query_embeddings
+            ]
+        )
+        return [self._format_results(response.points) for response in results]
+
+    @staticmethod
+    def _format_results(results) -> List[Dict]:
         formatted_results = []
         for res in results:
             formatted_results.append({
@@ -169,7 +553,3 @@ class DataIngestion:
             })
         
         return formatted_results
-    
-    def close(self):
-        """Close database connections"""
-        self.db_session.close()
\ No newline at end of file
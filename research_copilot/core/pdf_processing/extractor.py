@@ -1,60 +1,113 @@
 import PyPDF2
 import re
-from typing import Dict, Any
+import hashlib
+import json
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import os
-import pdfplumber
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+from research_copilot.config.settings import Config
+from research_copilot.core.chunking import UNKNOWN_SECTION
+from research_copilot.core.pdf_processing.backends import open_pdf, read_page
+from research_copilot.core.pdf_processing.cache import ExtractionCache
+from research_copilot.core.pdf_processing.headers import SECTION_PATTERNS, SectionHeaderMatcher
+from research_copilot.core.pdf_processing.layout import LayoutLine, classify_page
+from research_copilot.core.pdf_processing.memory import RSSMonitor
+from research_copilot.core.pdf_processing.workers import count_pages_with_budget, iter_pages_with_budget
+
+# Bump whenever extraction output changes so cached results are invalidated
+EXTRACTOR_VERSION = "2"
+
+
+def _extract_page_range(
+    pdf_path: str,
+    start: int,
+    end: int,
+    backend: str,
+    layout: bool,
+    low_memory: bool,
+    max_rss_mb: Optional[float]
+) -> Tuple[List[Any], float]:
+    """Extract pages [start, end) in a worker process; returns (pages, peak_rss_mb)"""
+    monitor = RSSMonitor(max_rss_mb)
+    pages = []
+    with open_pdf(pdf_path, backend) as document:
+        for page_num in range(start, end):
+            pages.append(read_page(document, page_num, layout, low_memory))
+            monitor.sample(f" on page {page_num}")
+    return pages, monitor.peak_mb
 
 
 class PDFExtractor:
-    def __init__(self, storage_path: str = "../../../data/processed"):
+    def __init__(
+        self,
+        storage_path: str = "../../../data/processed",
+        workers: int = 1,
+        use_cache: bool = True,
+        cache_max_bytes: int = 512 * 1024 * 1024,
+        backend: Optional[str] = None,
+        layout: bool = False,
+        low_memory: bool = False,
+        max_rss_mb: Optional[float] = None,
+        page_timeout: Optional[float] = None,
+        document_timeout: Optional[float] = None
+    ):
         self.storage_path = storage_path
-        self.section_patterns = [
-            # Common section title patterns
-            r'^(?:\d+\.)?\s*abstract\s*$',
-            r'^(?:\d+\.)?\s*introduction\s*$',
-            r'^(?:\d+\.)?\s*(?:methodology|methods|materials and methods)\s*$',
-            r'^(?:\d+\.)?\s*(?:results|findings)\s*$',
-            r'^(?:\d+\.)?\s*discussion\s*$',
-            r'^(?:\d+\.)?\s*conclusion(?:s)?\s*$',
-            r'^(?:\d+\.)?\s*references\s*$',
-            r'^(?:\d+\.)?\s*background\s*$',
-            r'^(?:\d+\.)?\s*related work\s*$',
-            r'^(?:\d+\.)?\s*experimental setup\s*$',
-            r'^(?:\d+\.)?\s*evaluation\s*$',
-            r'^[A-Z][A-Z ]+$',  # All-uppercase titles (e.g., INTRODUCTION)
-        ]
-        self.section_patterns = [re.compile(p, re.IGNORECASE) for p in self.section_patterns]
+        # Number of worker processes used for page extraction (1 = serial)
+        self.workers = workers
+        # Text backend: pdfplumber, pypdf or pypdfium2 (see backends.py)
+        self.backend = backend or Config.PDF_BACKEND
+        # Detect title and headers from font size and weight (pdfplumber only)
+        self.layout = layout
+        # Release each page's parsed objects once it has been read, and abort
+        # a document whose extraction pushes RSS past max_rss_mb
+        self.low_memory = low_memory
+        self.max_rss_mb = max_rss_mb
+        # Time budgets in seconds; when set, pages are read in killable
+        # worker processes and pages over budget are skipped
+        self.page_timeout = page_timeout
+        self.document_timeout = document_timeout
+        self.use_cache = use_cache
+        self.section_patterns = SECTION_PATTERNS
         os.makedirs(storage_path, exist_ok=True)
+        self.cache = ExtractionCache(
+            os.path.join(storage_path, "extraction_cache"),
+            max_bytes=cache_max_bytes
+        )
+
+    @property
+    def section_patterns(self) -> List[re.Pattern]:
+        return self._section_patterns
+
+    @section_patterns.setter
+    def section_patterns(self, patterns):
+        """Compile the patterns and rebuild the combined header matcher"""
+        self._section_patterns = [
+            p if isinstance(p, re.Pattern) else re.compile(p, re.IGNORECASE)
+            for p in patterns
+        ]
+        self.header_matcher = SectionHeaderMatcher(self._section_patterns)
+
+    def fingerprint(self, backend: Optional[str] = None, layout: Optional[bool] = None) -> str:
+        """Identify the settings that affect extraction output"""
+        settings = {
+            "version": EXTRACTOR_VERSION,
+            "backend": backend or self.backend,
+            "layout": self.layout if layout is None else layout,
+            "section_patterns": [p.pattern for p in self.section_patterns],
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
 
     def is_section_header(self, line: str) -> bool:
         """
         Determine if a line is likely a section header based on multiple criteria
         """
-        # Skip empty lines
-        if not line.strip():
-            return False
-
-        line = line.strip().lower()
-
-        # Check against section patterns
-        return any(pattern.match(line) for pattern in self.section_patterns)
+        return self.header_matcher.matches(line)
 
     def clean_section_name(self, header: str) -> str:
         """Clean and standardize section names"""
-        # Remove numbers and extra spaces
-        clean = re.sub(r'^\d+\.?\s*', '', header)
-        clean = clean.strip().lower()
-
-        # Map similar section names to standard ones
-        section_mapping = {
-            'methodology': 'methods',
-            'materials and methods': 'methods',
-            'experimental setup': 'methods',
-            'findings': 'results',
-            'conclusions': 'conclusion'
-        }
-
-        return section_mapping.get(clean, clean)
+        return self.header_matcher.canonical_name(header)
 
     def replace_ligatures(self, text: str) -> str:
         """Replace common ligatures and special characters"""
@@ -70,8 +123,221 @@ class PDFExtractor:
             text = text.replace(ligature, replacement)
         return text
 
-    def extract_text_with_sections(self, pdf_path: str) -> Dict[str, Any]:
-        """Extract text from PDF with improved section detection"""
+    def _iter_pages(
+        self,
+        document,
+        page_count: int,
+        pdf_path: str,
+        workers: int,
+        backend: str,
+        layout: bool,
+        monitor: Optional[RSSMonitor] = None,
+        skipped: Optional[List[Dict[str, Any]]] = None
+    ) -> Iterator[Tuple[int, Any]]:
+        """
+        Yield (page_num, page) in page order, fanning page ranges out to a
+        process pool when more than one worker is requested. Worker peak
+        RSS is folded into monitor. With time budgets, pages come from
+        killable workers and skipped pages are recorded in skipped, and
+        document is None: the parent process never opens the PDF.
+        """
+        if self.page_timeout is not None or self.document_timeout is not None:
+            yield from iter_pages_with_budget(
+                pdf_path, page_count, backend,
+                layout=layout,
+                low_memory=self.low_memory,
+                max_rss_mb=self.max_rss_mb,
+                workers=workers,
+                page_timeout=self.page_timeout,
+                document_timeout=self.document_timeout,
+                skipped=skipped,
+                monitor=monitor
+            )
+            return
+
+        if workers <= 1 or page_count <= 1:
+            for page_num in range(page_count):
+                yield page_num, read_page(document, page_num, layout, self.low_memory)
+            return
+
+        # A few ranges per worker keeps the pool busy when page costs are uneven
+        range_size = max(1, -(-page_count // (workers * 2)))
+        starts = list(range(0, page_count, range_size))
+        ends = [min(start + range_size, page_count) for start in starts]
+        count = len(starts)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            page_num = 0
+            # map() returns results in submission order, so pages stay ordered
+            for pages, peak_mb in pool.map(
+                _extract_page_range, [pdf_path] * count, starts, ends, [backend] * count,
+                [layout] * count, [self.low_memory] * count, [self.max_rss_mb] * count
+            ):
+                if monitor is not None:
+                    monitor.peak_mb = max(monitor.peak_mb, peak_mb)
+                for page in pages:
+                    yield page_num, page
+                    page_num += 1
+
+    def _classify_lines(
+        self,
+        page_num: int,
+        page: Any,
+        layout: bool
+    ) -> Tuple[List[Tuple[str, Optional[str]]], Optional[str]]:
+        """
+        Turn one extracted page into [(line, section_name or None)] plus the
+        title when this is the first page
+        """
+        if layout:
+            lines = [LayoutLine(self.replace_ligatures(l.text), l.size, l.bold) for l in page]
+            classified = classify_page(
+                lines, self.header_matcher.canonical_name, first_page=page_num == 0
+            )
+            title = classified['title']
+            if page_num == 0 and not title:
+                title = " ".join(text for text, _ in classified['lines'][:3])
+            return classified['lines'], title
+
+        title = None
+        if page_num == 0:
+            # Attempt to extract title from the first page
+            first_lines = [l.strip() for l in (page or '').split('\n') if l.strip()]
+            if first_lines:
+                title = " ".join(first_lines[:3])
+        if page is None:
+            return [], title
+
+        classified = []
+        for line in self.replace_ligatures(page).split('\n'):
+            if line.strip():
+                # Check if this line is a section header
+                classified.append((line.strip(), self.header_matcher.classify(line)))
+        return classified, title
+
+    def iter_sections(
+        self,
+        pdf_path: str,
+        workers: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        backend: Optional[str] = None,
+        layout: Optional[bool] = None
+    ) -> Iterator[Tuple[str, str, Tuple[int, int]]]:
+        """
+        Yield (section_name, text, (first_page, last_page)) as each section closes
+
+        Only the section being built is held in memory. Page numbers are
+        0-based. If a metadata dict is passed it is filled in as extraction
+        runs: total_pages up front, title once the first page has been read
+        (before the first section is yielded) and sections_found as headers
+        are seen. backend and layout override the extractor's settings for
+        this call. In low-memory mode, or with an RSS ceiling, peak_rss_mb is
+        kept up to date in metadata and MemoryBudgetExceeded is raised when
+        the ceiling is crossed. With time budgets, pages that time out or
+        fail are listed in metadata["skipped_pages"] instead of failing the
+        document.
+        """
+        workers = self.workers if workers is None else workers
+        backend = backend or self.backend
+        layout = self.layout if layout is None else layout
+        if metadata is None:
+            metadata = {}
+        metadata.setdefault("title", "")
+        metadata.setdefault("sections_found", [])
+
+        current_section = UNKNOWN_SECTION
+        current_text = []
+        section_start = 0
+        section_end = 0
+        monitor = None
+        if self.low_memory or self.max_rss_mb is not None:
+            monitor = RSSMonitor(self.max_rss_mb)
+        skipped = None
+        if self.page_timeout is not None or self.document_timeout is not None:
+            skipped = metadata.setdefault("skipped_pages", [])
+
+        with ExitStack() as stack:
+            if skipped is not None:
+                # Opening can hang too, so it gets a worker and a budget of its own
+                budgets = [t for t in (self.page_timeout, self.document_timeout) if t is not None]
+                document = None
+                page_count = count_pages_with_budget(pdf_path, backend, min(budgets))
+            else:
+                document = stack.enter_context(open_pdf(pdf_path, backend))
+                page_count = len(document)
+            metadata["total_pages"] = page_count
+
+            for page_num, page in self._iter_pages(
+                document, page_count, pdf_path, workers, backend, layout, monitor, skipped
+            ):
+                if monitor is not None:
+                    monitor.sample(f" on page {page_num}")
+                    metadata["peak_rss_mb"] = round(monitor.peak_mb, 1)
+
+                lines, title = self._classify_lines(page_num, page, layout)
+                if title:
+                    metadata["title"] = title
+
+                for line, section_name in lines:
+                    if section_name is not None:
+                        # Close the previous section
+                        if current_text:
+                            section_text = '\n'.join(current_text).strip()
+                            if section_text:
+                                yield current_section, section_text, (section_start, section_end)
+
+                        # Start new section
+                        current_section = section_name
+                        if current_section not in metadata["sections_found"]:
+                            metadata["sections_found"].append(current_section)
+                        current_text = []
+                        section_start = page_num
+                    else:
+                        if not current_text and current_section == UNKNOWN_SECTION:
+                            section_start = page_num
+                        current_text.append(line)
+                        section_end = page_num
+
+            if current_text:
+                section_text = '\n'.join(current_text).strip()
+                if section_text:
+                    yield current_section, section_text, (section_start, section_end)
+
+    def extract_text_with_sections(
+        self,
+        pdf_path: str,
+        workers: Optional[int] = None,
+        use_cache: Optional[bool] = None,
+        backend: Optional[str] = None,
+        layout: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract text from PDF with improved section detection
+
+        Pages are extracted in parallel when workers > 1 (defaults to
+        self.workers); the output is identical to the serial path. Use
+        iter_sections() to avoid holding the whole document in memory.
+        Results are cached under storage_path by PDF content hash, and a
+        cache hit returns without opening the PDF. layout=True detects the
+        title and headers from typography instead of the section patterns.
+        A header that appears again appends to its section in 'sections'
+        rather than replacing the earlier text.
+        """
+        backend = backend or self.backend
+        layout = self.layout if layout is None else layout
+        use_cache = self.use_cache if use_cache is None else use_cache
+        cache_key = None
+        if use_cache:
+            try:
+                cache_key = ExtractionCache.make_key(pdf_path, self.fingerprint(backend, layout))
+            except OSError:
+                # Unreadable file: let extraction record the error
+                cache_key = None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         text_content = {
             "metadata": {
                 "title": "",
@@ -82,56 +348,34 @@ class PDFExtractor:
             "full_text": ""
         }
 
-        current_section = "unknown"
-        current_text = []
         all_text = []
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                text_content["metadata"]["total_pages"] = len(pdf.pages)
-
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text()
-                    if text is None:
-                        continue
-                    text = self.replace_ligatures(text)
-                    lines = text.split('\n')
-
-                    for line in lines:
-                        if not line.strip():
-                            continue
-
-                        # Check if this line is a section header
-                        if self.is_section_header(line):
-                            # Save the previous section
-                            if current_text:
-                                section_text = '\n'.join(current_text).strip()
-                                if section_text:
-                                    text_content["sections"][current_section] = section_text
-
-                            # Start new section
-                            current_section = self.clean_section_name(line.strip())
-                            if current_section not in text_content["metadata"]["sections_found"]:
-                                text_content["metadata"]["sections_found"].append(current_section)
-                            current_text = []
-                        else:
-                            current_text.append(line.strip())
-                            all_text.append(line.strip())
-
-                if current_text:
-                    section_text = '\n'.join(current_text).strip()
-                    if section_text:
-                        text_content["sections"][current_section] = section_text
-
-                text_content["full_text"] = '\n'.join(all_text)
-
-                # Attempt to extract title from the first page
-                first_page_text = pdf.pages[0].extract_text()
-                first_lines = [l.strip() for l in first_page_text.split('\n') if l.strip()]
-                if first_lines:
-                    text_content["metadata"]["title"] = " ".join(first_lines[:3])
+            for section_name, section_text, _ in self.iter_sections(
+                pdf_path, workers=workers, metadata=text_content["metadata"],
+                backend=backend, layout=layout
+            ):
+                # A header seen again continues its section instead of
+                # replacing the text collected so far
+                sections = text_content["sections"]
+                if section_name in sections:
+                    sections[section_name] += '\n' + section_text
+                else:
+                    sections[section_name] = section_text
+                all_text.append(section_text)
+
+            text_content["full_text"] = '\n'.join(all_text)
 
         except Exception as e:
             text_content["metadata"]["error"] = str(e)
 
+        # Failed extractions, and ones that skipped pages over a time budget
+        # (which is not part of the fingerprint), are retried rather than cached
+        metadata = text_content["metadata"]
+        if cache_key is not None and "error" not in metadata and not metadata.get("skipped_pages"):
+            # Peak memory describes this run only, so it is not cached
+            cached = dict(text_content, metadata=dict(text_content["metadata"]))
+            cached["metadata"].pop("peak_rss_mb", None)
+            self.cache.put(cache_key, cached)
+
         return text_content
@@ -0,0 +1,89 @@
+import re
+from typing import Dict, Iterable, Optional, Pattern, Union
+
+SECTION_PATTERNS = [
+    # Common section title patterns
+    r'^(?:\d+\.)?\s*abstract\s*$',
+    r'^(?:\d+\.)?\s*introduction\s*$',
+    r'^(?:\d+\.)?\s*(?:methodology|methods|materials and methods)\s*$',
+    r'^(?:\d+\.)?\s*(?:results|findings)\s*$',
+    r'^(?:\d+\.)?\s*discussion\s*$',
+    r'^(?:\d+\.)?\s*conclusion(?:s)?\s*$',
+    r'^(?:\d+\.)?\s*references\s*$',
+    r'^(?:\d+\.)?\s*background\s*$',
+    r'^(?:\d+\.)?\s*related work\s*$',
+    r'^(?:\d+\.)?\s*experimental setup\s*$',
+    r'^(?:\d+\.)?\s*evaluation\s*$',
+    r'^[A-Z][A-Z ]+$',  # All-uppercase titles (e.g., INTRODUCTION)
+]
+
+# Map similar section names to standard ones
+SECTION_MAPPING = {
+    'methodology': 'methods',
+    'materials and methods': 'methods',
+    'experimental setup': 'methods',
+    'findings': 'results',
+    'conclusions': 'conclusion'
+}
+
+_NUMBER_PREFIX = re.compile(r'^\d+\.?\s*')
+
+
+class SectionHeaderMatcher:
+    """
+    Classify lines as section headers with one combined regex
+
+    All patterns are joined into a single alternation, so a line is matched
+    once instead of once per pattern. Every built-in pattern starts with a
+    digit or a letter and ends with a letter, so with those patterns lines
+    failing that cheap check are rejected before any regex work (pass
+    fast_reject to override for custom patterns). max_length optionally
+    rejects long lines too; it is off by default because the all-uppercase
+    pattern has no length limit and enabling it changes which lines are
+    headers.
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[Union[str, Pattern]] = SECTION_PATTERNS,
+        mapping: Optional[Dict[str, str]] = None,
+        max_length: Optional[int] = None,
+        fast_reject: Optional[bool] = None
+    ):
+        sources = [p.pattern if hasattr(p, 'pattern') else p for p in patterns]
+        self.regex = re.compile('|'.join(f'(?:{p})' for p in sources), re.IGNORECASE)
+        self.mapping = SECTION_MAPPING if mapping is None else mapping
+        self.max_length = max_length
+        self.fast_reject = sources == SECTION_PATTERNS if fast_reject is None else fast_reject
+
+    def matches(self, line: str) -> bool:
+        """Return True if the line looks like a section header"""
+        line = line.strip()
+        if not line:
+            return False
+        if self.max_length is not None and len(line) > self.max_length:
+            return False
+
+        line = line.lower()
+        # Fast rejection: headers start with a number or letter and end with a letter
+        if self.fast_reject and (
+            not line[-1].isalpha() or not (line[0].isalpha() or line[0].isdecimal())
+        ):
+            return False
+
+        return self.regex.match(line) is not None
+
+    def canonical_name(self, header: str) -> str:
+        """Strip section numbering and map the header to a standard name"""
+        header = header.strip()
+        # Only pay for the substitution when the header is numbered
+        if header and header[0].isdecimal():
+            header = _NUMBER_PREFIX.sub('', header)
+        clean = header.strip().lower()
+        return self.mapping.get(clean, clean)
+
+    def classify(self, line: str) -> Optional[str]:
+        """Return the canonical section name if the line is a header, else None"""
+        if not self.matches(line):
+            return None
+        return self.canonical_name(line)
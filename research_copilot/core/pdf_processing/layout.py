@@ -0,0 +1,118 @@
+import re
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Font names of bold faces, e.g. Times-Bold, NimbusRomNo9L-Medi, CMBX10
+_BOLD_FONT = re.compile(r'bold|black|heavy|medi|cmbx', re.IGNORECASE)
+
+# Section numbering such as "2", "2.1.", "IV." or "A."
+_NUMBERING = re.compile(r'^(?:\d+(?:\.\d+)*\.?|[IVX]+\.|[A-Z]\.)\s*')
+
+
+class LayoutLine(NamedTuple):
+    """A text line with the typography of its characters"""
+    text: str
+    size: float
+    bold: bool
+
+
+def summarize_line(text: str, chars: List[Dict[str, Any]]) -> LayoutLine:
+    """
+    Reduce a line's characters to its dominant font size and weight
+
+    The line counts as bold only if nearly all of its visible characters
+    are, so a bold run-in heading followed by body text is not bold.
+    """
+    visible = [c for c in chars if not c.get('text', '').isspace()]
+    if not visible:
+        return LayoutLine(text, 0.0, False)
+    size = Counter(round(c['size'], 1) for c in visible).most_common(1)[0][0]
+    bold_chars = sum(1 for c in visible if _BOLD_FONT.search(c.get('fontname', '')))
+    return LayoutLine(text, size, bold_chars >= 0.9 * len(visible))
+
+
+def body_font_size(lines: List[LayoutLine]) -> float:
+    """Most common font size on the page, weighted by line length"""
+    sizes = Counter()
+    for line in lines:
+        sizes[line.size] += len(line.text)
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def title_lines(lines: List[LayoutLine], body_size: float) -> List[int]:
+    """Indexes of the first run of lines set in the page's largest font"""
+    if not lines:
+        return []
+    largest = max(line.size for line in lines)
+    if largest <= body_size:
+        return []
+    indexes = []
+    for idx, line in enumerate(lines):
+        if line.size == largest:
+            indexes.append(idx)
+        elif indexes:
+            break
+    return indexes
+
+
+def strip_numbering(header: str) -> str:
+    """Remove leading section numbering from a header"""
+    return _NUMBERING.sub('', header.strip())
+
+
+def is_typographic_header(
+    line: LayoutLine,
+    body_size: float,
+    size_ratio: float = 1.15,
+    max_chars: int = 80
+) -> bool:
+    """
+    Decide from typography whether a line is a section header
+
+    Headers are short, start with a capital letter after any numbering, do
+    not end like a sentence and are either set larger than the body text,
+    or set in bold (or upper case) with section numbering in front.
+    """
+    text = line.text.strip()
+    if not text or len(text) > max_chars or text[-1] in '.,;:-':
+        return False
+    name = strip_numbering(text)
+    if not name or not name[0].isupper():
+        return False
+
+    if line.size >= body_size * size_ratio:
+        return True
+
+    numbered = name != text
+    return numbered and (line.bold or name.isupper())
+
+
+def classify_page(
+    lines: List[LayoutLine],
+    header_name,
+    first_page: bool = False
+) -> Dict[str, Any]:
+    """
+    Split a page's lines into content and typographic headers
+
+    header_name maps a header line's text to its canonical section name.
+    Returns {'lines': [(text, section_name or None), ...], 'title': str}
+    where title is only set on the first page.
+    """
+    body_size = body_font_size(lines)
+    title_idx = set(title_lines(lines, body_size)) if first_page else set()
+
+    classified = []
+    for idx, line in enumerate(lines):
+        text = line.text.strip()
+        if not text:
+            continue
+        if idx not in title_idx and is_typographic_header(line, body_size):
+            classified.append((text, header_name(strip_numbering(text))))
+        else:
+            classified.append((text, None))
+
+    title: Optional[str] = None
+    if first_page:
+        title = " ".join(lines[idx].text.strip() for idx in sorted(title_idx))
+    return {'lines': classified, 'title': title}
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class IngestManifest:
+    """
+    Append-only JSON-lines record of files that finished ingestion
+
+    Each line stores the file's absolute path with the size, mtime and
+    content hash it had when it was ingested, plus the ids of the chunks it
+    produced, so a rerun can skip files that are unchanged, pick up where an
+    interrupted run stopped and delete the chunks of changed or removed
+    files. Later lines for the same path win; a line with "removed" drops
+    the path.
+    """
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from an interrupted run
+                        continue
+                    if entry.get('removed'):
+                        self.entries.pop(entry['path'], None)
+                    else:
+                        self.entries[entry['path']] = entry
+
+    @staticmethod
+    def _stat(path: str) -> Dict[str, Any]:
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """SHA-256 of the file's contents"""
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        return sha.hexdigest()
+
+    def _append(self, entry: Dict[str, Any]):
+        directory = os.path.dirname(os.path.abspath(self.manifest_path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def status(self, path: str) -> str:
+        """
+        Classify path as 'new', 'changed' or 'unchanged'
+
+        Only a stat() is needed while size and mtime match the manifest. If
+        they differ the file is hashed, and a file whose content is the same
+        (e.g. touched or copied back) stays unchanged with its entry updated
+        to the new stat.
+        """
+        entry = self.entries.get(os.path.abspath(path))
+        if entry is None:
+            return 'new'
+        try:
+            current = self._stat(path)
+        except OSError:
+            return 'new'
+        if entry['size'] == current['size'] and entry['mtime'] == current['mtime']:
+            return 'unchanged'
+        if entry.get('sha256') is None or entry['size'] != current['size']:
+            return 'changed'
+        if self.file_hash(path) != entry['sha256']:
+            return 'changed'
+        entry = dict(entry, **current)
+        self.entries[entry['path']] = entry
+        self._append(entry)
+        return 'unchanged'
+
+    def is_done(self, path: str) -> bool:
+        """True if path was ingested and has not changed since"""
+        return self.status(path) == 'unchanged'
+
+    def plan(self, paths: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Sort paths into new, changed and unchanged files
+
+        Manifest entries whose file no longer exists are listed as removed;
+        entries for files that exist but were not passed in are left alone.
+        """
+        plan = {'new': [], 'changed': [], 'unchanged': [], 'removed': []}
+        seen = set()
+        for path in paths:
+            path = os.path.abspath(path)
+            seen.add(path)
+            plan[self.status(path)].append(path)
+        plan['removed'] = sorted(
+            path for path in self.entries if path not in seen and not os.path.exists(path)
+        )
+        return plan
+
+    def mark_done(self, path: str, **details: Any) -> Dict[str, Any]:
+        """Record a completed file and flush it to disk immediately"""
+        path = os.path.abspath(path)
+        stat = self._stat(path)
+        if 'sha256' not in details:
+            details['sha256'] = self.file_hash(path)
+        entry = {'path': path, **stat, **details,
+                 'completed': datetime.now().isoformat(timespec='seconds')}
+        self.entries[path] = entry
+        self._append(entry)
+        return entry
+
+    def mark_removed(self, path: str):
+        """Forget a file whose chunks have been deleted"""
+        path = os.path.abspath(path)
+        self.entries.pop(path, None)
+        self._append({'path': path, 'removed': True})
+
+    def compact(self):
+        """Rewrite the manifest with one line per live entry"""
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(os.path.abspath(path))
@@ -0,0 +1,37 @@
+import os
+import resource
+import sys
+from typing import Optional
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Raised when extraction pushes a process past its RSS ceiling"""
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # No procfs: fall back to the peak RSS (bytes on macOS, KB elsewhere)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class RSSMonitor:
+    """Track peak RSS across samples and enforce an optional ceiling"""
+
+    def __init__(self, max_rss_mb: Optional[float] = None):
+        self.max_rss_mb = max_rss_mb
+        self.peak_mb = current_rss_mb()
+
+    def sample(self, where: str = "") -> float:
+        rss = current_rss_mb()
+        self.peak_mb = max(self.peak_mb, rss)
+        if self.max_rss_mb is not None and rss > self.max_rss_mb:
+            raise MemoryBudgetExceeded(
+                f"RSS {rss:.0f} MB exceeded the {self.max_rss_mb:.0f} MB ceiling{where}"
+            )
+        return rss
@@ -0,0 +1,232 @@
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from research_copilot.core.pdf_processing.backends import open_pdf, read_page
+from research_copilot.core.pdf_processing.memory import MemoryBudgetExceeded, RSSMonitor, current_rss_mb
+
+_SKIPPED = object()
+
+
+def _page_worker_main(conn, pdf_path: str, backend: str, layout: bool, low_memory: bool,
+                      max_rss_mb: Optional[float]):
+    """Open the PDF once, then extract one page per request until told to stop"""
+    try:
+        with open_pdf(pdf_path, backend) as document:
+            while True:
+                page_num = conn.recv()
+                if page_num is None:
+                    break
+                try:
+                    page = read_page(document, page_num, layout, low_memory)
+                except Exception as e:
+                    conn.send(('error', str(e), current_rss_mb()))
+                    continue
+
+                rss = current_rss_mb()
+                if max_rss_mb is not None and rss > max_rss_mb:
+                    conn.send((
+                        'memory',
+                        f"RSS {rss:.0f} MB exceeded the {max_rss_mb:.0f} MB ceiling on page {page_num}",
+                        rss
+                    ))
+                    break
+                conn.send(('ok', page, rss))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    except Exception as e:
+        try:
+            conn.send(('fatal', str(e), current_rss_mb()))
+        except OSError:
+            pass
+
+
+def _page_count_main(conn, pdf_path: str, backend: str):
+    try:
+        with open_pdf(pdf_path, backend) as document:
+            conn.send(('ok', len(document)))
+    except Exception as e:
+        conn.send(('error', str(e)))
+
+
+def count_pages_with_budget(pdf_path: str, backend: str, timeout: Optional[float]) -> int:
+    """
+    Open the PDF in a killable worker process and return its page count
+
+    A malformed file can hang the PDF library before the first page is
+    read, so with time budgets the parent never opens it itself. Raises
+    TimeoutError when opening takes longer than timeout seconds and
+    RuntimeError when the file cannot be opened or the worker dies.
+    """
+    ctx = multiprocessing.get_context()
+    conn, child_conn = ctx.Pipe()
+    process = ctx.Process(target=_page_count_main, args=(child_conn, pdf_path, backend), daemon=True)
+    process.start()
+    child_conn.close()
+    try:
+        if not conn.poll(timeout):
+            raise TimeoutError(f"Opening {pdf_path} took longer than {timeout}s")
+        status, value = conn.recv()
+    except EOFError:
+        raise RuntimeError(f"Worker opening {pdf_path} exited unexpectedly")
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        conn.close()
+    if status != 'ok':
+        raise RuntimeError(value)
+    return value
+
+
+class PageWorker:
+    """A worker process serving single pages of one PDF; can be killed mid-page"""
+
+    def __init__(self, ctx, worker_args: Tuple):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_page_worker_main, args=(child_conn,) + worker_args, daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.page_num = None
+        self.deadline = None
+        self.pages_done = 0
+
+    def submit(self, page_num: int, timeout: Optional[float]):
+        self.conn.send(page_num)
+        self.page_num = page_num
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def iter_pages_with_budget(
+    pdf_path: str,
+    page_count: int,
+    backend: str,
+    layout: bool = False,
+    low_memory: bool = False,
+    max_rss_mb: Optional[float] = None,
+    workers: int = 1,
+    page_timeout: Optional[float] = None,
+    document_timeout: Optional[float] = None,
+    max_pages_per_worker: Optional[int] = 100,
+    skipped: Optional[List[Dict[str, Any]]] = None,
+    monitor: Optional[RSSMonitor] = None
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (page_num, page) in page order from killable worker processes
+
+    A page that takes longer than page_timeout seconds, raises, or crashes
+    its worker is skipped: its worker is killed and replaced, and a
+    {'page', 'reason'} record is appended to skipped. Once document_timeout
+    seconds of wall-clock time have passed, all unfinished pages are
+    skipped. Workers are also recycled after max_pages_per_worker pages so
+    leaks in the PDF libraries cannot accumulate. A worker crossing
+    max_rss_mb raises MemoryBudgetExceeded, as in the in-process path.
+    A fresh worker opens the PDF on start, which counts against its first
+    page's budget.
+    """
+    if skipped is None:
+        skipped = []
+    if page_count == 0:
+        return
+    ctx = multiprocessing.get_context()
+    worker_args = (pdf_path, backend, layout, low_memory, max_rss_mb)
+    doc_deadline = time.monotonic() + document_timeout if document_timeout is not None else None
+
+    pending = deque(range(page_count))
+    idle = [PageWorker(ctx, worker_args) for _ in range(max(1, min(workers, page_count)))]
+    busy: Dict[Any, PageWorker] = {}
+    results: Dict[int, Any] = {}
+    next_page = 0
+
+    def skip(page_num: int, reason: str):
+        results[page_num] = _SKIPPED
+        skipped.append({'page': page_num, 'reason': reason})
+
+    try:
+        while next_page < page_count:
+            while idle and pending:
+                worker = idle.pop()
+                worker.submit(pending.popleft(), page_timeout)
+                busy[worker.conn] = worker
+
+            # Hand back finished pages in order
+            while next_page in results:
+                page = results.pop(next_page)
+                if page is not _SKIPPED:
+                    yield next_page, page
+                next_page += 1
+            if next_page >= page_count:
+                break
+
+            now = time.monotonic()
+            if doc_deadline is not None and now >= doc_deadline:
+                unfinished = [w.page_num for w in busy.values()] + list(pending)
+                for page_num in sorted(unfinished):
+                    skip(page_num, 'document_timeout')
+                pending.clear()
+                continue
+
+            deadlines = [w.deadline for w in busy.values() if w.deadline is not None]
+            if doc_deadline is not None:
+                deadlines.append(doc_deadline)
+            timeout = max(0.0, min(deadlines) - now) if deadlines else None
+
+            for conn in wait(list(busy), timeout):
+                worker = busy.pop(conn)
+                try:
+                    status, value, rss = conn.recv()
+                except (EOFError, OSError):
+                    worker.kill()
+                    skip(worker.page_num, 'worker_crashed')
+                    idle.append(PageWorker(ctx, worker_args))
+                    continue
+
+                if monitor is not None:
+                    monitor.peak_mb = max(monitor.peak_mb, rss)
+                if status == 'memory':
+                    raise MemoryBudgetExceeded(value)
+                if status == 'fatal':
+                    raise RuntimeError(value)
+                if status == 'ok':
+                    results[worker.page_num] = value
+                else:
+                    skip(worker.page_num, f"error: {value}")
+
+                worker.pages_done += 1
+                if max_pages_per_worker is not None and worker.pages_done >= max_pages_per_worker:
+                    worker.stop()
+                    worker = PageWorker(ctx, worker_args)
+                idle.append(worker)
+
+            # Kill and replace workers stuck past their page budget
+            now = time.monotonic()
+            for conn, worker in list(busy.items()):
+                if worker.deadline is not None and now >= worker.deadline:
+                    del busy[conn]
+                    worker.kill()
+                    skip(worker.page_num, 'timeout')
+                    idle.append(PageWorker(ctx, worker_args))
+    finally:
+        for worker in busy.values():
+            worker.kill()
+        for worker in idle:
+            worker.stop()
@@ -0,0 +1,140 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from research_copilot.core.vector_store.fileformat import read_array_file, write_array_file
+
+MAGIC = b'RCVEC001'
+
+VECTOR_DTYPES = ('float32', 'float16')
+
+# Rows scored per matrix-vector product, bounding the float32 copy of float16 rows
+_SCORE_BLOCK = 1 << 16
+
+
+def binary_path(persist_path: str) -> str:
+    """The .bin file standing in for a SimpleVectorStore JSON file"""
+    return os.path.splitext(persist_path)[0] + '.bin'
+
+
+def _string_table(values: Sequence[str]) -> np.ndarray:
+    encoded = [value.encode('utf-8') for value in values]
+    return np.array(encoded, dtype=f"S{max(max(map(len, encoded), default=1), 1)}")
+
+
+class VectorTable:
+    """
+    Read-only embeddings, ids and metadata of a vector store file
+
+    The file holds a float32 or float16 matrix of the vectors, their
+    float32 norms, fixed-width tables of node ids and ref doc ids and the
+    per-row metadata as a JSON blob with offsets, after a JSON header
+    with the array layout. Every array is memory-mapped, so opening the
+    file reads only the header whatever its size; the id lookup is built
+    and metadata decoded on first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        header, arrays = read_array_file(path, MAGIC, "a vector store file")
+        self.dim = header['dim']
+        self._vectors, self._norms = arrays['vectors'], arrays['norms']
+        self._ids, self._ref_doc_ids = arrays['ids'], arrays['ref_doc_ids']
+        self._metadata_blob, self._metadata_offsets = arrays['metadata'], arrays['metadata_offsets']
+        self._rows: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def dtype(self) -> str:
+        return self._vectors.dtype.name
+
+    def id(self, row: int) -> str:
+        return self._ids[row].decode('utf-8')
+
+    def ref_doc_id(self, row: int) -> str:
+        return self._ref_doc_ids[row].decode('utf-8')
+
+    def row(self, node_id: str) -> Optional[int]:
+        """Row of node_id, or None"""
+        if self._rows is None:
+            self._rows = {point_id.decode('utf-8'): row for row, point_id in enumerate(self._ids.tolist())}
+        return self._rows.get(node_id)
+
+    def rows_of(self, ref_doc_id: str) -> np.ndarray:
+        """Rows whose nodes belong to ref_doc_id"""
+        return np.flatnonzero(self._ref_doc_ids == ref_doc_id.encode('utf-8'))
+
+    def vector(self, row: int) -> np.ndarray:
+        return np.asarray(self._vectors[row], dtype=np.float32)
+
+    def vectors(self, rows: Sequence[int]) -> np.ndarray:
+        """float32 copy of rows"""
+        return np.asarray(self._vectors[np.asarray(rows, dtype=np.int64)], dtype=np.float32)
+
+    def metadata(self, row: int) -> Optional[Dict[str, Any]]:
+        """Metadata of row, or None if its node was stored without any"""
+        raw = self._metadata_blob[self._metadata_offsets[row]:self._metadata_offsets[row + 1]].tobytes()
+        return json.loads(raw) if raw else None
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of query to every row (0 for zero vectors)"""
+        query = np.asarray(query, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query))
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), _SCORE_BLOCK):
+            block = np.asarray(self._vectors[start:start + _SCORE_BLOCK], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        norms = self._norms * query_norm
+        return np.divide(scores, norms, out=np.zeros_like(scores), where=norms > 0)
+
+    @staticmethod
+    def write(
+        path: str,
+        ids: Sequence[str],
+        ref_doc_ids: Sequence[str],
+        vectors: np.ndarray,
+        metadata: Sequence[Optional[Dict[str, Any]]],
+        dtype: str = 'float32',
+        dim: Optional[int] = None,
+    ):
+        """Write rows to path, replacing the file"""
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown vector dtype '{dtype}', expected one of {list(VECTOR_DTYPES)}")
+        dim = vectors.shape[1] if len(vectors) else (dim or 0)
+        vectors = np.asarray(vectors, dtype=dtype).reshape(len(ids), dim)
+        # Norms of the stored values, so that float16 rows score consistently
+        norms = np.linalg.norm(vectors.astype(np.float32), axis=1).astype(np.float32)
+        blobs = [json.dumps(item).encode('utf-8') if item is not None else b'' for item in metadata]
+        arrays = {
+            'vectors': vectors,
+            'norms': norms,
+            'ids': _string_table(ids),
+            'ref_doc_ids': _string_table(ref_doc_ids),
+            'metadata_offsets': np.concatenate([[0], np.cumsum([len(b) for b in blobs], dtype=np.int64)]),
+            'metadata': np.frombuffer(b''.join(blobs), dtype=np.uint8),
+        }
+        write_array_file(path, MAGIC, {'dim': dim}, arrays)
+
+
+def convert_simple_vector_store(json_path: str, dtype: str = 'float32', path: Optional[str] = None) -> str:
+    """
+    Write the vector store file for a SimpleVectorStore JSON file
+
+    Returns the path written, by default json_path with a .bin suffix;
+    the JSON file is left in place.
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    embeddings = data.get('embedding_dict') or {}
+    ref_doc_ids = data.get('text_id_to_ref_doc_id') or {}
+    metadata = data.get('metadata_dict') or {}
+    ids: List[str] = list(embeddings)
+    vectors = np.array([embeddings[node_id] for node_id in ids], dtype=np.float32)
+    path = path or binary_path(json_path)
+    VectorTable.write(path, ids, [ref_doc_ids.get(node_id, 'None') for node_id in ids], vectors,
+                      [metadata.get(node_id) for node_id in ids], dtype)
+    return path
@@ -0,0 +1,56 @@
+import json
+import os
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+# Array offsets in the file are multiples of this, so memory maps are aligned
+_ALIGN = 64
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def write_array_file(path: str, magic: bytes, header: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+    """
+    Write named arrays to a single file, replacing it
+
+    The file is magic, the byte length of a JSON header as a uint64, the
+    header (with the offset, dtype and shape of each array added under
+    'arrays') and then the arrays at 64-byte aligned offsets. It is
+    written to path.tmp and moved over path, so readers see either the
+    old file or the new one.
+    """
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = [offset, array.dtype.str, list(array.shape)]
+        offset = _aligned(offset + array.nbytes)
+    encoded = json.dumps(dict(header, arrays=layout)).encode('utf-8')
+    data_start = _aligned(len(magic) + 8 + len(encoded))
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(magic + np.uint64(len(encoded)).tobytes() + encoded)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name][0])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp, path)
+
+
+def read_array_file(path: str, magic: bytes, description: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """The header and memory-mapped arrays of a file written by write_array_file"""
+    with open(path, 'rb') as f:
+        if f.read(len(magic)) != magic:
+            raise ValueError(f"{path} is not {description}")
+        header_size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_size))
+    data_start = _aligned(len(magic) + 8 + header_size)
+    arrays = {}
+    for name, (offset, dtype, shape) in header['arrays'].items():
+        if np.prod(shape) == 0:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=data_start + offset, shape=tuple(shape))
+    return header, arrays
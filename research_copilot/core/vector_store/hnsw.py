@@ -0,0 +1,512 @@
+import heapq
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from research_copilot.core.vector_store.fileformat import read_array_file, write_array_file
+from research_copilot.core.vector_store.local import _COMPACT_RATIO, ScoredPoint, _distance_name
+from research_copilot.core.vector_store.quantization import normalize_rows
+
+MAGIC = b'RCHNSW01'
+HNSWLIB_MAGIC = b'RCHNSWL1'
+
+_MAX_LEVEL = 16
+
+
+class HnswIndex:
+    """
+    Hierarchical navigable small world graph for approximate top-k search
+
+    Every vector is a node on level 0 and, with exponentially decreasing
+    probability, on levels above it; each level links a node to about m
+    near neighbours (2 * m on level 0), chosen with the diversity
+    heuristic of Malkov & Yashunin. A search descends greedily from the
+    top level and explores level 0 with a beam of ef candidates: larger
+    ef raises recall and costs speed, larger m raises recall and costs
+    memory and insert time.
+
+    Inserts are incremental. Removing or replacing an id leaves a
+    tombstone: the node keeps routing searches but is never returned.
+    Tombstones cost memory and beam slots, so once they are a quarter of
+    the nodes save() rebuilds the graph from the live rows (compact()).
+    save() writes vectors, links, ids and payloads to the single file at
+    path, which is memory-mapped on load; the first insert after a load
+    copies the graph into memory.
+
+    This is the pure-NumPy implementation; open_hnsw_index() uses the
+    native HnswlibIndex instead when hnswlib is installed.
+    """
+
+    kind = 'hnsw'
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dim: Optional[int] = None,
+        distance: str = 'cosine',
+        m: int = 16,
+        ef_construction: int = 100,
+        ef: int = 64,
+        seed: int = 0
+    ):
+        self.path = path
+        self.dim = dim
+        self.distance = _distance_name(distance)
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef = ef
+        self._rng = np.random.default_rng(seed)
+        self._clear()
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    def _clear(self):
+        """Empty the graph, keeping its settings"""
+        m, dim = self.m, self.dim
+        self._count = 0
+        self._vectors = np.zeros((0, dim or 0), dtype=np.float32)
+        self._levels = np.zeros(0, dtype=np.int8)
+        # Level 0 links per node, -1 padded
+        self._links0 = np.full((0, 2 * m), -1, dtype=np.int32)
+        # Links on levels 1..level of a node are rows upper_start.. of upper
+        self._upper_start = np.zeros(0, dtype=np.int64)
+        self._upper = np.full((0, m), -1, dtype=np.int32)
+        self._upper_count = 0
+        self._removed = np.zeros(0, dtype=bool)
+        self._entry = -1
+        self._max_level = -1
+
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Payloads of saved rows are sliced from the file's payload blob
+        self._stored = 0
+        self._payload_blob = np.zeros(0, dtype=np.uint8)
+        self._payload_offsets = np.zeros(1, dtype=np.int64)
+        self._payloads: Dict[int, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = vectors.shape[-1]
+            self._vectors = self._vectors.reshape(0, self.dim)
+        if vectors.shape[-1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[-1]}")
+        return normalize_rows(vectors) if self.distance == 'cosine' else vectors
+
+    def _reserve(self, nodes: int, upper_rows: int):
+        """Grow the (possibly memory-mapped) arrays to hold nodes and upper_rows"""
+        if nodes > len(self._vectors) or isinstance(self._links0, np.memmap):
+            capacity = max(nodes, 2 * self._count, 1024)
+
+            def grow(array, fill, *shape):
+                grown = np.full((capacity,) + shape, fill, dtype=array.dtype)
+                grown[:self._count] = array[:self._count]
+                return grown
+
+            self._vectors = grow(self._vectors, 0, self.dim)
+            self._levels = grow(self._levels, 0)
+            self._links0 = grow(self._links0, -1, 2 * self.m)
+            self._upper_start = grow(self._upper_start, 0)
+            self._removed = grow(self._removed, False)
+        if upper_rows > len(self._upper) or isinstance(self._upper, np.memmap):
+            grown = np.full((max(upper_rows, 2 * self._upper_count, 1024), self.m), -1, dtype=np.int32)
+            grown[:self._upper_count] = self._upper[:self._upper_count]
+            self._upper = grown
+
+    def _links(self, node: int, level: int) -> np.ndarray:
+        if level == 0:
+            return self._links0[node]
+        return self._upper[self._upper_start[node] + level - 1]
+
+    def _set_links(self, node: int, level: int, neighbours: Sequence[int]):
+        row = self._links(node, level)
+        row[:] = -1
+        row[:len(neighbours)] = neighbours
+
+    def _search_level(self, query: np.ndarray, entries: List[int], ef: int, level: int) -> List[Tuple[float, int]]:
+        """The ef nodes most similar to query reachable on level, as (similarity, node) best first"""
+        vectors = self._vectors
+        visited = set(entries)
+        similarities = (vectors[entries] @ query).tolist()
+        candidates = [(-similarity, node) for similarity, node in zip(similarities, entries)]
+        heapq.heapify(candidates)
+        # Min-heap of the best ef so far: the worst of them is on top
+        results = [(similarity, node) for similarity, node in zip(similarities, entries)]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            negative, node = heapq.heappop(candidates)
+            if -negative < results[0][0] and len(results) >= ef:
+                break
+            neighbours = [n for n in self._links(node, level).tolist() if n >= 0 and n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+            for similarity, neighbour in zip((vectors[neighbours] @ query).tolist(), neighbours):
+                if len(results) < ef or similarity > results[0][0]:
+                    heapq.heappush(candidates, (-similarity, neighbour))
+                    heapq.heappush(results, (similarity, neighbour))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted(results, reverse=True)
+
+    def _select_neighbours(self, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """
+        Up to m of the candidates (best first), preferring diverse directions
+
+        A candidate is taken when it is more similar to the new node than
+        to every neighbour taken so far; remaining slots are filled with
+        the best skipped candidates.
+        """
+        nodes = [node for _, node in candidates]
+        if len(nodes) <= m:
+            return nodes
+        similarities = np.array([similarity for similarity, _ in candidates], dtype=np.float32)
+        vectors = self._vectors[nodes]
+        pairwise = vectors @ vectors.T
+        # Similarity of each candidate to its closest kept neighbour
+        closest = np.full(len(nodes), -np.inf, dtype=np.float32)
+        kept: List[int] = []
+        start = 0
+        while len(kept) < m:
+            eligible = np.flatnonzero(closest[start:] < similarities[start:])
+            if not len(eligible):
+                break
+            i = start + int(eligible[0])
+            kept.append(i)
+            np.maximum(closest, pairwise[i], out=closest)
+            start = i + 1
+        if len(kept) < m:
+            taken = set(kept)
+            kept.extend([i for i in range(len(nodes)) if i not in taken][:m - len(kept)])
+        return [nodes[i] for i in kept]
+
+    def _insert(self, node: int):
+        query = self._vectors[node]
+        level = min(int(-math.log(1.0 - self._rng.random()) / math.log(self.m)), _MAX_LEVEL)
+        self._levels[node] = level
+        self._upper_start[node] = self._upper_count
+        self._upper_count += level
+        if self._entry < 0:
+            self._entry, self._max_level = node, level
+            return
+
+        entries = [self._entry]
+        for upper in range(self._max_level, level, -1):
+            entries = [self._search_level(query, entries, 1, upper)[0][1]]
+        for current in range(min(level, self._max_level), -1, -1):
+            found = self._search_level(query, entries, self.ef_construction, current)
+            limit = 2 * self.m if current == 0 else self.m
+            neighbours = self._select_neighbours(found, self.m)
+            self._set_links(node, current, neighbours)
+            for neighbour in neighbours:
+                links = self._links(neighbour, current)
+                linked = links[links >= 0]
+                if len(linked) < limit:
+                    links[len(linked)] = node
+                    continue
+                # Full: keep the best diverse subset of its links plus the new node
+                candidates = np.append(linked, node)
+                similarities = self._vectors[candidates] @ self._vectors[neighbour]
+                order = np.argsort(-similarities)
+                self._set_links(neighbour, current, self._select_neighbours(
+                    list(zip(similarities[order].tolist(), candidates[order].tolist())), limit
+                ))
+            entries = [n for _, n in found]
+        if level > self._max_level:
+            self._entry, self._max_level = node, level
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, payloads: Optional[Sequence[Dict[str, Any]]] = None):
+        """Insert rows; an id that is already indexed is replaced"""
+        vectors = self._prepare(np.reshape(vectors, (len(ids), -1)))
+        payloads = payloads if payloads is not None else [{}] * len(ids)
+        self.remove(ids)
+        self._reserve(self._count + len(ids), self._upper_count + _MAX_LEVEL)
+        for point_id, vector, payload in zip(ids, vectors, payloads):
+            if len(self._upper) - self._upper_count < _MAX_LEVEL:
+                self._reserve(self._count, self._upper_count + _MAX_LEVEL)
+            node = self._count
+            self._vectors[node] = vector
+            self._ids.append(point_id)
+            self._rows[point_id] = node
+            self._payloads[node] = payload
+            self._count += 1
+            self._insert(node)
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Tombstone the rows of ids"""
+        removed = 0
+        for point_id in ids:
+            node = self._rows.pop(point_id, None)
+            if node is not None:
+                self._removed[node] = True
+                removed += 1
+        return removed
+
+    def payload(self, node: int) -> Dict[str, Any]:
+        if node not in self._payloads:
+            start, stop = self._payload_offsets[node], self._payload_offsets[node + 1]
+            self._payloads[node] = json.loads(self._payload_blob[start:stop].tobytes())
+        return self._payloads[node]
+
+    def search(self, query: np.ndarray, k: int = 10, ef: Optional[int] = None) -> List[ScoredPoint]:
+        """About the k rows most similar to query, best first"""
+        if not len(self):
+            return []
+        query = self._prepare(query)
+        entries = [self._entry]
+        for level in range(self._max_level, 0, -1):
+            entries = [self._search_level(query, entries, 1, level)[0][1]]
+        ef = max(ef or self.ef, k)
+        while True:
+            found = [(s, node) for s, node in self._search_level(query, entries, ef, 0) if not self._removed[node]]
+            # Tombstones take beam slots; widen the beam until k live rows are found
+            if len(found) >= min(k, len(self)) or ef >= self._count:
+                break
+            ef *= 2
+        return [ScoredPoint(self._ids[node], similarity, self.payload(node)) for similarity, node in found[:k]]
+
+    def compact(self):
+        """Rebuild the graph from the live rows, dropping tombstones"""
+        live = [node for node in range(self._count) if not self._removed[node]]
+        vectors = np.array(self._vectors[live], dtype=np.float32).reshape(-1, self.dim)
+        ids = [self._ids[node] for node in live]
+        payloads = [self.payload(node) for node in live]
+        self._clear()
+        if ids:
+            self.add(ids, vectors, payloads)
+
+    def save(self):
+        """Write the index to path, replacing the file; compacts it first when many rows were removed"""
+        if self.path is None:
+            return
+        if self._count - len(self) > _COMPACT_RATIO * max(self._count, 1):
+            self.compact()
+        count = self._count
+        payloads = [self._payload_blob[self._payload_offsets[node]:self._payload_offsets[node + 1]].tobytes()
+                    if node not in self._payloads else json.dumps(self._payloads[node]).encode('utf-8')
+                    for node in range(count)]
+        arrays = {
+            'vectors': self._vectors[:count],
+            'levels': self._levels[:count],
+            'links0': self._links0[:count],
+            'upper_start': self._upper_start[:count],
+            'upper': self._upper[:self._upper_count],
+            'removed': self._removed[:count],
+            'payload_offsets': np.concatenate([[0], np.cumsum([len(p) for p in payloads], dtype=np.int64)]),
+            'payloads': np.frombuffer(b''.join(payloads), dtype=np.uint8),
+            'ids': np.frombuffer(json.dumps(self._ids[:count]).encode('utf-8'), dtype=np.uint8),
+        }
+        write_array_file(self.path, MAGIC, {
+            'dim': self.dim, 'distance': self.distance, 'm': self.m, 'ef_construction': self.ef_construction,
+            'ef': self.ef, 'entry': self._entry, 'max_level': self._max_level
+        }, arrays)
+
+    def _load(self):
+        header, arrays = read_array_file(self.path, MAGIC, "an HNSW index file")
+        if self.dim is not None and header['dim'] != self.dim:
+            raise ValueError(f"{self.path} holds {header['dim']}-dimensional vectors, not {self.dim}")
+
+        self.dim, self.distance, self.m = header['dim'], header['distance'], header['m']
+        self.ef_construction, self.ef = header['ef_construction'], header['ef']
+        self._entry, self._max_level = header['entry'], header['max_level']
+        self._vectors, self._levels, self._links0 = arrays['vectors'], arrays['levels'], arrays['links0']
+        self._upper_start, self._upper = arrays['upper_start'], arrays['upper']
+        self._upper_count = len(self._upper)
+        self._removed = np.array(arrays['removed'])
+        self._count = self._stored = len(self._vectors)
+        self._payload_blob, self._payload_offsets = arrays['payloads'], arrays['payload_offsets']
+        self._ids = json.loads(arrays['ids'].tobytes())
+        self._rows = {point_id: node for node, point_id in enumerate(self._ids) if not self._removed[node]}
+
+
+class HnswlibIndex:
+    """
+    HnswIndex's interface over hnswlib's native (C++) graph
+
+    Same algorithm and parameters as HnswIndex, with multi-threaded inserts
+    and far faster searches. Point ids are mapped to integer labels;
+    removing an id marks its label deleted, and later inserts reuse the
+    slots of deleted labels, so tombstones do not accumulate. save()
+    writes one file in HnswIndex's layout (under HNSWLIB_MAGIC) holding
+    hnswlib's serialized graph, the labels, ids and payloads; payloads
+    stay memory-mapped after a load, but hnswlib reads the whole graph
+    into memory.
+    """
+
+    kind = 'hnsw'
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dim: Optional[int] = None,
+        distance: str = 'cosine',
+        m: int = 16,
+        ef_construction: int = 100,
+        ef: int = 64,
+        seed: int = 0
+    ):
+        import hnswlib
+
+        self._hnswlib = hnswlib
+        self.path = path
+        self.dim = dim
+        self.distance = _distance_name(distance)
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef = ef
+        self.seed = seed
+        self._index = None
+        self._next_label = 0
+        self._labels: Dict[str, int] = {}
+        self._ids: Dict[int, str] = {}
+        # Payloads added since the load, or decoded from the file's rows
+        self._payloads: Dict[int, Dict[str, Any]] = {}
+        self._payload_rows: Dict[int, int] = {}
+        self._payload_offsets = np.zeros(1, dtype=np.int64)
+        self._payload_blob = np.zeros(0, dtype=np.uint8)
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def _space(self) -> str:
+        # hnswlib normalizes for cosine itself; both report 1 - similarity
+        return 'cosine' if self.distance == 'cosine' else 'ip'
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = vectors.shape[-1]
+        if vectors.shape[-1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[-1]}")
+        return vectors
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, payloads: Optional[Sequence[Dict[str, Any]]] = None):
+        """Insert rows; an id that is already indexed is replaced"""
+        vectors = self._prepare(np.reshape(vectors, (len(ids), -1)))
+        payloads = payloads if payloads is not None else [{}] * len(ids)
+        self.remove(ids)
+        if self._index is None:
+            self._index = self._hnswlib.Index(space=self._space(), dim=self.dim)
+            self._index.init_index(max_elements=max(len(ids), 1024), ef_construction=self.ef_construction,
+                                   M=self.m, random_seed=self.seed, allow_replace_deleted=True)
+        needed = self._index.get_current_count() + len(ids)
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+        labels = np.arange(self._next_label, self._next_label + len(ids), dtype=np.int64)
+        self._next_label += len(ids)
+        self._index.add_items(vectors, labels, replace_deleted=True)
+        for point_id, label, payload in zip(ids, labels.tolist(), payloads):
+            self._labels[point_id] = label
+            self._ids[label] = point_id
+            self._payloads[label] = payload
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Mark the labels of ids deleted; their slots are reused by later inserts"""
+        removed = 0
+        for point_id in ids:
+            label = self._labels.pop(point_id, None)
+            if label is not None:
+                self._index.mark_deleted(label)
+                del self._ids[label]
+                self._payloads.pop(label, None)
+                self._payload_rows.pop(label, None)
+                removed += 1
+        return removed
+
+    def payload(self, label: int) -> Dict[str, Any]:
+        if label not in self._payloads:
+            row = self._payload_rows[label]
+            start, stop = self._payload_offsets[row], self._payload_offsets[row + 1]
+            self._payloads[label] = json.loads(self._payload_blob[start:stop].tobytes())
+        return self._payloads[label]
+
+    def search(self, query: np.ndarray, k: int = 10, ef: Optional[int] = None) -> List[ScoredPoint]:
+        """About the k rows most similar to query, best first"""
+        k = min(k, len(self))
+        if not k:
+            return []
+        ef = max(ef or self.ef, k)
+        while True:
+            self._index.set_ef(ef)
+            try:
+                labels, distances = self._index.knn_query(self._prepare(query).reshape(1, -1), k=k)
+                break
+            except RuntimeError:
+                # Deleted labels took the beam's slots; widen it as HnswIndex does
+                if ef >= self._index.get_current_count():
+                    raise
+                ef *= 2
+        return [ScoredPoint(self._ids[label], 1.0 - distance, self.payload(label))
+                for label, distance in zip(labels[0].tolist(), distances[0].tolist())]
+
+    def save(self):
+        """Write the graph, ids and payloads to path in one file"""
+        if self.path is None or self._index is None:
+            return
+        # hnswlib only serializes to a file of its own
+        graph_path = f"{self.path}.graph.tmp"
+        self._index.save_index(graph_path)
+        graph = np.fromfile(graph_path, dtype=np.uint8)
+        os.remove(graph_path)
+        labels = list(self._ids)
+        payloads = [json.dumps(self._payloads[label]).encode('utf-8') if label in self._payloads else
+                    self._payload_blob[self._payload_offsets[self._payload_rows[label]]:
+                                       self._payload_offsets[self._payload_rows[label] + 1]].tobytes()
+                    for label in labels]
+        write_array_file(self.path, HNSWLIB_MAGIC, {
+            'dim': self.dim, 'distance': self.distance, 'm': self.m, 'ef_construction': self.ef_construction,
+            'ef': self.ef, 'next_label': self._next_label
+        }, {
+            'graph': graph,
+            'labels': np.array(labels, dtype=np.int64),
+            'ids': np.frombuffer(json.dumps([self._ids[label] for label in labels]).encode('utf-8'), dtype=np.uint8),
+            'payload_offsets': np.concatenate([[0], np.cumsum([len(p) for p in payloads], dtype=np.int64)]),
+            'payloads': np.frombuffer(b''.join(payloads), dtype=np.uint8),
+        })
+
+    def _load(self):
+        header, arrays = read_array_file(self.path, HNSWLIB_MAGIC, "an hnswlib index file")
+        if self.dim is not None and header['dim'] != self.dim:
+            raise ValueError(f"{self.path} holds {header['dim']}-dimensional vectors, not {self.dim}")
+        self.dim, self.distance, self.m = header['dim'], header['distance'], header['m']
+        self.ef_construction, self.ef = header['ef_construction'], header['ef']
+        self._next_label = header['next_label']
+        labels = arrays['labels'].tolist()
+        ids = json.loads(arrays['ids'].tobytes())
+        self._ids = dict(zip(labels, ids))
+        self._labels = dict(zip(ids, labels))
+        self._payloads = {}
+        self._payload_rows = {label: row for row, label in enumerate(labels)}
+        self._payload_offsets, self._payload_blob = arrays['payload_offsets'], arrays['payloads']
+
+        graph_path = f"{self.path}.graph.tmp"
+        arrays['graph'].tofile(graph_path)
+        try:
+            self._index = self._hnswlib.Index(space=self._space(), dim=self.dim)
+            self._index.load_index(graph_path, allow_replace_deleted=True)
+        finally:
+            os.remove(graph_path)
+
+
+def open_hnsw_index(path: str, dim: Optional[int] = None, distance: str = 'cosine', native: bool = False,
+                    **options):
+    """
+    The HNSW index at path: HnswIndex, or with native HnswlibIndex
+
+    An existing file stays with the implementation that wrote it.
+    """
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            native = f.read(len(HNSWLIB_MAGIC)) == HNSWLIB_MAGIC
+    return (HnswlibIndex if native else HnswIndex)(path, dim, distance, **options)
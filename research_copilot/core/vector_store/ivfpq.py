@@ -0,0 +1,343 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from research_copilot.core.vector_store.local import ScoredPoint, _distance_name
+from research_copilot.core.vector_store.quantization import normalize_rows, top_k
+
+# Codes per PQ subvector: one byte each
+PQ_CENTROIDS = 256
+
+# Rows assigned to centroids per block, so the distance matrix stays small
+_BLOCK_ROWS = 16384
+
+# Average segments per list at which save() rewrites the lists contiguously
+_MAX_SEGMENTS = 8
+
+
+def nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest (L2) centroid of each row"""
+    squared_norms = np.einsum('ij,ij->i', centroids, centroids)
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + _BLOCK_ROWS], dtype=np.float32)
+        assignment[start:start + len(block)] = np.argmin(squared_norms - 2 * block @ centroids.T, axis=1)
+    return assignment
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """k centroids fitted with Lloyd's algorithm; empty clusters are reseeded to random rows"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if len(vectors) < k:
+        raise ValueError(f"Need at least {k} training vectors, got {len(vectors)}")
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = nearest_centroid(vectors, centroids)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=k)
+        present = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts[present])[:-1]])
+        centroids[present] = np.add.reduceat(vectors[order], starts, axis=0) / counts[present, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+    return centroids
+
+
+class IvfPqIndex:
+    """
+    Inverted-file index over product-quantized vectors
+
+    train() fits a k-means coarse quantizer of nlist centroids and, on the
+    residuals of a sample to their centroids, one 256-entry codebook per
+    subvector. add() files each vector under its nearest centroid and
+    stores only the codes of its residual: subvectors + 8 (row number)
+    bytes per vector instead of 4 per dimension. search() scores the
+    vectors of the nprobe lists whose centroids best match the query by
+    asymmetric distance computation: the query's dot products with every
+    codebook entry are tabulated once, and each stored vector's score is
+    the centroid's score plus a sum of table lookups. With keep_vectors
+    the full vectors are also written to vectors.f32 on disk, which is
+    memory-mapped and only read to rerank search(oversample=...) candidates
+    exactly.
+
+    Training, adding and searching are separate steps; the quantizer is
+    saved by train(). On disk each list is a run of segments of codes.u8
+    and rows.i64, listed in segments.npy, all memory-mapped on load. Ids
+    and payloads go to points.jsonl. Vectors added after a load are kept
+    in memory until save(), which appends one segment per changed list
+    and costs O(added rows); once lists average _MAX_SEGMENTS segments it
+    rewrites every list as one. The index is append-only.
+    """
+
+    kind = 'ivfpq'
+
+    def __init__(self, path: Optional[str] = None, distance: str = 'cosine', keep_vectors: bool = True):
+        self.path = path
+        self.distance = _distance_name(distance)
+        self.keep_vectors = keep_vectors
+        self.centroids: Optional[np.ndarray] = None
+        self.codebooks: Optional[np.ndarray] = None
+
+        # Saved codes and row numbers; segments[list] holds their (start, stop) runs
+        self._codes = np.zeros((0, 0), dtype=np.uint8)
+        self._list_rows = np.zeros(0, dtype=np.int64)
+        self._segment_table = np.zeros((0, 3), dtype=np.int64)
+        self._segments: Dict[int, List[Tuple[int, int]]] = {}
+        self._vectors: Optional[np.ndarray] = None
+        # Added since: per list, chunks of (codes, rows)
+        self._pending: Dict[int, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self._pending_points: List[bytes] = []
+        self._pending_vectors: List[np.ndarray] = []
+        self._stored = 0
+        self._point_offsets = np.zeros(1, dtype=np.int64)
+        if path is not None and os.path.exists(os.path.join(path, 'quantizer.npz')):
+            self._load()
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def subvectors(self) -> int:
+        return self.codebooks.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.centroids.shape[1]
+
+    def __len__(self) -> int:
+        return self._stored + len(self._pending_points)
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[-1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[-1]}")
+        return normalize_rows(vectors) if self.distance == 'cosine' else vectors
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def train(self, sample: np.ndarray, nlist: int = 1024, subvectors: int = 48, iterations: int = 20,
+              seed: int = 0) -> 'IvfPqIndex':
+        """Fit the coarse quantizer and PQ codebooks on a sample of corpus vectors"""
+        if len(self):
+            raise ValueError("Cannot retrain an index that holds vectors")
+        sample = np.asarray(sample, dtype=np.float32)
+        if sample.shape[1] % subvectors:
+            raise ValueError(f"subvectors must divide the dimension {sample.shape[1]}")
+        sample = normalize_rows(sample) if self.distance == 'cosine' else sample
+        self.centroids = kmeans(sample, nlist, iterations, seed)
+        residuals = sample - self.centroids[nearest_centroid(sample, self.centroids)]
+        width = sample.shape[1] // subvectors
+        self.codebooks = np.stack([
+            kmeans(residuals[:, j * width:(j + 1) * width], PQ_CENTROIDS, iterations, seed + j + 1)
+            for j in range(subvectors)
+        ])
+        self._codes = np.zeros((0, subvectors), dtype=np.uint8)
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._file('quantizer.npz'), 'wb') as f:
+                np.savez(f, centroids=self.centroids, codebooks=self.codebooks, distance=np.array(self.distance))
+        return self
+
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Lists and residual PQ codes of prepared vectors"""
+        lists = nearest_centroid(vectors, self.centroids)
+        residuals = vectors - self.centroids[lists]
+        width = self.dim // self.subvectors
+        codes = np.empty((len(vectors), self.subvectors), dtype=np.uint8)
+        for j in range(self.subvectors):
+            codes[:, j] = nearest_centroid(residuals[:, j * width:(j + 1) * width], self.codebooks[j])
+        return lists, codes
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, payloads: Optional[Sequence[Dict[str, Any]]] = None):
+        """Encode and file vectors under their lists"""
+        if not self.trained:
+            raise ValueError("Train the index before adding vectors")
+        vectors = self._prepare(np.reshape(vectors, (len(ids), -1)))
+        payloads = payloads if payloads is not None else [{}] * len(ids)
+        rows = np.arange(len(self), len(self) + len(ids), dtype=np.int64)
+        lists, codes = self.encode(vectors)
+        order = np.argsort(lists, kind='stable')
+        boundaries = np.flatnonzero(np.diff(lists[order])) + 1
+        for group in np.split(order, boundaries):
+            if len(group):
+                self._pending.setdefault(int(lists[group[0]]), []).append((codes[group], rows[group]))
+        self._pending_points.extend(
+            (json.dumps(point_id) + '\t' + json.dumps(payload) + '\n').encode('utf-8')
+            for point_id, payload in zip(ids, payloads)
+        )
+        if self.keep_vectors:
+            self._pending_vectors.append(vectors)
+
+    def _list(self, index: int, saved: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """Codes and rows of a list; with saved=False only those added since the last save"""
+        parts = [(self._codes[start:stop], self._list_rows[start:stop])
+                 for start, stop in (self._segments.get(index, []) if saved else [])]
+        parts += self._pending.get(index, [])
+        if not parts:
+            return np.zeros((0, self.subvectors), dtype=np.uint8), np.zeros(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate([codes for codes, _ in parts]), np.concatenate([rows for _, rows in parts])
+
+    def point(self, row: int) -> Tuple[str, Dict[str, Any]]:
+        """(id, payload) of a row"""
+        if row >= self._stored:
+            line = self._pending_points[row - self._stored]
+        else:
+            with open(self._file('points.jsonl'), 'rb') as f:
+                f.seek(self._point_offsets[row])
+                line = f.read(int(self._point_offsets[row + 1] - self._point_offsets[row]))
+        point_id, payload = line.rstrip(b'\n').split(b'\t', 1)
+        return json.loads(point_id), json.loads(payload)
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Full (prepared) vectors of rows; needs keep_vectors"""
+        if not self.keep_vectors:
+            raise ValueError("The index does not keep full vectors")
+        rows = np.asarray(rows, dtype=np.int64)
+        result = np.empty((len(rows), self.dim), dtype=np.float32)
+        saved = rows < self._stored
+        if saved.any():
+            result[saved] = self._vectors[rows[saved]]
+        if not saved.all():
+            if len(self._pending_vectors) > 1:
+                self._pending_vectors = [np.concatenate(self._pending_vectors)]
+            result[~saved] = self._pending_vectors[0][rows[~saved] - self._stored]
+        return result
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = 8, oversample: int = 1) -> List[ScoredPoint]:
+        """
+        Approximate top k rows, searching the nprobe best-matching lists
+
+        With oversample > 1 (and keep_vectors) the k * oversample best rows
+        by PQ score are rescored with their full vectors, which fixes most
+        of the ranking errors of the codes.
+        """
+        if not len(self):
+            return []
+        query = self._prepare(query)
+        coarse = self.centroids @ query
+        probed = top_k(coarse, nprobe)
+        width = self.dim // self.subvectors
+        # tables[j, c]: dot product of the query's j-th subvector with codebook entry c
+        tables = np.einsum('jcw,jw->jc', self.codebooks, query.reshape(self.subvectors, width))
+        flat = tables.ravel()
+        offsets = np.arange(self.subvectors) * PQ_CENTROIDS
+
+        lists = [self._list(int(index)) for index in probed]
+        codes = np.concatenate([codes for codes, _ in lists])
+        rows = np.concatenate([rows for _, rows in lists])
+        if not len(rows):
+            return []
+        base = np.repeat(coarse[probed], [len(list_rows) for _, list_rows in lists])
+        scores = base + flat[codes.astype(np.int64) + offsets].sum(axis=1)
+        if oversample > 1 and self.keep_vectors:
+            candidates = top_k(scores, k * oversample)
+            rows = rows[candidates]
+            scores = self.vectors(rows) @ query
+        hits = []
+        for position in top_k(scores, k):
+            point_id, payload = self.point(int(rows[position]))
+            hits.append(ScoredPoint(point_id, float(scores[position]), payload))
+        return hits
+
+    def _write_at(self, name: str, position: int, array: np.ndarray):
+        """Write array at byte position of a file, dropping anything after it"""
+        with open(self._file(name), 'r+b' if os.path.exists(self._file(name)) else 'wb') as f:
+            f.seek(position)
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate()
+
+    def save(self):
+        """Append rows added since the last save, or rewrite all lists once they are fragmented"""
+        if self.path is None or not self.trained:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        rewrite = len(self._segment_table) + len(self._pending) > _MAX_SEGMENTS * self.nlist
+        if rewrite:
+            lists = [(index,) + self._list(index) for index in range(self.nlist)]
+            position = 0
+        else:
+            lists = [(index,) + self._list(index, saved=False) for index in sorted(self._pending)]
+            position = int(self._segment_table[:, 2].max()) if len(self._segment_table) else 0
+        start = position
+        lists = [(index, codes, rows) for index, codes, rows in lists if len(rows)]
+        segments = []
+        for index, _, rows in lists:
+            segments.append((index, position, position + len(rows)))
+            position += len(rows)
+        segments = np.array(segments, dtype=np.int64).reshape(-1, 3)
+        codes = np.concatenate([codes for _, codes, _ in lists]) if lists else np.zeros((0, self.subvectors), np.uint8)
+        rows = np.concatenate([rows for _, _, rows in lists]) if lists else np.zeros(0, dtype=np.int64)
+
+        # Points, offsets and vectors are appended after the saved rows; a
+        # crash before segments.npy is replaced leaves them unreferenced
+        with open(self._file('points.jsonl'), 'r+b' if self._stored else 'wb') as f:
+            f.seek(self._point_offsets[-1])
+            ends = np.cumsum([len(line) for line in self._pending_points], dtype=np.int64) + self._point_offsets[-1]
+            f.write(b''.join(self._pending_points))
+            f.truncate()
+        self._write_at('point_offsets.i64', self._stored * 8, np.concatenate([self._point_offsets[-1:], ends]))
+        if self.keep_vectors and self._pending_vectors:
+            self._write_at('vectors.f32', self._stored * self.dim * 4,
+                           np.concatenate(self._pending_vectors).astype('<f4'))
+
+        if rewrite:
+            # Written beside the old files and swapped in
+            for name, array in (('codes.u8', codes), ('rows.i64', rows)):
+                np.ascontiguousarray(array).tofile(self._file(f"{name}.tmp"))
+            self._codes = self._list_rows = None
+            for name in ('codes.u8', 'rows.i64'):
+                os.replace(self._file(f"{name}.tmp"), self._file(name))
+        else:
+            self._write_at('codes.u8', start * self.subvectors, codes)
+            self._write_at('rows.i64', start * 8, rows)
+            segments = np.concatenate([self._segment_table, segments])
+        with open(self._file('segments.npy.tmp'), 'wb') as f:
+            np.save(f, segments)
+        os.replace(self._file('segments.npy.tmp'), self._file('segments.npy'))
+        self._pending, self._pending_points, self._pending_vectors = {}, [], []
+        self._load()
+
+    def _load(self):
+        with np.load(self._file('quantizer.npz')) as data:
+            self.centroids, self.codebooks = data['centroids'], data['codebooks']
+            self.distance = str(data['distance'])
+        if os.path.exists(self._file('segments.npy')):
+            table = np.load(self._file('segments.npy'))
+        else:
+            table = np.zeros((0, 3), dtype=np.int64)
+        self._segment_table = table.astype(np.int64).reshape(-1, 3)
+        self._segments = {}
+        for index, start, stop in self._segment_table.tolist():
+            self._segments.setdefault(index, []).append((start, stop))
+
+        count = int((self._segment_table[:, 2] - self._segment_table[:, 1]).sum())
+        end = int(self._segment_table[:, 2].max()) if count else 0
+        if count:
+            self._codes = np.memmap(self._file('codes.u8'), dtype=np.uint8, mode='r', shape=(end, self.subvectors))
+            self._list_rows = np.memmap(self._file('rows.i64'), dtype=np.int64, mode='r', shape=(end,))
+            self._point_offsets = np.fromfile(self._file('point_offsets.i64'), dtype=np.int64)[:count + 1]
+        else:
+            self._codes = np.zeros((0, self.subvectors), dtype=np.uint8)
+            self._list_rows = np.zeros(0, dtype=np.int64)
+            self._point_offsets = np.zeros(1, dtype=np.int64)
+        self._stored = count
+
+        # Indexes saved without full vectors cannot start keeping them
+        vectors_path = self._file('vectors.f32')
+        stored_vectors = os.path.getsize(vectors_path) // (self.dim * 4) if os.path.exists(vectors_path) else 0
+        self.keep_vectors = stored_vectors >= count and (self.keep_vectors or stored_vectors > 0)
+        self._vectors = None
+        if self.keep_vectors and count:
+            self._vectors = np.memmap(vectors_path, dtype=np.float32, mode='r', shape=(count, self.dim))
@@ -0,0 +1,364 @@
+import io
+import json
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from research_copilot.core.vector_store.quantization import normalize_rows, top_k
+
+LOCAL_INDEX_KINDS = ('exact', 'hnsw', 'hnswlib')
+
+DISTANCES = ('cosine', 'dot')
+
+# Removed rows are only rewritten away once they are this share of the file
+_COMPACT_RATIO = 0.25
+
+# Scores computed at once by a batched search, bounding its scratch memory
+_BATCH_SCORES = 1 << 25
+
+
+class ScoredPoint(NamedTuple):
+    """A search hit, shaped like qdrant_client's ScoredPoint"""
+    id: str
+    score: float
+    payload: Dict[str, Any]
+
+
+class QueryResponse(NamedTuple):
+    """Hits of one query, shaped like qdrant_client's QueryResponse"""
+    points: List[ScoredPoint]
+
+
+def _distance_name(distance: Any) -> str:
+    """'cosine' or 'dot' from a name or a qdrant_client Distance"""
+    name = str(getattr(distance, 'value', distance)).lower()
+    if name not in DISTANCES:
+        raise ValueError(f"Unknown distance '{name}', expected one of {list(DISTANCES)}")
+    return name
+
+
+class ExactIndex:
+    """
+    Exact top-k search over a memory-mapped float32 matrix
+
+    Vectors are rows of a contiguous vectors.npy; row ids and payloads are
+    kept in the same order in points.jsonl, one tab-separated JSON id and
+    payload per line, and meta.json holds the dimension, the distance and
+    removed rows. A query is one BLAS matrix-vector product over the memory
+    map plus an argpartition. Loading parses only the ids; payloads are
+    decoded when a search returns them.
+    With cosine distance rows and queries are normalized, which makes the
+    dot product the cosine similarity.
+
+    Added rows stay in memory until save(), which appends them to both
+    files; removing or replacing an id only marks its old row, and rows
+    are rewritten once removed ones reach a quarter of the file.
+    """
+
+    kind = 'exact'
+
+    def __init__(self, path: Optional[str] = None, dim: Optional[int] = None, distance: str = 'cosine'):
+        self.path = path
+        self.dim = dim
+        self.distance = _distance_name(distance)
+        self._vectors = np.zeros((0, dim or 0), dtype=np.float32)
+        self._pending: List[np.ndarray] = []
+        self._tail: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        # Dicts, or the raw JSON of rows loaded from disk
+        self._payloads: List[Union[Dict[str, Any], bytes]] = []
+        self._rows: Dict[str, int] = {}
+        self._removed = set()
+        self._stored_rows = 0
+        self._points_end = 0
+        if path is not None and os.path.exists(os.path.join(path, 'meta.json')):
+            self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        with open(self._file('meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if self.dim is not None and meta['dim'] != self.dim:
+            raise ValueError(f"{self.path} holds {meta['dim']}-dimensional vectors, not {self.dim}")
+        self.dim = meta['dim']
+        self.distance = meta['distance']
+        self._vectors = np.load(self._file('vectors.npy'), mmap_mode='r')
+        # An interrupted save may have written rows to only one of the
+        # files; rows past the shorter one are ignored and later overwritten
+        ends = []
+        with open(self._file('points.jsonl'), 'rb') as f:
+            for line in f:
+                if len(self._ids) == len(self._vectors) or not line.endswith(b'\n'):
+                    break
+                point_id, payload = line.rstrip(b'\n').split(b'\t', 1)
+                self._ids.append(json.loads(point_id))
+                self._payloads.append(payload)
+                ends.append(f.tell())
+        rows = len(self._ids)
+        self._vectors = self._vectors[:rows]
+        self._stored_rows = rows
+        self._points_end = ends[-1] if ends else 0
+        self._removed = {row for row in meta['removed'] if row < rows}
+        self._rows = {point_id: row for row, point_id in enumerate(self._ids) if row not in self._removed}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = vectors.shape[-1]
+            self._vectors = self._vectors.reshape(0, self.dim)
+        if vectors.shape[-1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[-1]}")
+        return normalize_rows(vectors) if self.distance == 'cosine' else vectors
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, payloads: Optional[Sequence[Dict[str, Any]]] = None):
+        """Add or replace rows"""
+        vectors = self._prepare(np.reshape(vectors, (len(ids), -1)))
+        payloads = payloads if payloads is not None else [{}] * len(ids)
+        self.remove(ids)
+        for point_id, payload in zip(ids, payloads):
+            self._rows[point_id] = len(self._ids)
+            self._ids.append(point_id)
+            self._payloads.append(payload)
+        self._pending.append(vectors)
+        self._tail = None
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Mark the rows of ids as removed"""
+        removed = 0
+        for point_id in ids:
+            row = self._rows.pop(point_id, None)
+            if row is not None:
+                self._removed.add(row)
+                removed += 1
+        return removed
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """
+        Similarity of the query to every row; removed rows score -inf
+
+        A (batch, dim) matrix of queries gives a (rows, batch) matrix of
+        scores from one matrix-matrix product.
+        """
+        query = self._prepare(query)
+        if self._pending and self._tail is None:
+            self._tail = np.concatenate(self._pending)
+        parts = [self._vectors @ query.T]
+        if self._tail is not None:
+            parts.append(self._tail @ query.T)
+        scores = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        if self._removed:
+            scores[np.fromiter(self._removed, dtype=np.int64, count=len(self._removed))] = -np.inf
+        return scores
+
+    def payload(self, row: int) -> Dict[str, Any]:
+        payload = self._payloads[row]
+        if isinstance(payload, bytes):
+            payload = self._payloads[row] = json.loads(payload)
+        return payload
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[ScoredPoint]:
+        """The k rows most similar to query, best first"""
+        if not len(self):
+            return []
+        scores = self.scores(query)
+        return [ScoredPoint(self._ids[row], float(scores[row]), self.payload(row))
+                for row in top_k(scores, min(k, len(self)))]
+
+    def search_batch(self, queries: np.ndarray, k: int = 10) -> List[List[ScoredPoint]]:
+        """search() for each row of queries, scoring blocks of queries with one matrix product"""
+        queries = np.asarray(queries, dtype=np.float32)
+        if not len(self):
+            return [[] for _ in queries]
+        k = min(k, len(self))
+        block = max(1, _BATCH_SCORES // len(self._ids))
+        results = []
+        for start in range(0, len(queries), block):
+            scores = self.scores(queries[start:start + block]).T
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+            order = np.argsort(-candidate_scores, axis=1, kind='stable')
+            for rows, row_scores in zip(np.take_along_axis(candidates, order, axis=1),
+                                        np.take_along_axis(candidate_scores, order, axis=1)):
+                results.append([ScoredPoint(self._ids[row], float(score), self.payload(row))
+                                for row, score in zip(rows.tolist(), row_scores.tolist())])
+        return results
+
+    def save(self):
+        """Append pending rows to path, or rewrite it when many rows were removed"""
+        if self.path is None or not (self._stored_rows or self._pending):
+            # Nothing written yet; meta.json alone would not load
+            return
+        os.makedirs(self.path, exist_ok=True)
+        if len(self._removed) > _COMPACT_RATIO * max(len(self._ids), 1):
+            self._compact()
+        elif self._pending:
+            self._append(np.concatenate(self._pending), self._ids[self._stored_rows:],
+                         self._payloads[self._stored_rows:])
+        self._write_meta()
+
+    def _append(self, rows: np.ndarray, ids: List[str], payloads: List[Union[Dict[str, Any], bytes]]):
+        vectors_path = self._file('vectors.npy')
+        total = self._stored_rows + len(rows)
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(header, {'descr': '<f4', 'fortran_order': False,
+                                                      'shape': (total, self.dim)})
+        if self._stored_rows and os.path.exists(vectors_path):
+            # Rows go after the stored ones and the fixed-size header is
+            # rewritten with the new row count, so a save costs O(new rows)
+            self._vectors = None
+            with open(vectors_path, 'r+b') as f:
+                np.lib.format.read_magic(f)
+                np.lib.format.read_array_header_1_0(f)
+                if f.tell() != len(header.getvalue()):
+                    raise ValueError(f"Unexpected header in {vectors_path}")
+                f.seek(f.tell() + self._stored_rows * self.dim * 4)
+                f.write(np.ascontiguousarray(rows, dtype='<f4').tobytes())
+                f.truncate()
+                f.seek(0)
+                f.write(header.getvalue())
+        else:
+            np.save(vectors_path, np.ascontiguousarray(rows, dtype='<f4'))
+        points_path = self._file('points.jsonl')
+        with open(points_path, 'r+b' if self._stored_rows and os.path.exists(points_path) else 'wb') as f:
+            f.seek(self._points_end)
+            f.write(self._points_lines(ids, payloads))
+            f.truncate()
+            self._points_end = f.tell()
+        self._stored_rows = total
+        self._vectors = np.load(vectors_path, mmap_mode='r')
+        self._pending, self._tail = [], None
+
+    @staticmethod
+    def _points_lines(ids: List[str], payloads: List[Union[Dict[str, Any], bytes]]) -> bytes:
+        return b''.join(
+            json.dumps(point_id).encode('utf-8') + b'\t'
+            + (payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')) + b'\n'
+            for point_id, payload in zip(ids, payloads)
+        )
+
+    def _compact(self):
+        live = np.array([row for row in range(len(self._ids)) if row not in self._removed], dtype=np.int64)
+        rows = np.asarray(self._vectors[live[live < self._stored_rows]]).reshape(-1, self.dim)
+        if self._pending:
+            rows = np.concatenate([rows, np.concatenate(self._pending)[live[live >= self._stored_rows]
+                                                                       - self._stored_rows]])
+        ids = [self._ids[row] for row in live]
+        payloads = [self._payloads[row] for row in live]
+        if not len(rows):
+            rows = np.zeros((0, self.dim), dtype=np.float32)
+        # Written beside the old files and swapped in, so a crash keeps one complete copy
+        with open(self._file('vectors.npy.tmp'), 'wb') as f:
+            np.save(f, np.ascontiguousarray(rows, dtype='<f4'))
+        with open(self._file('points.jsonl.tmp'), 'wb') as f:
+            f.write(self._points_lines(ids, payloads))
+            self._points_end = f.tell()
+        self._vectors = None
+        os.replace(self._file('vectors.npy.tmp'), self._file('vectors.npy'))
+        os.replace(self._file('points.jsonl.tmp'), self._file('points.jsonl'))
+        self._vectors = np.load(self._file('vectors.npy'), mmap_mode='r')
+        self._ids, self._payloads = ids, payloads
+        self._rows = {point_id: row for row, point_id in enumerate(ids)}
+        self._removed = set()
+        self._stored_rows = len(ids)
+        self._pending, self._tail = [], None
+
+    def _write_meta(self):
+        meta = {'kind': self.kind, 'dim': self.dim, 'distance': self.distance, 'removed': sorted(self._removed)}
+        with open(self._file('meta.json.tmp'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(self._file('meta.json.tmp'), self._file('meta.json'))
+
+
+class LocalVectorStore:
+    """
+    In-process stand-in for the parts of QdrantClient that DataIngestion uses
+
+    Each collection is an index under path: an ExactIndex directory, or
+    with index='hnsw' an HNSW index file (HnswIndex, or with 'hnswlib'
+    HnswlibIndex, which needs hnswlib installed). create_collection, upsert, delete, query_points
+    and query_batch_points take the same arguments as QdrantClient's,
+    except that queries are plain vectors without filters; HNSW settings
+    (hnsw_config.m and ef_construct, search_params.hnsw_ef) are honoured
+    and quantization settings are ignored. Changes are written by save().
+    """
+
+    def __init__(self, path: str, index: str = 'exact'):
+        if index not in LOCAL_INDEX_KINDS:
+            raise ValueError(f"Unknown local index '{index}', expected one of {list(LOCAL_INDEX_KINDS)}")
+        self.path = path
+        self.index_kind = index
+        self._collections: Dict[str, Any] = {}
+
+    def collection(self, collection_name: str, dim: Optional[int] = None, distance: str = 'cosine', **options):
+        if collection_name not in self._collections:
+            if self.index_kind != 'exact':
+                from research_copilot.core.vector_store.hnsw import open_hnsw_index
+                os.makedirs(self.path, exist_ok=True)
+                index = open_hnsw_index(os.path.join(self.path, f"{collection_name}.hnsw"), dim, distance,
+                                        native=self.index_kind == 'hnswlib', **options)
+            else:
+                index = ExactIndex(os.path.join(self.path, collection_name), dim, distance)
+            self._collections[collection_name] = index
+        return self._collections[collection_name]
+
+    def create_collection(self, collection_name: str, vectors_config, quantization_config=None,
+                          hnsw_config=None, **kwargs):
+        """Open the collection, creating it if needed"""
+        options = {}
+        if self.index_kind != 'exact' and hnsw_config is not None:
+            if getattr(hnsw_config, 'm', None):
+                options['m'] = hnsw_config.m
+            if getattr(hnsw_config, 'ef_construct', None):
+                options['ef_construction'] = hnsw_config.ef_construct
+        self.collection(collection_name, vectors_config.size, _distance_name(vectors_config.distance), **options)
+
+    def update_collection(self, collection_name: str, **kwargs):
+        pass
+
+    def upsert(self, collection_name: str, points: Sequence[Any], **kwargs):
+        if not points:
+            return
+        self.collection(collection_name).add(
+            [str(point.id) for point in points],
+            np.array([point.vector for point in points], dtype=np.float32),
+            [point.payload for point in points]
+        )
+
+    def delete(self, collection_name: str, points_selector, **kwargs):
+        self.collection(collection_name).remove(str(point_id) for point_id in points_selector.points)
+
+    def _check_query(self, query: Any, query_filter: Any):
+        if query_filter is not None:
+            raise ValueError("The local vector store does not support query filters")
+        return np.asarray(query, dtype=np.float32)
+
+    def query_points(self, collection_name: str, query: Sequence[float], query_filter=None, search_params=None,
+                     limit: int = 10, **kwargs) -> QueryResponse:
+        index = self.collection(collection_name)
+        query = self._check_query(query, query_filter)
+        if index.kind == 'hnsw':
+            return QueryResponse(index.search(query, limit, ef=getattr(search_params, 'hnsw_ef', None)))
+        return QueryResponse(index.search(query, limit))
+
+    def query_batch_points(self, collection_name: str, requests: Sequence[Any], **kwargs) -> List[QueryResponse]:
+        """Results of each of a list of QueryRequests (query, filter, params, limit), in order"""
+        if not requests:
+            return []
+        index = self.collection(collection_name)
+        queries = np.array([self._check_query(request.query, request.filter) for request in requests])
+        if index.kind == 'exact':
+            limit = max(request.limit for request in requests)
+            return [QueryResponse(hits[:request.limit])
+                    for hits, request in zip(index.search_batch(queries, limit), requests)]
+        return [self.query_points(collection_name, query, search_params=request.params, limit=request.limit)
+                for query, request in zip(queries, requests)]
+
+    def save(self):
+        for index in self._collections.values():
+            index.save()
@@ -0,0 +1,81 @@
+import numpy as np
+
+from research_copilot.core.vector_store.quantization import normalize_rows
+
+PROJECTION_METHODS = ('pca', 'random')
+
+
+class Projection:
+    """
+    Linear map from encoder vectors to a smaller dimension
+
+    Unit-length encoder vectors are multiplied by an (input_dim, dim)
+    matrix chosen so that dot products of projected vectors approximate
+    the cosine similarity of the originals. Projected vectors are not
+    re-normalized (that would rescale each by the share of its energy the
+    projection kept), so collections holding them use dot-product
+    distance. The same Projection must be applied to stored and query
+    vectors; it is saved with save() and loaded with load().
+    """
+
+    def __init__(self, matrix: np.ndarray, method: str = "pca"):
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.method = method
+
+    @property
+    def input_dim(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @classmethod
+    def fit(cls, sample: np.ndarray, dim: int, method: str = "pca", seed: int = 0) -> 'Projection':
+        """
+        Fit on a sample of corpus vectors
+
+        pca keeps the dim directions that carry most of the sample's
+        energy, which best preserves inner products (no centring: the
+        shared mean direction is part of every similarity). random draws
+        an orthonormal Gaussian projection, scaled so projected dot
+        products are unbiased, and only uses the sample for its dimension.
+        """
+        sample = normalize_rows(sample)
+        if not 0 < dim <= sample.shape[1]:
+            raise ValueError(f"dim must be between 1 and {sample.shape[1]}")
+        if method == "pca":
+            # Right singular vectors of the sample, by decreasing energy
+            _, _, components = np.linalg.svd(sample, full_matrices=False)
+            matrix = components[:dim].T
+        elif method == "random":
+            rng = np.random.default_rng(seed)
+            basis, _ = np.linalg.qr(rng.standard_normal((sample.shape[1], dim)))
+            matrix = basis * np.sqrt(sample.shape[1] / dim)
+        else:
+            raise ValueError(f"Unknown projection '{method}', expected one of {list(PROJECTION_METHODS)}")
+        return cls(matrix, method)
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """Project one vector or a batch of rows"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[-1] != self.input_dim:
+            raise ValueError(f"Expected {self.input_dim}-dimensional vectors, got {vectors.shape[-1]}")
+        return normalize_rows(vectors) @ self.matrix
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            np.savez(f, matrix=self.matrix, method=np.array(self.method))
+
+    @classmethod
+    def load(cls, path: str) -> 'Projection':
+        with np.load(path) as data:
+            return cls(data['matrix'], str(data['method']))
+
+
+def sample_rows(vectors: np.ndarray, size: int, seed: int = 0) -> np.ndarray:
+    """Up to size random rows, read in order (cheap on a memory map)"""
+    if len(vectors) <= size:
+        return np.asarray(vectors)
+    rows = np.sort(np.random.default_rng(seed).choice(len(vectors), size, replace=False))
+    return np.asarray(vectors[rows])
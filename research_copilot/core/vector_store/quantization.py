@@ -0,0 +1,168 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+QUANTIZATION_KINDS = ('int8', 'binary')
+
+# Set bits in each byte value, for Hamming distances over packed codes
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+# Rows scored per block, so code -> float conversion stays small
+_BLOCK_ROWS = 65536
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension int8 (uint8) scalar quantization
+
+    Each dimension is clipped to its [quantile, 1 - quantile] range on the
+    training vectors and mapped to 256 levels: 1 byte per dimension, a 4x
+    saving over float32. Scores are asymmetric (float query against the
+    codes), which keeps ranking close to exact search.
+    """
+
+    kind = 'int8'
+
+    def __init__(self, low: np.ndarray, scale: np.ndarray):
+        self.low = np.asarray(low, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, quantile: float = 0.001) -> 'ScalarQuantizer':
+        low, high = np.quantile(vectors, [quantile, 1 - quantile], axis=0)
+        return cls(low, np.maximum(high - low, 1e-12) / 255)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        levels = np.rint((np.asarray(vectors, dtype=np.float32) - self.low) / self.scale)
+        return np.clip(levels, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale + self.low
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Approximate dot products of query with every coded vector"""
+        weights = query * self.scale
+        offset = float(query @ self.low)
+        result = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _BLOCK_ROWS):
+            block = codes[start:start + _BLOCK_ROWS]
+            result[start:start + len(block)] = block.astype(np.float32) @ weights + offset
+        return result
+
+
+class BinaryQuantizer:
+    """
+    One bit per dimension: the sign of the vector around the training mean
+
+    A 32x saving over float32. Vectors are compared by Hamming distance on
+    the packed bits, a coarse ranking that needs oversampling and
+    rescoring to recover precision.
+    """
+
+    kind = 'binary'
+
+    def __init__(self, mean: np.ndarray):
+        self.mean = np.asarray(mean, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray) -> 'BinaryQuantizer':
+        return cls(np.asarray(vectors, dtype=np.float32).mean(axis=0))
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(np.asarray(vectors, dtype=np.float32) > self.mean, axis=-1)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Negated Hamming distances, so higher is closer"""
+        query_bits = self.encode(query)
+        result = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _BLOCK_ROWS):
+            block = codes[start:start + _BLOCK_ROWS]
+            result[start:start + len(block)] = -_POPCOUNT[block ^ query_bits].sum(axis=1, dtype=np.int32)
+        return result
+
+
+def fit_quantizer(kind: str, vectors: np.ndarray):
+    if kind == 'int8':
+        return ScalarQuantizer.fit(vectors)
+    if kind == 'binary':
+        return BinaryQuantizer.fit(vectors)
+    raise ValueError(f"Unknown quantization '{kind}', expected one of {list(QUANTIZATION_KINDS)}")
+
+
+class QuantizedVectors:
+    """
+    Compact codes for the first pass, full-precision vectors for rescoring
+
+    Codes stay in memory; the normalized float32 vectors can be a
+    np.memmap, since only the oversampling * k candidates of each query
+    are read back to rescore with exact cosine similarity. This is the
+    same two-stage search Qdrant runs with a quantization_config and
+    rescore=True (see DataIngestion), here in NumPy so its memory and
+    recall can be measured offline.
+    """
+
+    def __init__(self, quantizer, codes: np.ndarray, vectors: np.ndarray):
+        self.quantizer = quantizer
+        self.codes = codes
+        self.vectors = vectors
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, kind: str = 'int8', path: Optional[str] = None,
+              train_size: int = 100000, seed: int = 0) -> 'QuantizedVectors':
+        """
+        Quantize vectors, fitting the quantizer on a sample of them
+
+        With path, the normalized float vectors are written there and
+        memory-mapped instead of kept in memory.
+        """
+        vectors = normalize_rows(vectors)
+        rng = np.random.default_rng(seed)
+        sample = vectors if len(vectors) <= train_size else vectors[rng.choice(len(vectors), train_size, replace=False)]
+        quantizer = fit_quantizer(kind, sample)
+        codes = quantizer.encode(vectors)
+        if path is not None:
+            vectors.tofile(path)
+            vectors = np.memmap(path, dtype=np.float32, mode='r', shape=vectors.shape)
+        return cls(quantizer, codes, vectors)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def code_bytes(self) -> int:
+        """In-memory size of the codes (what the first pass needs resident)"""
+        return self.codes.nbytes
+
+    def search(self, query: np.ndarray, k: int = 10, oversampling: float = 4.0,
+               rescore: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices and cosine scores of the k nearest vectors, best first"""
+        query = normalize_rows(query)
+        approximate = self.quantizer.scores(self.codes, query)
+        if not rescore:
+            best = top_k(approximate, k)
+            return best, approximate[best]
+        candidates = np.sort(top_k(approximate, int(np.ceil(k * oversampling))))
+        # Sorted rows make the memory-mapped reads sequential
+        exact = np.asarray(self.vectors[candidates]) @ query
+        best = top_k(exact, k)
+        return candidates[best], exact[best]
+
+
+def recall_at_k(found: np.ndarray, expected: np.ndarray) -> float:
+    """Share of the expected neighbours (rows of ids per query) that were found"""
+    hits = sum(len(np.intersect1d(f, e)) for f, e in zip(found, expected))
+    return hits / max(sum(len(e) for e in expected), 1)
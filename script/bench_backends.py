@@ -0,0 +1,68 @@
+"""
+Compare PDF text backends on throughput and peak RSS.
+
+Each (backend, PDF) run happens in a fresh process so the peak RSS
+reported by getrusage belongs to that run alone.
+
+Run from the repository root:
+    python -m script.bench_backends --backends pdfplumber pypdf pypdfium2
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+
+from research_copilot.core.pdf_processing.backends import BACKENDS, open_pdf
+from script.bench_extraction import DEFAULT_PDFS
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(backend: str, pdf_path: str, repeat: int):
+    """Extract every page `repeat` times; returns (pages, best_seconds, chars, rss_before, rss_peak)"""
+    # Import the backend library before sampling the baseline RSS
+    with open_pdf(pdf_path, backend) as document:
+        pages = len(document)
+    rss_before = _peak_rss_mb()
+
+    best = None
+    chars = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open_pdf(pdf_path, backend) as document:
+            chars = sum(len(document.page_text(i) or '') for i in range(len(document)))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return pages, best, chars, rss_before, _peak_rss_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdfs', nargs='*', default=DEFAULT_PDFS)
+    parser.add_argument('--backends', nargs='+', default=sorted(BACKENDS))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    for pdf_path in args.pdfs:
+        print(f"\n{os.path.basename(pdf_path)}")
+        for backend in args.backends:
+            with ctx.Pool(1, maxtasksperchild=1) as pool:
+                try:
+                    pages, seconds, chars, rss_before, rss_peak = pool.apply(
+                        _run, (backend, pdf_path, args.repeat)
+                    )
+                except ImportError as e:
+                    print(f"  {backend:<11}: skipped ({e})")
+                    continue
+            print(f"  {backend:<11}: {pages / seconds:8.2f} pages/s  "
+                  f"peak RSS {rss_peak:7.1f} MB (+{rss_peak - rss_before:6.1f} MB)  "
+                  f"{chars} chars")
+
+
+if __name__ == "__main__":
+    main()
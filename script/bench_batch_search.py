@@ -0,0 +1,68 @@
+"""
+Measure query throughput of batched against one-at-a-time search.
+
+Builds an ExactIndex of synthetic 768-d embeddings and answers the same
+queries at batch sizes 1, 8, 64 and 512, either with one search() per
+query or with one search_batch() per batch (a matrix-matrix product
+instead of a matrix-vector product per query, so the stored vectors are
+streamed through the CPU once per batch). With --model the query
+strings are also encoded per query and in one encode() call per batch,
+as DataIngestion.search_similar and search_similar_batch do.
+
+Run from the repository root:
+    python -m script.bench_batch_search --vectors 100000 --batch-sizes 1 8 64 512
+"""
+import argparse
+import time
+
+from research_copilot.core.vector_store.local import ExactIndex
+from script.bench_chunking import synthetic_corpus
+from script.bench_quantization import synthetic_embeddings
+
+
+def throughput(function, batches):
+    start = time.perf_counter()
+    count = sum(len(function(batch)) for batch in batches)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--vectors', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=1024)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 64, 512])
+    parser.add_argument('--model', default=None, help="Also time query encoding with this model")
+    parser.add_argument('--embedding-backend', default='torch')
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.vectors + args.queries)
+    index = ExactIndex()
+    index.add([str(i) for i in range(args.vectors)], vectors[:args.vectors])
+    queries = vectors[args.vectors:]
+    print(f"{args.vectors} x {vectors.shape[1]} vectors, {args.queries} queries, top-{args.k}\n")
+
+    print("  vector search (queries/s)")
+    for size in args.batch_sizes:
+        batches = [queries[start:start + size] for start in range(0, len(queries), size)]
+        single = throughput(lambda batch: [index.search(query, args.k) for query in batch], batches)
+        batched = throughput(lambda batch: index.search_batch(batch, args.k), batches)
+        print(f"    batch {size:4d}: one at a time {single:8.1f}   batched {batched:8.1f}   x{batched / single:.1f}")
+
+    if args.model:
+        from research_copilot.core.embeddings.onnx_backend import load_encoder
+        model = load_encoder(args.model, args.embedding_backend)
+        texts = [text[:200] for text in synthetic_corpus(args.queries, 40)]
+        model.encode(texts[:8], show_progress_bar=False)  # warm-up
+        print("\n  query encoding (queries/s)")
+        for size in args.batch_sizes:
+            batches = [texts[start:start + size] for start in range(0, len(texts), size)]
+            single = throughput(lambda batch: [model.encode([text], show_progress_bar=False) for text in batch],
+                                batches)
+            batched = throughput(lambda batch: model.encode(batch, batch_size=64, show_progress_bar=False), batches)
+            print(f"    batch {size:4d}: one at a time {single:8.1f}   batched {batched:8.1f}   "
+                  f"x{batched / single:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark cross-paper batching against per-paper encoding on CPU.
+
+Builds a synthetic set of papers with a realistic spread of chunk counts
+(a few short papers, some long ones) and chunk lengths, then encodes it
+two ways with the same SentenceTransformer:
+
+  per-paper  one model.encode(chunks, show_progress_bar=True) per paper,
+             as DataIngestion.store_paper used to do
+  batched    EmbeddingBatcher pooling chunks across papers into fixed-size,
+             length-sorted batches
+
+and reports chunks/s for each. Also checks the vectors match.
+
+Run from the repository root:
+    python -m script.bench_batching --model allenai/specter
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from research_copilot.core.chunking import chunk_spans
+from research_copilot.core.embeddings.batcher import EmbeddingBatcher
+from script.bench_chunking import synthetic_corpus
+
+
+def synthetic_papers(papers, seed=0):
+    rng = random.Random(seed)
+    words = synthetic_corpus(1, 200000, seed)[0].split()
+    result = []
+    for _ in range(papers):
+        # Most papers are short; a few run to many chunks
+        count = min(len(words), int(rng.lognormvariate(7, 0.9)) + 1)
+        start = rng.randrange(len(words) - count + 1)
+        result.append(chunk_spans(' '.join(words[start:start + count]), 1000).texts())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default='allenai/specter')
+    parser.add_argument('--papers', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.model, device='cpu')
+    papers = synthetic_papers(args.papers)
+    total = sum(len(chunks) for chunks in papers)
+    sizes = sorted(len(chunks) for chunks in papers)
+    print(f"{len(papers)} papers, {total} chunks (median {sizes[len(sizes) // 2]}, max {sizes[-1]} per paper)")
+
+    model.encode(papers[0][:args.batch_size], show_progress_bar=False)  # warm-up
+
+    start = time.perf_counter()
+    per_paper = [model.encode(chunks, show_progress_bar=True) for chunks in papers]
+    per_paper_time = time.perf_counter() - start
+
+    batcher = EmbeddingBatcher(
+        lambda texts: model.encode(texts, batch_size=len(texts), show_progress_bar=False),
+        batch_size=args.batch_size
+    )
+    start = time.perf_counter()
+    batched = {}
+    for idx, chunks in enumerate(papers):
+        batched.update(batcher.add(idx, chunks))
+    batched.update(batcher.flush())
+    batched_time = time.perf_counter() - start
+
+    worst = max(
+        float(np.abs(batched[idx] - vectors).max()) for idx, vectors in enumerate(per_paper) if len(vectors)
+    )
+    print(f"  per-paper : {total / per_paper_time:8.1f} chunks/s ({len(papers)} encode calls)")
+    print(f"  batched   : {total / batched_time:8.1f} chunks/s ({batcher.batches} batches of "
+          f"{args.batch_size}, x{per_paper_time / batched_time:.2f})")
+    print(f"  max abs difference between the two: {worst:.2e}")
+
+
+if __name__ == '__main__':
+    main()
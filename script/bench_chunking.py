@@ -0,0 +1,129 @@
+"""
+Benchmark the span chunker against the three chunkers it replaced.
+
+Each legacy chunker (DataIngestion._chunk_text's word split and join, and
+the overlapping character windows of temp.py and temp22.py) is compared
+with chunk_spans() configured the same way, on a synthetic corpus of
+random words. Reports chunking time, the memory held by the result
+(chunk strings versus span arrays) and the chunk counts. The character
+windows are checked to be identical.
+
+Run from the repository root:
+    python -m script.bench_chunking
+"""
+import argparse
+import random
+import sys
+import time
+
+from research_copilot.core.chunking import chunk_spans
+
+
+def legacy_word_chunks(text, chunk_size=1000):
+    """The original DataIngestion._chunk_text"""
+    words = text.split()
+    chunks = []
+    current_chunk = []
+    current_size = 0
+    for word in words:
+        current_size += len(word) + 1
+        if current_size > chunk_size:
+            chunks.append(' '.join(current_chunk))
+            current_chunk = [word]
+            current_size = len(word)
+        else:
+            current_chunk.append(word)
+    if current_chunk:
+        chunks.append(' '.join(current_chunk))
+    return chunks
+
+
+def legacy_window_chunks(text, chunk_size, step, min_length=100):
+    """The original temp.py / temp22.py sliding character windows"""
+    chunks = []
+    for i in range(0, len(text), step):
+        chunk = text[i:i + chunk_size]
+        if len(chunk) >= min_length:
+            chunks.append(chunk)
+    return chunks
+
+
+def synthetic_corpus(documents, words_per_document, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [
+        ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 12)))
+        for _ in range(5000)
+    ]
+    corpus = []
+    for _ in range(documents):
+        words = rng.choices(vocabulary, k=words_per_document)
+        # Paragraph breaks every ~80 words, like extracted PDF text
+        for idx in range(80, len(words), 80):
+            words[idx] = words[idx] + '\n'
+        corpus.append(' '.join(words))
+    return corpus
+
+
+def run(chunker, corpus, repeat):
+    best, results = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [chunker(text) for text in corpus]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def string_bytes(results):
+    return sum(sys.getsizeof(chunk) for chunks in results for chunk in chunks)
+
+
+def span_bytes(results):
+    return sum(spans.starts.nbytes + spans.ends.nbytes for spans in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=500)
+    parser.add_argument('--words', type=int, default=10000, help="Words per document")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--overlap', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.documents, args.words)
+    total_mb = sum(len(text) for text in corpus) / 1e6
+    print(f"{args.documents} documents, {total_mb:.1f} M characters\n")
+
+    size, overlap = args.chunk_size, args.overlap
+    cases = [
+        ("word packing (DataIngestion)",
+         lambda text: legacy_word_chunks(text, size),
+         lambda text: chunk_spans(text, size)),
+        ("char windows, 50% overlap (temp.py)",
+         lambda text: legacy_window_chunks(text, size, size // 2),
+         lambda text: chunk_spans(text, size, overlap=size // 2, min_length=100, unit="char")),
+        (f"char windows, {overlap} overlap (temp22.py)",
+         lambda text: legacy_window_chunks(text, size, size - overlap),
+         lambda text: chunk_spans(text, size, overlap=overlap, min_length=100, unit="char")),
+    ]
+
+    for name, legacy, spans in cases:
+        legacy_time, legacy_results = run(legacy, corpus, args.repeat)
+        span_time, span_results = run(spans, corpus, args.repeat)
+        _, materialized = run(lambda text: spans(text).texts(), corpus, 1)
+
+        legacy_chunks = sum(len(chunks) for chunks in legacy_results)
+        span_chunks = sum(len(chunks) for chunks in span_results)
+        same = "identical" if materialized == legacy_results else "differs"
+        print(name)
+        print(f"  legacy : {legacy_time:7.3f}s  {legacy_chunks:8,d} chunks  "
+              f"{string_bytes(legacy_results) / 1e6:8.1f} MB of strings")
+        print(f"  spans  : {span_time:7.3f}s  {span_chunks:8,d} chunks  "
+              f"{span_bytes(span_results) / 1e6:8.1f} MB of spans  "
+              f"(x{legacy_time / span_time:.1f}, chunks {same})")
+        print()
+
+
+if __name__ == '__main__':
+    main()
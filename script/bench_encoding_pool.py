@@ -0,0 +1,64 @@
+"""
+Scaling benchmark for the multi-process CPU encoding pool.
+
+Encodes a fixed set of synthetic chunks with a single in-process
+SentenceTransformer (all threads) and with EncodingPool at 1..N workers
+(threads split evenly across workers), and reports chunks/s and the
+speed-up over the single process. Model loading is excluded: each pool
+is warmed up on every worker before timing.
+
+Run from the repository root:
+    python -m script.bench_encoding_pool --model allenai/specter --chunks 1024
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from research_copilot.core.embeddings.pool import EncodingPool
+from script.bench_batching import synthetic_papers
+
+
+def worker_counts(maximum):
+    counts, workers = [], 1
+    while workers < maximum:
+        counts.append(workers)
+        workers *= 2
+    return counts + [maximum]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default='allenai/specter')
+    parser.add_argument('--chunks', type=int, default=1024)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    chunks = [chunk for paper in synthetic_papers(400) for chunk in paper][:args.chunks]
+    print(f"{len(chunks)} chunks, {os.cpu_count()} CPUs\n")
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.model, device='cpu')
+    model.encode(chunks[:args.batch_size], show_progress_bar=False)
+    start = time.perf_counter()
+    reference = model.encode(chunks, batch_size=args.batch_size, show_progress_bar=False)
+    baseline = len(chunks) / (time.perf_counter() - start)
+    print(f"  single process : {baseline:8.1f} chunks/s")
+    del model
+
+    for workers in worker_counts(args.max_workers):
+        with EncodingPool(args.model, workers=workers) as pool:
+            # One shard per worker loads every worker's model before timing
+            pool.encode(chunks[:pool.shard_size * workers], batch_size=args.batch_size)
+            start = time.perf_counter()
+            embeddings = pool.encode(chunks, batch_size=args.batch_size)
+            rate = len(chunks) / (time.perf_counter() - start)
+        drift = float(np.abs(embeddings - reference).max())
+        print(f"  {workers:3d} x {pool.threads_per_worker:2d} threads: {rate:8.1f} chunks/s "
+              f"(x{rate / baseline:.2f}, max abs diff {drift:.1e})")
+
+
+if __name__ == '__main__':
+    main()
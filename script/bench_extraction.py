@@ -0,0 +1,80 @@
+"""
+Benchmark PDFExtractor against the extractor it replaced.
+
+The baseline is the single-threaded pdfplumber extractor of the commit
+before the extraction work (BASELINE_COMMIT), loaded from git history, so
+the speedups include every change since and not only the process pool.
+Run from the repository root of a git checkout:
+    python -m script.bench_extraction --workers 2 4
+"""
+import argparse
+import glob
+import os
+import subprocess
+import tempfile
+import time
+import types
+
+from research_copilot.core.pdf_processing.extractor import PDFExtractor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_PDFS = [os.path.join(ROOT, 'data', 'uploads', '1301.3781v3.pdf')] + \
+    sorted(glob.glob(os.path.join(ROOT, 'data', 'storage', 'ml_papers', '*.pdf')))
+
+BASELINE_COMMIT = '3fb8e9b'
+EXTRACTOR_SOURCE = 'research_copilot/core/pdf_processing/extractor.py'
+
+
+def load_baseline_extractor(commit: str) -> type:
+    """PDFExtractor as it was at commit, executed from `git show` output"""
+    source = subprocess.run(['git', 'show', f'{commit}:{EXTRACTOR_SOURCE}'], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    module = types.ModuleType('baseline_extractor')
+    exec(compile(source, f'{commit}:{EXTRACTOR_SOURCE}', 'exec'), module.__dict__)
+    return module.PDFExtractor
+
+
+def time_extraction(extract, pdf_path: str, repeat: int, **kwargs):
+    """Return (best_seconds, result) over `repeat` runs"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = extract(pdf_path, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdfs', nargs='*', default=DEFAULT_PDFS)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, os.cpu_count() or 2])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE_COMMIT, help="Commit of the extractor to compare against")
+    args = parser.parse_args()
+
+    storage_path = tempfile.mkdtemp()
+    baseline = load_baseline_extractor(args.baseline)(storage_path=storage_path)
+    extractor = PDFExtractor(storage_path=storage_path, use_cache=False)
+
+    for pdf_path in args.pdfs:
+        baseline_time, baseline_result = time_extraction(baseline.extract_text_with_sections, pdf_path, args.repeat)
+        pages = baseline_result['metadata']['total_pages']
+        print(f"\n{os.path.basename(pdf_path)} ({pages} pages)")
+        print(f"  baseline    : {pages / baseline_time:8.2f} pages/s ({args.baseline})")
+
+        serial_result = None
+        for workers in [1] + sorted(set(args.workers) - {1}):
+            elapsed, result = time_extraction(extractor.extract_text_with_sections, pdf_path, args.repeat,
+                                              workers=workers)
+            serial_result = serial_result or result
+            # Text should match the baseline's; sections may not, since a
+            # repeated header no longer replaces its section's earlier text
+            print(f"  workers={workers:<3} : {pages / elapsed:8.2f} pages/s "
+                  f"(x{baseline_time / elapsed:.2f}, same text={result['full_text'] == baseline_result['full_text']}, "
+                  f"same as serial={result == serial_result})")
+
+
+if __name__ == "__main__":
+    main()
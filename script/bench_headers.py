@@ -0,0 +1,83 @@
+"""
+Micro-benchmark section-header classification over the lines of the bundled PDFs.
+
+Compares the previous per-pattern loop (is_section_header followed by
+clean_section_name) with the combined SectionHeaderMatcher and checks that
+both classify every line identically.
+
+Run from the repository root:
+    python -m script.bench_headers
+"""
+import argparse
+import re
+import time
+
+import pdfplumber
+
+from research_copilot.core.pdf_processing.headers import SECTION_PATTERNS, SectionHeaderMatcher
+from script.bench_extraction import DEFAULT_PDFS
+
+
+def legacy_classify(patterns, line):
+    """The original is_section_header + clean_section_name path"""
+    if not line.strip():
+        return None
+    lowered = line.strip().lower()
+    if not any(pattern.match(lowered) for pattern in patterns):
+        return None
+
+    clean = re.sub(r'^\d+\.?\s*', '', line.strip())
+    clean = clean.strip().lower()
+    section_mapping = {
+        'methodology': 'methods',
+        'materials and methods': 'methods',
+        'experimental setup': 'methods',
+        'findings': 'results',
+        'conclusions': 'conclusion'
+    }
+    return section_mapping.get(clean, clean)
+
+
+def load_lines(pdf_paths):
+    lines = []
+    for pdf_path in pdf_paths:
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                lines.extend((page.extract_text() or '').split('\n'))
+    return lines
+
+
+def lines_per_second(classify, lines, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            classify(line)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(lines) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdfs', nargs='*', default=DEFAULT_PDFS)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    lines = load_lines(args.pdfs)
+    patterns = [re.compile(p, re.IGNORECASE) for p in SECTION_PATTERNS]
+    matcher = SectionHeaderMatcher()
+
+    mismatches = [l for l in lines if legacy_classify(patterns, l) != matcher.classify(l)]
+    headers = sum(1 for l in lines if matcher.classify(l) is not None)
+
+    legacy = lines_per_second(lambda l: legacy_classify(patterns, l), lines, args.repeat)
+    combined = lines_per_second(matcher.classify, lines, args.repeat)
+
+    print(f"{len(lines)} lines, {headers} classified as headers, {len(mismatches)} mismatches")
+    print(f"  per-pattern loop : {legacy:12,.0f} lines/s")
+    print(f"  combined matcher : {combined:12,.0f} lines/s (x{combined / legacy:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure recall@k against queries per second for the HNSW index.
+
+Builds an HnswIndex over synthetic 768-d embeddings (the power-law
+spectrum of bench_projection, or the clustered set of bench_quantization
+with --clustered) for each --m, saves it, reloads it memory-mapped and
+sweeps the search beam ef. Recall is measured against exact search on
+held-out vectors of the same distribution; exact search over an
+ExactIndex is the QPS baseline. The index is pure NumPy, so inserts and
+each search step pay interpreter overhead: it overtakes exact search once
+the corpus is large enough for a full matrix-vector product to dominate.
+
+Run from the repository root:
+    python -m script.bench_hnsw --vectors 20000 --m 8 16 --ef 16 32 64 128
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from research_copilot.core.vector_store.hnsw import HnswIndex
+from research_copilot.core.vector_store.local import ExactIndex
+from research_copilot.core.vector_store.quantization import recall_at_k
+from script.bench_projection import spectrum_embeddings
+from script.bench_quantization import synthetic_embeddings
+
+
+def run_queries(index, queries, k, **kwargs):
+    start = time.perf_counter()
+    found = [[int(hit.id) for hit in index.search(query, k, **kwargs)] for query in queries]
+    return found, len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--vectors', type=int, default=20000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--m', type=int, nargs='+', default=[16])
+    parser.add_argument('--ef-construction', type=int, default=100)
+    parser.add_argument('--ef', type=int, nargs='+', default=[16, 32, 64, 128, 256])
+    parser.add_argument('--clustered', action='store_true', help="Use clustered instead of power-law vectors")
+    args = parser.parse_args()
+
+    total = args.vectors + args.queries
+    if args.clustered:
+        vectors = synthetic_embeddings(total, args.dim)
+    else:
+        vectors = spectrum_embeddings(total, args.dim)
+    vectors, queries = vectors[:-args.queries], vectors[-args.queries:]
+    ids = [str(i) for i in range(len(vectors))]
+
+    exact = ExactIndex()
+    exact.add(ids, vectors)
+    expected, exact_qps = run_queries(exact, queries, args.k)
+    print(f"{len(vectors)} x {args.dim} vectors, {len(queries)} queries, recall@{args.k}\n")
+    print(f"  exact                       recall 1.000   {exact_qps:8.1f} QPS")
+
+    for m in args.m:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.hnsw')
+            index = HnswIndex(path, m=m, ef_construction=args.ef_construction)
+            start = time.perf_counter()
+            index.add(ids, vectors)
+            build_s = time.perf_counter() - start
+            index.save()
+            size_mb = os.path.getsize(path) / 2**20
+
+            start = time.perf_counter()
+            index = HnswIndex(path)
+            load_ms = (time.perf_counter() - start) * 1000
+            print(f"\n  m={m}: build {build_s:.1f}s ({len(vectors) / build_s:.0f} inserts/s), "
+                  f"{size_mb:.0f} MB file, load {load_ms:.1f} ms")
+            for ef in args.ef:
+                found, qps = run_queries(index, queries, args.k, ef=ef)
+                print(f"    ef={ef:<4d}                  recall {recall_at_k(found, expected):.3f}   "
+                      f"{qps:8.1f} QPS")
+
+
+if __name__ == '__main__':
+    main()
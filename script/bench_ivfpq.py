@@ -0,0 +1,81 @@
+"""
+Measure memory, recall and speed of the IVF-PQ index against exact search.
+
+Trains an IvfPqIndex on a sample of synthetic 768-d embeddings (the
+power-law spectrum of bench_projection), streams the corpus in with
+add() in blocks, and sweeps nprobe. Reports bytes per vector, training
+time, add throughput, recall@k against exact search, the share of the
+exact top k found among the index's top --candidates, recall@k when
+those candidates are reranked with the full vectors (search's
+oversample), and queries per second.
+
+Run from the repository root:
+    python -m script.bench_ivfpq --vectors 200000 --nlist 1024 --subvectors 48 96
+"""
+import argparse
+import time
+
+import numpy as np
+
+from research_copilot.core.vector_store.ivfpq import IvfPqIndex
+from research_copilot.core.vector_store.projection import sample_rows
+from research_copilot.core.vector_store.quantization import recall_at_k
+from script.bench_projection import search_all, spectrum_embeddings
+
+BLOCK = 50000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--vectors', type=int, default=200000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--decay', type=float, default=1.5, help="Power-law exponent of the synthetic spectrum")
+    parser.add_argument('--train-size', type=int, default=50000)
+    parser.add_argument('--nlist', type=int, default=1024)
+    parser.add_argument('--subvectors', type=int, nargs='+', default=[48, 96])
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--iterations', type=int, default=15)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--candidates', type=int, default=100)
+    args = parser.parse_args()
+
+    vectors = spectrum_embeddings(args.vectors + args.queries, args.dim, decay=args.decay)
+    vectors, queries = vectors[:-args.queries], vectors[-args.queries:]
+    expected, exact_ms = search_all(vectors, queries, args.k)
+    print(f"{len(vectors)} x {args.dim} vectors, {len(queries)} queries, nlist {args.nlist}, recall@{args.k}\n")
+    print(f"  exact float32        {vectors.shape[1] * 4:4d} B/vector   recall 1.000   "
+          f"{1000 / exact_ms:8.1f} QPS")
+
+    sample = sample_rows(vectors, args.train_size)
+    for subvectors in args.subvectors:
+        index = IvfPqIndex()
+        start = time.perf_counter()
+        index.train(sample, args.nlist, subvectors, args.iterations)
+        train_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for offset in range(0, len(vectors), BLOCK):
+            block = vectors[offset:offset + BLOCK]
+            index.add([str(offset + i) for i in range(len(block))], block)
+        add_s = time.perf_counter() - start
+        print(f"\n  pq{subvectors}: {subvectors + 8} B/vector, train {train_s:.1f}s, "
+              f"add {len(vectors) / add_s:,.0f} vectors/s")
+        for nprobe in args.nprobe:
+            start = time.perf_counter()
+            found = [[int(hit.id) for hit in index.search(query, args.candidates, nprobe=nprobe)] for query in queries]
+            qps = len(queries) / (time.perf_counter() - start)
+            in_candidates = np.mean([len(set(hits) & set(map(int, truth))) / len(truth)
+                                     for hits, truth in zip(found, expected)])
+            print(f"    nprobe={nprobe:<3d}  recall {recall_at_k([hits[:args.k] for hits in found], expected):.3f}   "
+                  f"top {args.k} in {args.candidates}: {in_candidates:.3f}   {qps:8.1f} QPS")
+            start = time.perf_counter()
+            reranked = [[int(hit.id) for hit in index.search(query, args.k, nprobe=nprobe,
+                                                             oversample=args.candidates // args.k)]
+                        for query in queries]
+            qps = len(queries) / (time.perf_counter() - start)
+            print(f"    nprobe={nprobe:<3d}  recall {recall_at_k(reranked, expected):.3f} reranking "
+                  f"{args.candidates} candidates   {qps:8.1f} QPS")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure the local memory-mapped exact vector index at growing sizes.
+
+For each size, streams synthetic 768-d vectors into an ExactIndex in
+blocks (saving after each, as ingestion does), reopens it from disk and
+reports disk size, cold load time and top-k query latency. Queries are
+one matrix-vector product over the memory map plus an argpartition, so
+latency grows linearly with the number of vectors; the first queries
+after a load also page the matrix in from disk.
+
+Run from the repository root:
+    python -m script.bench_local_index --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from research_copilot.core.vector_store.local import ExactIndex
+from script.bench_quantization import synthetic_embeddings
+
+BLOCK = 50000
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    queries = synthetic_embeddings(args.queries, args.dim, seed=12345)
+    print(f"{args.dim}-d vectors, {args.queries} queries, top-{args.k}\n")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            index = ExactIndex(directory)
+            start = time.perf_counter()
+            for offset in range(0, size, BLOCK):
+                count = min(BLOCK, size - offset)
+                ids = [f"chunk_{offset + i}" for i in range(count)]
+                index.add(ids, synthetic_embeddings(count, args.dim, seed=offset),
+                          [{'paper_id': f"paper_{(offset + i) // 20}", 'chunk_index': (offset + i) % 20}
+                           for i in range(count)])
+                index.save()
+            build_s = time.perf_counter() - start
+            del index
+
+            start = time.perf_counter()
+            index = ExactIndex(directory)
+            load_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index.search(queries[0], args.k)
+            first_ms = (time.perf_counter() - start) * 1000
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                index.search(query, args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+            print(f"  {size:>9,} vectors  {directory_size(directory) / 2**20:7.0f} MB on disk   "
+                  f"build {build_s:6.1f}s   load {load_s * 1000:7.1f} ms   first query {first_ms:7.1f} ms   "
+                  f"p50 {np.percentile(latencies, 50):7.2f} ms   p95 {np.percentile(latencies, 95):7.2f} ms   "
+                  f"{1000 / np.mean(latencies):7.1f} QPS")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark the ONNX Runtime embedding backends against PyTorch on CPU.
+
+For each model (SPECTER from DataIngestion, MiniLM from the data/storage
+pipelines, bge-small from the API) encodes the same synthetic chunks with
+the torch, onnx and onnx-int8 backends and reports:
+
+  latency     median time to encode one chunk (a single query)
+  throughput  chunks/s for the whole set in batches of --batch-size
+  parity      min / mean cosine similarity to the PyTorch vectors
+
+Models are exported to data/models/onnx on first use; export time is not
+counted.
+
+Run from the repository root:
+    python -m script.bench_onnx --chunks 256
+"""
+import argparse
+import statistics
+import time
+
+from research_copilot.core.embeddings.onnx_backend import EMBEDDING_BACKENDS, cosine_parity, load_encoder
+from script.bench_batching import synthetic_papers
+
+MODELS = ('allenai/specter', 'sentence-transformers/all-MiniLM-L6-v2', 'BAAI/bge-small-en')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--models', nargs='+', default=list(MODELS))
+    parser.add_argument('--chunks', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--queries', type=int, default=50, help="Single-chunk encodes for the latency figure")
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    chunks = [chunk for paper in synthetic_papers(200) for chunk in paper][:args.chunks]
+    print(f"{len(chunks)} chunks, batch size {args.batch_size}")
+
+    for model_name in args.models:
+        print(f"\n{model_name}")
+        reference = None
+        for backend in EMBEDDING_BACKENDS:
+            model = load_encoder(model_name, backend, threads=args.threads)
+            model.encode(chunks[:args.batch_size], batch_size=args.batch_size)  # warm-up
+
+            latencies = []
+            for chunk in chunks[:args.queries]:
+                start = time.perf_counter()
+                model.encode([chunk], show_progress_bar=False)
+                latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            embeddings = model.encode(chunks, batch_size=args.batch_size, show_progress_bar=False)
+            rate = len(chunks) / (time.perf_counter() - start)
+
+            if reference is None:
+                reference = embeddings
+            parity = cosine_parity(reference, embeddings)
+            print(f"  {backend:10s}: {statistics.median(latencies) * 1000:7.1f} ms/query  "
+                  f"{rate:8.1f} chunks/s  cosine min {parity['min']:.4f} mean {parity['mean']:.4f}")
+            del model
+
+
+if __name__ == '__main__':
+    main()
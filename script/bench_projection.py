@@ -0,0 +1,77 @@
+"""
+Measure the recall/latency trade-off of projecting 768-d vectors down.
+
+Fits PCA and random projections on a sample of synthetic 768-d
+embeddings, projects the corpus and the queries, and reports memory per
+million vectors, exact-search latency per query and recall@k against
+exact search on the full 768-d vectors.
+The synthetic vectors have a power-law variance spectrum (variance of
+the i-th principal direction ~ i^-decay), as sentence embeddings
+concentrate their variance in a minority of directions; --decay 0 gives
+an isotropic worst case. Pass --vectors-file to use real embeddings
+instead, e.g. the vectors.f32 of an embedding cache directory.
+
+Run from the repository root:
+    python -m script.bench_projection --vectors 100000 --dims 128 256
+"""
+import argparse
+import time
+
+import numpy as np
+
+from research_copilot.core.vector_store.projection import PROJECTION_METHODS, Projection, sample_rows
+from research_copilot.core.vector_store.quantization import normalize_rows, recall_at_k, top_k
+
+
+def spectrum_embeddings(count, dim=768, decay=1.0, seed=0):
+    """Unit vectors whose principal variances fall off as i^-decay in a random basis"""
+    rng = np.random.default_rng(seed)
+    basis, _ = np.linalg.qr(rng.standard_normal((dim, dim)))
+    scales = np.arange(1, dim + 1, dtype=np.float32) ** (-decay / 2)
+    latent = rng.standard_normal((count, dim), dtype=np.float32) * scales
+    return normalize_rows(latent @ basis.astype(np.float32).T + rng.standard_normal(dim, dtype=np.float32) * 0.1)
+
+
+def search_all(vectors, queries, k):
+    start = time.perf_counter()
+    found = [top_k(vectors @ query, k) for query in queries]
+    return found, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--vectors', type=int, default=100000)
+    parser.add_argument('--vectors-file', default=None, help="Raw float32 file of 768-d vectors")
+    parser.add_argument('--dims', type=int, nargs='+', default=[128, 256])
+    parser.add_argument('--decay', type=float, default=1.0, help="Power-law exponent of the synthetic spectrum")
+    parser.add_argument('--sample', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.vectors_file:
+        vectors = normalize_rows(np.fromfile(args.vectors_file, dtype=np.float32).reshape(-1, 768))
+    else:
+        vectors = spectrum_embeddings(args.vectors + args.queries, decay=args.decay)
+    vectors, queries = vectors[:-args.queries], vectors[-args.queries:]
+    million = 1_000_000 / len(vectors)
+
+    expected, exact_ms = search_all(vectors, queries, args.k)
+    print(f"{len(vectors)} x {vectors.shape[1]} vectors, {len(queries)} queries, recall@{args.k}\n")
+    print(f"  {'full 768':14s} {vectors.nbytes * million / 2**20:7.0f} MB/M vectors   "
+          f"recall 1.000   {exact_ms:6.2f} ms/query")
+
+    sample = sample_rows(vectors, args.sample)
+    for method in PROJECTION_METHODS:
+        for dim in args.dims:
+            start = time.perf_counter()
+            projection = Projection.fit(sample, dim, method)
+            fit_s = time.perf_counter() - start
+            projected = projection.apply(vectors)
+            found, elapsed = search_all(projected, projection.apply(queries), args.k)
+            print(f"  {method + ' ' + str(dim):14s} {projected.nbytes * million / 2**20:7.0f} MB/M vectors   "
+                  f"recall {recall_at_k(found, expected):.3f}   {elapsed:6.2f} ms/query   (fit {fit_s:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
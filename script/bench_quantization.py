@@ -0,0 +1,84 @@
+"""
+Measure memory and recall of quantized vector storage against exact search.
+
+Builds a synthetic, clustered set of 768-d unit vectors (SPECTER-sized,
+with the shared offset direction real sentence embeddings have), then
+searches it with:
+
+  exact      float32 cosine over every vector
+  int8       scalar-quantized codes, optionally rescored with float32
+  binary     sign bits + Hamming distance, optionally rescored
+
+and reports resident memory per million vectors, recall@k against exact
+search and query latency. Rescoring reads oversampling * k full vectors
+per query from a memory-mapped file.
+
+Run from the repository root:
+    python -m script.bench_quantization --vectors 200000 --k 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from research_copilot.core.vector_store.quantization import (
+    QUANTIZATION_KINDS, QuantizedVectors, normalize_rows, recall_at_k, top_k
+)
+
+
+def synthetic_embeddings(count, dim=768, clusters=1000, seed=0):
+    """Unit vectors around random topic centres, sharing one common direction"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim), dtype=np.float32)
+    common = rng.standard_normal(dim, dtype=np.float32) * 2
+    labels = rng.integers(0, clusters, count)
+    vectors = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, 65536):
+        stop = min(start + 65536, count)
+        noise = rng.standard_normal((stop - start, dim), dtype=np.float32) * 1.5
+        vectors[start:stop] = centres[labels[start:stop]] + common + noise
+    return normalize_rows(vectors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--vectors', type=int, default=200000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--oversampling', type=float, nargs='+', default=[2.0, 4.0, 10.0])
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.vectors + args.queries, args.dim)
+    vectors, queries = vectors[:args.vectors], vectors[args.vectors:]
+    million = 1_000_000 / len(vectors)
+
+    start = time.perf_counter()
+    expected = [top_k(vectors @ query, args.k) for query in queries]
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"{len(vectors)} x {args.dim} vectors, {len(queries)} queries, recall@{args.k}\n")
+    print(f"  {'exact float32':24s} {vectors.nbytes * million / 2**20:8.0f} MB/M vectors   "
+          f"recall 1.000   {exact_ms:7.2f} ms/query")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in QUANTIZATION_KINDS:
+            path = os.path.join(directory, f"{kind}.f32")
+            store = QuantizedVectors.build(vectors, kind, path=path)
+            resident = store.code_bytes * million / 2**20
+            settings = [(f"{kind} codes only", dict(rescore=False))] + [
+                (f"{kind} rescore x{factor:g}", dict(oversampling=factor)) for factor in args.oversampling
+            ]
+            for label, options in settings:
+                start = time.perf_counter()
+                found = [store.search(query, args.k, **options)[0] for query in queries]
+                elapsed = (time.perf_counter() - start) / len(queries) * 1000
+                print(f"  {label:24s} {resident:8.0f} MB/M vectors   "
+                      f"recall {recall_at_k(found, expected):.3f}   {elapsed:7.2f} ms/query")
+            del store
+    print(f"\n  float32 vectors kept on disk for rescoring: {vectors.nbytes * million / 2**20:.0f} MB/M vectors")
+
+
+if __name__ == '__main__':
+    main()
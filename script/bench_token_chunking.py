@@ -0,0 +1,62 @@
+"""
+Compare character chunking with token-budget chunking for an embedding model.
+
+Extracts the given PDFs, chunks them with the 1000-character word chunker
+and with TokenChunker, then measures every chunk with the model's
+tokenizer: chunk count, encoder batches, how many chunks exceed the
+encoder window (and are silently truncated) and how full the window is
+on average. Needs transformers; only the tokenizer is downloaded.
+
+Run from the repository root:
+    python -m script.bench_token_chunking --model allenai/specter
+"""
+import argparse
+import math
+import time
+
+from research_copilot.core.chunking import TokenChunker, chunk_spans
+from research_copilot.core.pdf_processing.extractor import PDFExtractor
+from script.bench_extraction import DEFAULT_PDFS
+
+
+def measure(name, chunks, tokenizer, budget, batch_size, elapsed):
+    lengths = [
+        len(ids) for ids in tokenizer(chunks, add_special_tokens=False, verbose=False)['input_ids']
+    ] if chunks else []
+    over = [length for length in lengths if length > budget]
+    lost = sum(length - budget for length in over)
+    fill = sum(min(length, budget) for length in lengths) / (budget * len(lengths)) if lengths else 0.0
+    print(f"  {name:<18} {len(chunks):6d} chunks  {math.ceil(len(chunks) / batch_size):5d} batches  "
+          f"{len(over):5d} truncated ({lost:,d} tokens lost)  window fill {fill:5.1%}  "
+          f"chunking {elapsed * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdfs', nargs='*', default=DEFAULT_PDFS)
+    parser.add_argument('--model', default='allenai/specter')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    extractor = PDFExtractor(use_cache=False)
+    texts = [extractor.extract_text_with_sections(pdf)['full_text'] for pdf in args.pdfs]
+
+    token_chunker = TokenChunker(args.model)
+    tokenizer, budget = token_chunker.tokenizer, token_chunker.max_tokens
+    print(f"{args.model}: {budget} tokens per chunk, {len(texts)} documents\n")
+
+    start = time.perf_counter()
+    char_chunks = [chunk for text in texts for chunk in chunk_spans(text, args.chunk_size)]
+    char_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    token_chunks = [chunk for spans in token_chunker.chunk_batch(texts) for chunk in spans]
+    token_time = time.perf_counter() - start
+
+    measure(f"{args.chunk_size} characters", char_chunks, tokenizer, budget, args.batch_size, char_time)
+    measure("token budget", token_chunks, tokenizer, budget, args.batch_size, token_time)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare cold-start load time and size of JSON and binary vector stores.
+
+Builds SimpleVectorStore JSON files of synthetic embeddings at each size,
+every node carrying a copy of the metadata of a node of --source (the
+app's persisted store), converts them with convert_simple_vector_store
+and times loading both: json.load of the JSON file, which is what
+SimpleVectorStore.from_persist_path spends its time on, against opening
+the memory-mapped VectorTable. The first query over each is timed too,
+since the binary file only pages its vectors in then.
+
+Run from the repository root:
+    python -m script.bench_vector_store_format --sizes 124 10000 100000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from research_copilot.core.vector_store.binary_store import VECTOR_DTYPES, VectorTable, convert_simple_vector_store
+from script.bench_quantization import synthetic_embeddings
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def write_json_store(path, count, dim, metadata):
+    vectors = synthetic_embeddings(count, dim)
+    ids = [str(uuid.UUID(int=i)) for i in range(count)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'embedding_dict': {node_id: vector for node_id, vector in zip(ids, vectors.tolist())},
+            'text_id_to_ref_doc_id': {node_id: f"doc-{i // 8}" for i, node_id in enumerate(ids)},
+            'metadata_dict': {node_id: metadata[i % len(metadata)] for i, node_id in enumerate(ids)},
+        }, f)
+    return vectors[0]
+
+
+def json_query(path, query):
+    with open(path, 'r', encoding='utf-8') as f:
+        embeddings = json.load(f)['embedding_dict']
+    matrix = np.array(list(embeddings.values()), dtype=np.float32)
+    return int(np.argmax(matrix @ query))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--source', default='data/storage/default__vector_store.json',
+                        help="SimpleVectorStore JSON file to take metadata from")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[124, 10000, 100000])
+    parser.add_argument('--dim', type=int, default=384)
+    args = parser.parse_args()
+
+    with open(args.source, 'r', encoding='utf-8') as f:
+        metadata = list(json.load(f)['metadata_dict'].values()) or [{}]
+
+    for count in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'default__vector_store.json')
+            query = write_json_store(json_path, count, args.dim, metadata)
+            _, json_load_ms = timed(lambda: json.load(open(json_path, 'r', encoding='utf-8')))
+            _, json_query_ms = timed(lambda: json_query(json_path, query))
+            print(f"{count} x {args.dim} vectors\n"
+                  f"  json      {os.path.getsize(json_path) / 2**20:8.2f} MB   load {json_load_ms:9.2f} ms   "
+                  f"load + first query {json_query_ms:9.2f} ms")
+            for dtype in VECTOR_DTYPES:
+                path = convert_simple_vector_store(json_path, dtype, os.path.join(directory, f"{dtype}.bin"))
+                table, load_ms = timed(lambda: VectorTable(path))
+                _, query_ms = timed(lambda: int(np.argmax(VectorTable(path).scores(query))))
+                print(f"  {dtype:8s}  {os.path.getsize(path) / 2**20:8.2f} MB   load {load_ms:9.2f} ms   "
+                      f"load + first query {query_ms:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
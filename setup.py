@@ -10,9 +10,11 @@ setup(
         "redis>=4.0.0",
         "psycopg2-binary>=2.9.0",
         "neo4j>=5.0.0",
-        "qdrant-client>=1.1.0",
+        "qdrant-client>=1.10.0",
+        "sqlalchemy>=1.4.0",
+        "sentence-transformers>=2.2.0",
         "pypdf2>=3.0.0",
-        "pdfplumber>=0.9.0",
+        "pdfplumber>=0.10.0",
         "python-dotenv>=0.19.0",
         "openai>=1.0.0",
         "numpy>=1.21.0",
@@ -25,6 +27,14 @@ setup(
         "gunicorn>=20.1.0",
     ],
     extras_require={
+        'fast-pdf': [
+            'pypdf>=3.0.0',
+            'pypdfium2>=4.0.0',
+        ],
+        'onnx': [
+            'onnx>=1.14.0',
+            'onnxruntime>=1.16.0',
+        ],
         'dev': [
             'pytest>=7.0.0',
             'pytest-cov>=4.0.0',
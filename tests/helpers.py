@@ -0,0 +1,186 @@
+"""
+Test doubles and fixtures shared by the test modules
+
+Synthetic PDFs, encoder, tokenizer and Qdrant stand-ins, a DataIngestion
+that records metadata rows instead of writing PostgreSQL, and helpers that
+run the staged ingest pipeline through pipeline_runner.py.
+"""
+import sys
+import json
+import os
+import re
+import subprocess
+import unittest
+import zlib
+from unittest import mock
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from research_copilot.core.vector_store.local import ExactIndex
+from research_copilot.core.vector_store.quantization import normalize_rows
+
+try:
+    from research_copilot.core.pdf_processing.data_ingestion import DataIngestion, chunk_section_text, chunk_text
+except ImportError:  # qdrant-client or sqlalchemy not installed
+    DataIngestion = None
+
+needs_ingestion = unittest.skipIf(DataIngestion is None, "qdrant-client and sqlalchemy are not installed")
+
+
+def write_synthetic_pdf(path, pages, lines_per_page=45):
+    """Write a minimal text-only PDF with the given number of pages"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page_num in range(pages):
+        body = ["BT /F1 10 Tf 12 TL 50 800 Td"]
+        if page_num % 5 == 0:
+            body.append("(RESULTS) Tj T*")
+        for line in range(lines_per_page):
+            body.append(f"(Page {page_num} line {line}: synthetic body text for memory tests.) Tj T*")
+        body.append("ET")
+        stream = "\n".join(body).encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for obj_id, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (obj_id, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+
+
+class StubEncoder:
+    """Encoder double: each text maps to a fixed unit vector seeded by its CRC"""
+
+    def __init__(self, dim=768):
+        self.dim = dim
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row] = np.random.default_rng(zlib.crc32(text.encode())).standard_normal(self.dim)
+        return normalize_rows(vectors)
+
+
+class RecordingVectorStore:
+    """Qdrant client double that keeps every upserted point"""
+
+    def __init__(self, *args, **kwargs):
+        self.points = []
+        self.deleted = []
+
+    def create_collection(self, **kwargs):
+        pass
+
+    def upsert(self, collection_name, points):
+        self.points.extend(points)
+
+    def delete(self, collection_name, points_selector):
+        self.deleted.extend(points_selector.points)
+
+
+def make_ingestion(**kwargs):
+    """DataIngestion on a StubEncoder that records metadata rows instead of writing PostgreSQL"""
+    kwargs.setdefault('embedding_model', StubEncoder())
+    with mock.patch('research_copilot.core.pdf_processing.data_ingestion.QdrantClient', RecordingVectorStore):
+        ingestion = DataIngestion('sqlite://', **kwargs)
+    ingestion.stored_metadata = []
+    ingestion._store_metadata = lambda metadata: ingestion.stored_metadata.append(dict(metadata))
+    return ingestion
+
+
+class SectionsExtractor:
+    """Extractor double yielding fixed sections from iter_sections()"""
+
+    def __init__(self, title, sections):
+        self.title = title
+        self.sections = sections
+
+    def iter_sections(self, pdf_path, metadata=None):
+        metadata.update(title=self.title, total_pages=len(self.sections),
+                        sections_found=[name for name, _ in self.sections])
+        for page, (name, text) in enumerate(self.sections):
+            yield name, text, (page, page)
+
+
+PIPELINE_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pipeline_runner.py")
+
+
+def start_pipeline(directory, env=None, **kwargs):
+    """Start `ingest` over directory/pdfs with a stub encoder and a local vector store"""
+    arguments = {
+        'paths': [os.path.join(directory, "pdfs")], 'workers': 1, 'batch_size': 1,
+        'manifest_path': os.path.join(directory, "manifest.jsonl"),
+        'storage_path': os.path.join(directory, "processed"), 'embedding_cache_dir': None,
+        'vector_store_path': os.path.join(directory, "store"), 'report_interval': 60,
+    }
+    arguments.update(kwargs)
+    return subprocess.Popen([sys.executable, PIPELINE_RUNNER, json.dumps(arguments)],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                            env=dict(os.environ, **(env or {})), start_new_session=True)
+
+
+def run_pipeline(directory, env=None, **kwargs):
+    process = start_pipeline(directory, env, **kwargs)
+    output, _ = process.communicate(timeout=300)
+    if process.returncode:
+        raise AssertionError(f"ingest exited with {process.returncode}:\n{output}")
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def stored_ids(directory):
+    """Point ids in the pipeline's local vector store, as saved on disk"""
+    index = ExactIndex(os.path.join(directory, "store", "research_papers"))
+    return {hit.id for hit in index.search(np.ones(768, dtype=np.float32), k=len(index))}
+
+
+class PoolStubEncoder:
+    """Encodes a text as (length, worker pid, OMP_NUM_THREADS the worker started with)"""
+
+    def encode(self, sentences, **kwargs):
+        with open('/proc/self/environ', 'rb') as f:
+            environ = dict(item.split(b'=', 1) for item in f.read().split(b'\0') if b'=' in item)
+        threads = float(environ.get(b'OMP_NUM_THREADS', b'0'))
+        return np.array([[len(s), os.getpid(), threads] for s in sentences], dtype=np.float64)
+
+
+def load_pool_stub_encoder(model_name, backend, **kwargs):
+    return PoolStubEncoder()
+
+
+class PieceTokenizer:
+    """Fast-tokenizer stand-in splitting words into 3-character pieces and punctuation"""
+
+    is_fast = True
+    model_max_length = 18
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, texts, **kwargs):
+        return {'offset_mapping': [
+            [(m.start() + i, min(m.start() + i + 3, m.end()))
+             for m in re.finditer(r'\w+|[^\w\s]', text) for i in range(0, len(m.group()), 3)]
+            for text in texts
+        ]}
@@ -0,0 +1,58 @@
+"""
+Run the staged ingest pipeline with test doubles, for test_cli.py
+
+The pipeline spawns its stages, and a spawned process runs the top level
+of its parent's main module, so the doubles installed below reach every
+stage: a deterministic stub encoder in place of load_encoder, and no
+metadata rows since there is no PostgreSQL server. The only argument is
+a JSON object of ingest() keyword arguments; the summary is printed as
+JSON on the last line.
+
+The encoder blocks forever on texts containing $PIPELINE_STUB_HANG and
+raises on texts containing $PIPELINE_STUB_FAIL, to stop or fail a run.
+"""
+import json
+import os
+import sys
+import time
+import zlib
+
+os.environ.setdefault('POSTGRES_URI', 'sqlite://')
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from research_copilot.cli import ingest
+from research_copilot.core.embeddings import onnx_backend
+from research_copilot.core.pdf_processing.data_ingestion import DataIngestion
+from research_copilot.core.vector_store.quantization import normalize_rows
+
+
+class PipelineStubEncoder:
+    """Unit vectors seeded by each text's CRC, as SPECTER-sized rows"""
+
+    def encode(self, texts, **kwargs):
+        for marker, action in (('PIPELINE_STUB_HANG', 'hang'), ('PIPELINE_STUB_FAIL', 'fail')):
+            value = os.environ.get(marker)
+            if value and any(value in text for text in texts):
+                if action == 'fail':
+                    raise RuntimeError("stub encoder failure")
+                while True:
+                    time.sleep(60)
+        return normalize_rows(np.stack([
+            np.random.default_rng(zlib.crc32(text.encode('utf-8'))).standard_normal(768)
+            for text in texts
+        ]).astype(np.float32))
+
+
+def load_stub_encoder(model_name, backend="torch", **kwargs):
+    return PipelineStubEncoder()
+
+
+onnx_backend.load_encoder = load_stub_encoder
+DataIngestion._store_metadata = lambda self, metadata: None
+
+
+if __name__ == '__main__':
+    summary = ingest(**json.loads(sys.argv[1]))
+    print(json.dumps(summary))
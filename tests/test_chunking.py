@@ -0,0 +1,88 @@
+import sys
+import os
+import re
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from research_copilot.core.chunking import TokenChunker, chunk_sections, chunk_spans, token_chunk_spans
+from helpers import PieceTokenizer
+
+
+class TestChunking(unittest.TestCase):
+    def test_chunk_spans(self):
+        text = "Attention  is all\nyou need. " * 50 + "x" * 80
+
+        words = chunk_spans(text, size=60)
+        self.assertTrue(all(length <= 60 for length in words.lengths[:-1]))
+        self.assertEqual(" ".join(words).split(), text.split())
+        self.assertEqual(words[-1], "x" * 80)  # longer words get their own chunk
+        self.assertEqual(words[0], text[:words.ends[0]])
+
+        overlapping = chunk_spans(text, size=60, overlap=20)
+        self.assertGreater(len(overlapping), len(words))
+        self.assertTrue((overlapping.starts[1:-1] < overlapping.ends[:-2]).all())
+
+        # Character windows match the slicing loops they replaced
+        windows = chunk_spans(text, size=100, overlap=30, min_length=50, unit="char")
+        expected = [text[i:i + 100] for i in range(0, len(text), 70) if len(text[i:i + 100]) >= 50]
+        self.assertEqual(windows.texts(), expected)
+        self.assertEqual(len(chunk_spans("", size=100)), 0)
+
+    def test_chunk_sections_respects_boundaries(self):
+        sections = {
+            "introduction": "word " * 30,
+            "methods": "step " * 22,
+            "references": "[1] A. Author. " * 20,
+        }
+
+        chunked = chunk_sections(sections, size=50)
+        self.assertEqual([name for name, _ in chunked], ["introduction", "methods"])
+        for name, spans in chunked:
+            # Every chunk lies inside its own section's text
+            self.assertIs(spans.text, sections[name])
+        self.assertEqual(len(chunked[1][1]), 3)
+
+        # The 9-character tail of methods would overflow the chunk before
+        # it, so the two share their words evenly instead
+        folded = dict(chunk_sections(sections, size=50, min_tail=20, skip_sections=()))
+        self.assertEqual(folded["methods"].lengths.tolist(), [49, 29, 29])
+        self.assertEqual(" ".join(folded["methods"]).split(), sections["methods"].split())
+        self.assertIn("references", folded)
+
+        # A tail inside the previous chunk's overlap is merged into it
+        (_, merged), = chunk_sections({"methods": "x" * 88}, size=50, overlap=10, unit="char", min_tail=20)
+        self.assertEqual(list(merged.spans()), [(0, 50), (40, 88)])
+
+    def test_token_chunk_spans_fill_budget(self):
+        text = "graph neural networks leak training data"
+        # Word-level offsets as a fast tokenizer would report them, plus a
+        # special token with an empty (0, 0) offset
+        offsets = [(0, 0)] + [(m.start(), m.end()) for m in re.finditer(r'\S+', text)]
+
+        chunks = token_chunk_spans(text, offsets, max_tokens=4)
+        self.assertEqual(chunks.texts(), ["graph neural networks leak", "training data"])
+
+        overlapping = token_chunk_spans(text, offsets, max_tokens=4, overlap=2)
+        self.assertEqual(overlapping.texts(), ["graph neural networks leak", "networks leak training data"])
+        self.assertEqual(len(token_chunk_spans("", [], max_tokens=4)), 0)
+
+    def test_token_chunks_retokenize_within_budget(self):
+        tokenizer = PieceTokenizer()
+        text = ("Representation learning, with transformers and convolutional architectures, "
+                "memorizes rare sequences. ") * 12
+        for overlap in (0, 5):
+            chunker = TokenChunker(tokenizer, overlap=overlap)
+            self.assertEqual(chunker.max_tokens, 16)
+            chunks = chunker.chunk(text)
+            self.assertGreater(len(chunks), 1)
+            for start, chunk in zip(chunks.starts, chunks.texts()):
+                # Windows start on a word, so a chunk re-tokenizes to the tokens it was cut from
+                self.assertTrue(start == 0 or text[start - 1].isspace())
+                self.assertLessEqual(len(tokenizer([chunk])['offset_mapping'][0]), chunker.max_tokens)
+            if not overlap:
+                self.assertEqual(" ".join(chunks.texts()).split(), text.split())
+
+
+if __name__ == '__main__':
+    unittest.main()
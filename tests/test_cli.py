@@ -0,0 +1,203 @@
+import sys
+import os
+import shutil
+import signal
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from research_copilot.core.embeddings.dedupe import NearDuplicateIndex
+from research_copilot.core.pdf_processing.manifest import IngestManifest
+from helpers import write_synthetic_pdf, start_pipeline, run_pipeline, stored_ids, needs_ingestion
+
+
+class TestIngest(unittest.TestCase):
+    def test_manifest_skips_unchanged_files(self):
+        with tempfile.TemporaryDirectory() as storage_path:
+            pdf_path = os.path.join(storage_path, "synthetic.pdf")
+            manifest_path = os.path.join(storage_path, "manifest.jsonl")
+            write_synthetic_pdf(pdf_path, 2)
+
+            manifest = IngestManifest(manifest_path)
+            self.assertFalse(manifest.is_done(pdf_path))
+            manifest.mark_done(pdf_path, paper_id="abc", chunks=3)
+
+            # A new run reads the completed files back from disk
+            resumed = IngestManifest(manifest_path)
+            self.assertTrue(resumed.is_done(pdf_path))
+            self.assertEqual(resumed.get(pdf_path)["paper_id"], "abc")
+
+            write_synthetic_pdf(pdf_path, 3)
+            self.assertFalse(resumed.is_done(pdf_path))
+
+    def test_manifest_plan_uses_content_hash(self):
+        with tempfile.TemporaryDirectory() as storage_path:
+            manifest_path = os.path.join(storage_path, "manifest.jsonl")
+            paths = [os.path.join(storage_path, f"paper{i}.pdf") for i in range(3)]
+            for path in paths:
+                write_synthetic_pdf(path, 2)
+            manifest = IngestManifest(manifest_path)
+            for path in paths:
+                manifest.mark_done(path, chunk_ids=[f"{os.path.basename(path)}_0"])
+
+            # Touched but identical, rewritten with new content, deleted
+            os.utime(paths[0], (0, 0))
+            write_synthetic_pdf(paths[1], 3)
+            os.remove(paths[2])
+            new_path = os.path.join(storage_path, "paper3.pdf")
+            write_synthetic_pdf(new_path, 2)
+
+            plan = IngestManifest(manifest_path).plan(paths[:2] + [new_path])
+            self.assertEqual(plan, {
+                'new': [new_path], 'changed': [paths[1]],
+                'unchanged': [paths[0]], 'removed': [paths[2]]
+            })
+
+            # The touched file's new stat was recorded, so no rehash next time
+            manifest = IngestManifest(manifest_path)
+            with mock.patch.object(IngestManifest, 'file_hash') as file_hash:
+                self.assertTrue(manifest.is_done(paths[0]))
+            file_hash.assert_not_called()
+
+            manifest.mark_removed(paths[2])
+            manifest.compact()
+            self.assertIsNone(IngestManifest(manifest_path).get(paths[2]))
+
+    def test_removed_file_readmits_its_near_duplicates(self):
+        from research_copilot.cli import _forget_near_duplicate_sources
+
+        shared = "licensed under a creative commons attribution license " * 3
+        texts = {"a.pdf": [shared, "alpha " * 40], "b.pdf": [shared], "c.pdf": ["gamma " * 40]}
+        with tempfile.TemporaryDirectory() as directory:
+            dedupe_path = os.path.join(directory, "dedupe")
+            manifest = IngestManifest(os.path.join(directory, "manifest.jsonl"))
+            index = NearDuplicateIndex(dedupe_path)
+            paths = {}
+            for name, chunks in texts.items():
+                paths[name] = os.path.join(directory, name)
+                with open(paths[name], "w") as f:
+                    f.write(" ".join(chunks))
+                entry = manifest.mark_done(paths[name])
+                index.filter(entry["sha256"], chunks)
+            index.save()
+            sources = {name: manifest.get(path)["sha256"] for name, path in paths.items()}
+            self.assertEqual(NearDuplicateIndex(dedupe_path).dependents(sources["a.pdf"]), [sources["b.pdf"]])
+
+            # a.pdf is removed: b.pdf's only chunk was dropped against it, c.pdf is unaffected
+            readmit = _forget_near_duplicate_sources(manifest, [paths["a.pdf"]], [paths["b.pdf"], paths["c.pdf"]],
+                                                     dedupe_path)
+            self.assertEqual(readmit, [paths["b.pdf"]])
+            index = NearDuplicateIndex(dedupe_path)
+            self.assertEqual(len(index), 1)
+            # Re-ingesting b.pdf keeps its chunk now
+            self.assertEqual(index.filter(sources["b.pdf"], texts["b.pdf"]), [0])
+
+            # A file recorded as deduplicated against a source the index never got
+            # (its store failed or the run was killed) is ingested again too
+            manifest.mark_done(paths["c.pdf"], near_duplicate_of=["never-stored"])
+            self.assertEqual(_forget_near_duplicate_sources(manifest, [], [paths["c.pdf"]], dedupe_path),
+                             [paths["c.pdf"]])
+
+    @needs_ingestion
+    def test_ingest_pipeline_stores_resumes_and_reports_failures(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.makedirs(os.path.join(directory, "pdfs"))
+            pdf_path = os.path.join(directory, "pdfs", "word2vec.pdf")
+            shutil.copy("../data/uploads/1301.3781v3.pdf", pdf_path)
+            manifest_path = os.path.join(directory, "manifest.jsonl")
+
+            # A failing embed stage reports the file, which is not recorded
+            summary = run_pipeline(directory, env={'PIPELINE_STUB_FAIL': "the"})
+            self.assertEqual((summary['found'], summary['stored'], summary['failed']), (1, 0, 1))
+            self.assertIsNone(IngestManifest(manifest_path).get(pdf_path))
+            self.assertEqual(stored_ids(directory), set())
+
+            # So the next run retries it, through every stage
+            summary = run_pipeline(directory)
+            self.assertEqual((summary['stored'], summary['failed'], summary['skipped']), (1, 0, 0))
+            entry = IngestManifest(manifest_path).get(pdf_path)
+            self.assertEqual(entry['sha256'], IngestManifest.file_hash(pdf_path))
+            self.assertGreater(entry['chunks'], 10)
+            self.assertEqual(stored_ids(directory), set(entry['chunk_ids']))
+
+            # An unchanged file is skipped on resume
+            summary = run_pipeline(directory)
+            self.assertEqual((summary['found'], summary['skipped'], summary['stored']), (1, 1, 0))
+            self.assertEqual(IngestManifest(manifest_path).get(pdf_path)['chunk_ids'], entry['chunk_ids'])
+            self.assertEqual(stored_ids(directory), set(entry['chunk_ids']))
+
+    @needs_ingestion
+    def test_ingest_records_near_duplicates_only_once_stored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pdfs = os.path.join(directory, "pdfs")
+            os.makedirs(pdfs)
+            first, second = os.path.join(pdfs, "a.pdf"), os.path.join(pdfs, "b.pdf")
+            shutil.copy("../data/uploads/1301.3781v3.pdf", first)
+            # Same text, different bytes: a separate source whose chunks all duplicate a.pdf's
+            shutil.copy(first, second)
+            with open(second, "ab") as f:
+                f.write(b"\n% copy\n")
+            dedupe_path = os.path.join(directory, "dedupe")
+
+            # a.pdf fails, so b.pdf is not deduplicated against it and fails too
+            summary = run_pipeline(directory, env={'PIPELINE_STUB_FAIL': "the"}, dedupe_index_path=dedupe_path)
+            self.assertEqual((summary['stored'], summary['failed']), (0, 2))
+            self.assertEqual(len(NearDuplicateIndex(dedupe_path)), 0)
+
+            summary = run_pipeline(directory, dedupe_index_path=dedupe_path)
+            self.assertEqual((summary['stored'], summary['failed']), (2, 0))
+            manifest = IngestManifest(os.path.join(directory, "manifest.jsonl"))
+            self.assertEqual(manifest.get(second)['chunks'], 0)
+            self.assertEqual(manifest.get(second)['near_duplicate_of'], [manifest.get(first)['sha256']])
+            self.assertEqual(len(NearDuplicateIndex(dedupe_path)), manifest.get(first)['chunks'])
+            self.assertEqual(stored_ids(directory), set(manifest.get(first)['chunk_ids']))
+
+            # Once a.pdf is gone b.pdf's text has to be stored under b.pdf
+            os.remove(first)
+            summary = run_pipeline(directory, dedupe_index_path=dedupe_path)
+            self.assertEqual((summary['removed'], summary['stored']), (1, 1))
+            entry = IngestManifest(os.path.join(directory, "manifest.jsonl")).get(second)
+            self.assertGreater(entry['chunks'], 10)
+            self.assertEqual(stored_ids(directory), set(entry['chunk_ids']))
+
+    @needs_ingestion
+    def test_killed_ingest_keeps_vectors_of_files_marked_done(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pdfs = os.path.join(directory, "pdfs")
+            os.makedirs(pdfs)
+            first = os.path.join(pdfs, "a_word2vec.pdf")
+            second = os.path.join(pdfs, "b_synthetic.pdf")
+            shutil.copy("../data/uploads/1301.3781v3.pdf", first)
+            write_synthetic_pdf(second, pages=2)
+
+            # The encoder blocks on the second file, so the run is killed
+            # after the first has been recorded but before the store closes
+            process = start_pipeline(directory, env={'PIPELINE_STUB_HANG': "for memory tests"})
+            manifest_path = os.path.join(directory, "manifest.jsonl")
+            deadline = time.monotonic() + 120
+            try:
+                while IngestManifest(manifest_path).get(first) is None:
+                    self.assertIsNone(process.poll(), process.stdout.read() if process.poll() is not None else "")
+                    self.assertLess(time.monotonic(), deadline, "first file was never marked done")
+                    time.sleep(0.2)
+            finally:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.communicate()
+
+            # Everything the manifest claims is in the saved store
+            entry = IngestManifest(manifest_path).get(first)
+            self.assertGreater(entry['chunks'], 0)
+            self.assertEqual(stored_ids(directory), set(entry['chunk_ids']))
+
+            summary = run_pipeline(directory)
+            self.assertEqual((summary['skipped'], summary['stored'], summary['failed']), (1, 1, 0))
+            manifest = IngestManifest(manifest_path)
+            self.assertEqual(stored_ids(directory),
+                             set(manifest.get(first)['chunk_ids']) | set(manifest.get(second)['chunk_ids']))
+
+
+if __name__ == '__main__':
+    unittest.main()
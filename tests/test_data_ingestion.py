@@ -0,0 +1,130 @@
+import sys
+import os
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from research_copilot.core.chunking import UNKNOWN_SECTION
+from research_copilot.core.vector_store.projection import Projection
+from helpers import (
+    DataIngestion, SectionsExtractor, StubEncoder, chunk_section_text, chunk_text, make_ingestion, needs_ingestion,
+    write_synthetic_pdf
+)
+
+
+class TestDataIngestion(unittest.TestCase):
+    @needs_ingestion
+    def test_ingestion_batch_search_matches_single_search(self):
+        texts = [f"chunk {i} about topic {i % 13}" for i in range(300)]
+        queries = [f"topic {i}" for i in range(20)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            projection_path = os.path.join(directory, "projection.npz")
+            Projection.fit(StubEncoder().encode(texts), 32).save(projection_path)
+            for index_kind in ('qdrant', 'exact', 'hnsw'):
+                with self.subTest(index_kind=index_kind):
+                    options = dict(vector_quantization='int8', projection_path=projection_path, hnsw_ef=64)
+                    if index_kind == 'qdrant':
+                        # The Qdrant client's local mode, with its query API
+                        from qdrant_client import QdrantClient
+                        with mock.patch('research_copilot.core.pdf_processing.data_ingestion.QdrantClient',
+                                        lambda **kwargs: QdrantClient(':memory:')):
+                            ingestion = DataIngestion('sqlite://', embedding_model=StubEncoder(), **options)
+                        ingestion._store_metadata = lambda metadata: None
+                    else:
+                        ingestion = make_ingestion(vector_store_path=os.path.join(directory, index_kind),
+                                                   vector_store_index=index_kind, **options)
+                    ingestion.store_paper({'metadata': {'title': 'Parity', 'content_hash': 'c' * 64}},
+                                          chunks=texts)
+                    self.assertIsNotNone(ingestion._search_params().quantization)
+                    single = [ingestion.search_similar(query, limit=7) for query in queries]
+                    batched = ingestion.search_similar_batch(queries, limit=7)
+                    self.assertEqual(len(single[0]), 7)
+                    # Same hits in the same order; scores up to float32 rounding of the batched product
+                    self.assertEqual([[(hit['text'], hit['metadata']) for hit in hits] for hits in batched],
+                                     [[(hit['text'], hit['metadata']) for hit in hits] for hits in single])
+                    np.testing.assert_allclose([[hit['similarity_score'] for hit in hits] for hits in batched],
+                                               [[hit['similarity_score'] for hit in hits] for hits in single],
+                                               atol=1e-5)
+
+    @needs_ingestion
+    def test_store_pdf_passes_sections_through_to_storage(self):
+        words = lambda prefix, count: " ".join(f"{prefix}{i}" for i in range(count))
+        sections = [("introduction", words("intro", 300)), ("methods", words("method", 40)),
+                    ("references", words("ref", 20))]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        pdf_path = os.path.join(directory.name, "paper.pdf")
+        write_synthetic_pdf(pdf_path, pages=1)
+        ingestion = make_ingestion()
+        paper_id = ingestion.store_pdf(pdf_path, SectionsExtractor("A Paper", sections))
+
+        expected = [(name, chunk) for name, text in sections for chunk in chunk_text(text)]
+        points = ingestion.vector_db.points
+        self.assertGreater(len(expected), len(sections))  # the long section was split
+        self.assertEqual([(p.payload['section'], p.payload['text']) for p in points], expected)
+        self.assertEqual([p.payload['chunk_index'] for p in points], list(range(len(expected))))
+        self.assertEqual({p.payload['paper_id'] for p in points}, {paper_id})
+        self.assertEqual({p.payload['metadata']['title'] for p in points}, {"A Paper"})
+        np.testing.assert_allclose([p.vector for p in points],
+                                   StubEncoder().encode([chunk for _, chunk in expected]), atol=1e-6)
+        # One encode call per section, as each section closes
+        self.assertEqual(len(ingestion.embedding_model.calls), len(sections))
+
+        metadata, = ingestion.stored_metadata
+        self.assertEqual((metadata['paper_id'], metadata['filename'], metadata['total_pages']),
+                         (paper_id, "paper.pdf", 3))
+
+        # Section mode leaves out the reference list
+        ingestion = make_ingestion(chunk_by_section=True)
+        ingestion.store_pdf(pdf_path, SectionsExtractor("A Paper", sections))
+        self.assertNotIn("references", {p.payload['section'] for p in ingestion.vector_db.points})
+
+    @needs_ingestion
+    def test_chunk_ids_are_uuids_unique_per_file(self):
+        ingestion = make_ingestion()
+        words = " ".join(f"word{i}" for i in range(400))
+        # Two files whose extracted title is empty
+        for content_hash in ("a" * 64, "b" * 64):
+            ingestion.store_paper({'metadata': {'title': '', 'content_hash': content_hash}, 'full_text': words})
+
+        ids = [point.id for point in ingestion.vector_db.points]
+        self.assertGreater(len(ids), 2)
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(len({point.payload['paper_id'] for point in ingestion.vector_db.points}), 2)
+        for point_id in ids:
+            self.assertEqual(str(uuid.UUID(point_id)), point_id)
+        # Ids are reproducible from the content hash, as the manifest records them
+        self.assertEqual(ids[:len(ids) // 2], ingestion.chunk_ids("a" * 64, len(ids) // 2))
+
+    @needs_ingestion
+    def test_store_paper_section_payloads(self):
+        words = lambda prefix, count: " ".join(f"{prefix}{i}" for i in range(count))
+        paper = {
+            'metadata': {'title': 'Sections', 'content_hash': 'c' * 64},
+            'sections': {'abstract': words("abs", 50), 'results': words("res", 400),
+                         'references': words("ref", 200)},
+        }
+        paper['full_text'] = "\n".join(paper['sections'].values())
+
+        ingestion = make_ingestion(chunk_by_section=True)
+        ingestion.store_paper(paper)
+        expected = [(name, chunk) for name, text in paper['sections'].items() if name != 'references'
+                    for chunk in chunk_section_text({name: text})[0]]
+        self.assertEqual([(p.payload['section'], p.payload['text']) for p in ingestion.vector_db.points], expected)
+        self.assertTrue(any(name == 'results' for name, _ in expected[1:]))
+
+        # Unsectioned chunks still carry a section field, and nothing is skipped
+        ingestion = make_ingestion()
+        ingestion.store_paper(paper)
+        points = ingestion.vector_db.points
+        self.assertEqual({p.payload['section'] for p in points}, {UNKNOWN_SECTION})
+        self.assertIn("ref199", points[-1].payload['text'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import sys
+import os
+import tempfile
+import unittest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from research_copilot.core.embeddings.batcher import EmbeddingBatcher
+from research_copilot.core.embeddings.cache import EmbeddingCache
+from research_copilot.core.embeddings.dedupe import NearDuplicateIndex
+from research_copilot.core.embeddings.onnx_backend import cosine_parity, pool_token_embeddings
+from research_copilot.core.embeddings.pool import EncodingPool
+from helpers import load_pool_stub_encoder
+
+
+class TestEmbeddings(unittest.TestCase):
+    @unittest.skipUnless(os.path.exists('/proc/self/environ'), "needs /proc")
+    def test_encoding_pool_preserves_order_and_stops_workers(self):
+        sentences = [f"sentence {'x' * ((i * 7) % 23)}" for i in range(40)]
+        omp_before = os.environ.get('OMP_NUM_THREADS')
+        pool = EncodingPool("stub-model", workers=2, threads_per_worker=1, shard_size=3, pin_cores=False,
+                            encoder_factory=load_pool_stub_encoder)
+        with pool:
+            vectors = pool.encode(sentences)
+            # Rows come back in input order although shards are length-sorted
+            np.testing.assert_array_equal(vectors[:, 0], [len(s) for s in sentences])
+            self.assertEqual(pool.encode("one")[0], 3)
+            # Workers started with the thread variables; the parent's are untouched
+            np.testing.assert_array_equal(vectors[:, 2], 1)
+            self.assertEqual(os.environ.get('OMP_NUM_THREADS'), omp_before)
+            pids = {int(pid) for pid in vectors[:, 1]}
+            self.assertNotIn(os.getpid(), pids)
+            self.assertLessEqual(len(pids), 2)
+
+        for pid in pids:
+            with self.assertRaises(ProcessLookupError):
+                os.kill(pid, 0)
+        with self.assertRaises(RuntimeError):
+            pool.encode(sentences)
+
+    def test_embedding_cache_encodes_only_misses(self):
+        class CountingModel:
+            def __init__(self):
+                self.encoded = []
+
+            def encode(self, texts, **kwargs):
+                self.encoded.extend(texts)
+                return np.array([[len(t), t.count('a')] for t in texts], dtype=np.float32)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            model = CountingModel()
+            cache = EmbeddingCache(cache_dir, "test-model")
+            first = cache.encode(model, ["a cat", "a  cat", "dog"])
+            self.assertEqual(model.encoded, ["a cat", "dog"])  # whitespace-normalized duplicate
+            np.testing.assert_array_equal(first[0], first[1])
+
+            # A new process maps the stored vectors and only encodes the new chunk
+            cache = EmbeddingCache(cache_dir, "test-model")
+            second = cache.encode(model, ["dog", "a cat", "bird"])
+            self.assertEqual(model.encoded, ["a cat", "dog", "bird"])
+            np.testing.assert_array_equal(second[:2], first[[2, 0]])
+            self.assertAlmostEqual(cache.stats()["hit_ratio"], 2 / 3)
+
+            # Another model revision never sees these vectors
+            self.assertEqual(len(EmbeddingCache(cache_dir, "test-model", revision="v2")), 0)
+
+            # Evicting down to the budget keeps the most recently used rows
+            row_bytes = cache.size_bytes // len(cache)
+            small = EmbeddingCache(cache_dir, "test-model", max_bytes=3 * row_bytes)
+            small.get_many(["dog"])
+            small.encode(model, ["fish"])
+            self.assertEqual(len(small), 2)
+            self.assertEqual(small.get_many(["dog", "fish", "a cat"])[1], [2])
+
+    def test_batcher_routes_vectors_across_papers(self):
+        batches = []
+
+        def encode(texts):
+            batches.append([len(t) for t in texts])
+            return np.array([[len(t)] for t in texts], dtype=np.float32)
+
+        papers = {"short": ["ab", "abcdef"], "empty": [], "long": ["a" * n for n in range(1, 10)]}
+        batcher = EmbeddingBatcher(encode, batch_size=4, window=8)
+        completed = []
+        for key, chunks in papers.items():
+            completed += batcher.add(key, chunks)
+        completed += batcher.flush()
+
+        self.assertEqual([key for key, _ in completed], ["short", "empty", "long"])
+        for key, vectors in completed:
+            self.assertEqual(vectors[:, 0].tolist() if len(vectors) else [], [len(c) for c in papers[key]])
+        # Full, length-sorted batches mixing chunks of different papers
+        self.assertEqual(batches, [[1, 2, 2, 3], [4, 5, 6, 6], [7, 8, 9]])
+
+    def test_onnx_pooling_matches_sentence_transformers(self):
+        # Two sequences padded to 3 tokens; padding must not affect mean or max
+        tokens = np.array([[[1., 2.], [3., 4.], [9., 9.]],
+                           [[5., 0.], [-1., 2.], [0., 8.]]], dtype=np.float32)
+        mask = np.array([[1, 1, 0], [1, 1, 1]])
+        np.testing.assert_allclose(pool_token_embeddings(tokens, mask, "mean"), [[2., 3.], [4 / 3, 10 / 3]])
+        np.testing.assert_allclose(pool_token_embeddings(tokens, mask, "max"), [[3., 4.], [5., 8.]])
+        np.testing.assert_allclose(pool_token_embeddings(tokens, mask, "cls"), [[1., 2.], [5., 0.]])
+        with self.assertRaises(ValueError):
+            pool_token_embeddings(tokens, mask, "weightedmean")
+
+        parity = cosine_parity([[1., 0.], [0., 2.]], [[2., 0.], [1., 1.]])
+        self.assertAlmostEqual(parity["min"], np.sqrt(0.5))
+        self.assertAlmostEqual(parity["mean"], (1 + np.sqrt(0.5)) / 2)
+
+    def test_near_duplicate_index_skips_repeats(self):
+        rng = np.random.default_rng(0)
+        vocabulary = [f"w{i}" for i in range(3000)]
+        chunk = lambda: ' '.join(rng.choice(vocabulary, 150))
+        boilerplate = "licensed under a creative commons attribution license " * 3
+        first = [boilerplate, chunk(), chunk()]
+        # Second version: one word changed in each chunk, spacing/case noise
+        second = [boilerplate.upper(), first[1].replace(first[1].split()[70], "revised", 1),
+                  "  ".join(first[2].split()), chunk()]
+
+        with tempfile.TemporaryDirectory() as directory:
+            index = NearDuplicateIndex(directory)
+            self.assertEqual(index.filter("v1", first), [0, 1, 2])
+            index.save()
+
+            # A new process finds duplicates across sources without pairwise comparison
+            index = NearDuplicateIndex(directory)
+            self.assertEqual(index.filter("v2", second), [3])
+            self.assertEqual(index.stats()["duplicates"], 3)
+            # v2's dropped chunks live on only in v1's rows
+            self.assertEqual(index.dependents("v1"), ["v2"])
+            index.save()
+            self.assertEqual(NearDuplicateIndex(directory).dependents("v1"), ["v2"])
+
+            # Removing a source un-indexes its chunks, e.g. before re-ingesting it
+            self.assertEqual(index.remove_source("v1"), 3)
+            self.assertEqual(index.dependents("v1"), ["v2"])
+            index.save()
+            self.assertEqual(NearDuplicateIndex(directory).filter("v1", first), [0, 1, 2])
+            index.remove_source("v2")
+            self.assertEqual(index.dependents("v1"), [])
+
+            # Signatures filtered in one process are recorded in another once stored
+            index.save()
+            scratch = NearDuplicateIndex(directory)
+            self.assertEqual((scratch.filter("v3", first), scratch.filter("v4", second)), ([0, 1, 2], [3]))
+            self.assertEqual(scratch.depends_on("v4"), ["v3"])
+            self.assertNotIn("v3", index)
+            for source in ("v3", "v4"):
+                index.add_source(source, scratch.source_signatures(source), scratch.depends_on(source))
+            self.assertEqual((len(index), index.dependents("v3")), (4, ["v4"]))
+            index.save()
+            reloaded = NearDuplicateIndex(directory)
+            self.assertIn("v4", reloaded)
+            self.assertEqual(reloaded.dependents("v3"), ["v4"])
+            self.assertEqual(reloaded.filter("v5", second), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,21 @@
 import sys
 import os
+import multiprocessing
+import tempfile
+import time
 import unittest
+from unittest import mock
 from typing import Any, Dict
 import pdfplumber
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from research_copilot.core.pdf_processing.backends import BACKENDS, PdfPlumberDocument, open_pdf
+from research_copilot.core.pdf_processing.cache import ExtractionCache
 from research_copilot.core.pdf_processing.extractor import PDFExtractor
+from research_copilot.core.pdf_processing.headers import SectionHeaderMatcher
+from research_copilot.core.pdf_processing.memory import current_rss_mb
+from helpers import write_synthetic_pdf
 
 
 class TestPDFExtractor(unittest.TestCase):
@@ -36,6 +45,233 @@ class TestPDFExtractor(unittest.TestCase):
             self.assertGreater(results['metadata']['total_pages'], 0)
             self.assertTrue(results['metadata']['sections_found'])
 
+    def test_parallel_matches_serial(self):
+        extractor = PDFExtractor()
+
+        pdf_path = "../data/uploads/1301.3781v3.pdf"
+        if not os.path.exists(pdf_path):
+            self.fail(f"Please place a test PDF at {pdf_path}")
+
+        serial = extractor.extract_text_with_sections(pdf_path, workers=1, use_cache=False)
+        parallel = extractor.extract_text_with_sections(pdf_path, workers=2, use_cache=False)
+
+        self.assertNotIn('error', serial["metadata"])
+        self.assertEqual(serial, parallel)
+
+    def test_iter_sections_streams_same_content(self):
+        extractor = PDFExtractor()
+
+        pdf_path = "../data/uploads/1301.3781v3.pdf"
+        if not os.path.exists(pdf_path):
+            self.fail(f"Please place a test PDF at {pdf_path}")
+
+        results = extractor.extract_text_with_sections(pdf_path, use_cache=False)
+        metadata: Dict[str, Any] = {}
+        streamed = list(extractor.iter_sections(pdf_path, metadata=metadata))
+
+        self.assertEqual(metadata, results["metadata"])
+        self.assertEqual('\n'.join(text for _, text, _ in streamed), results["full_text"])
+        for name, text, (first_page, last_page) in streamed:
+            self.assertLessEqual(first_page, last_page)
+            self.assertLess(last_page, metadata["total_pages"])
+
+    def test_repeated_header_continues_its_section(self):
+        extractor = PDFExtractor()
+        with tempfile.TemporaryDirectory() as directory:
+            # RESULTS heads pages 0 and 5
+            pdf_path = os.path.join(directory, "repeated.pdf")
+            write_synthetic_pdf(pdf_path, pages=10, lines_per_page=3)
+            streamed = [name for name, _, _ in extractor.iter_sections(pdf_path)]
+            results = extractor.extract_text_with_sections(pdf_path, use_cache=False)
+
+        self.assertEqual(streamed, ["results", "results"])
+        self.assertEqual(results["metadata"]["sections_found"], ["results"])
+        # Both runs are kept, not just the one after the second header
+        self.assertEqual(results["sections"], {"results": results["full_text"]})
+        self.assertIn("Page 0 line 0:", results["sections"]["results"])
+        self.assertIn("Page 9 line 2:", results["sections"]["results"])
+
+    def test_cache_hit_skips_pdf_parsing(self):
+        pdf_path = "../data/uploads/1301.3781v3.pdf"
+        if not os.path.exists(pdf_path):
+            self.fail(f"Please place a test PDF at {pdf_path}")
+
+        with tempfile.TemporaryDirectory() as storage_path:
+            extractor = PDFExtractor(storage_path=storage_path)
+            first = extractor.extract_text_with_sections(pdf_path)
+
+            with mock.patch('pdfplumber.open', side_effect=AssertionError("PDF was opened")):
+                second = extractor.extract_text_with_sections(pdf_path)
+
+            self.assertEqual(first, second)
+            self.assertEqual(extractor.cache.stats()['hits'], 1)
+            self.assertEqual(extractor.cache.stats()['misses'], 1)
+
+            # Changing the section patterns must not reuse the old entry
+            extractor.section_patterns = extractor.section_patterns[:-1]
+            extractor.extract_text_with_sections(pdf_path)
+            self.assertEqual(extractor.cache.stats()['misses'], 2)
+
+    def test_cache_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ExtractionCache(cache_dir, max_bytes=250)
+            payload = {"full_text": "x" * 100}
+            cache.put("a", payload)
+            cache.put("b", payload)
+            os.utime(os.path.join(cache_dir, "a.json"), (0, 0))
+            os.utime(os.path.join(cache_dir, "b.json"), (1, 1))
+            self.assertEqual(cache.get("a"), payload)
+
+            cache.put("c", payload)
+
+            self.assertIsNotNone(cache.get("a"))
+            self.assertIsNone(cache.get("b"))
+            self.assertEqual(cache.evictions, 1)
+
+    def test_header_matcher_classification(self):
+        matcher = SectionHeaderMatcher()
+        self.assertEqual(matcher.classify("2. Materials and Methods"), "methods")
+        self.assertEqual(matcher.classify("  CONCLUSIONS  "), "conclusion")
+        self.assertEqual(matcher.classify("RELATED WORK"), "related work")
+        self.assertIsNone(matcher.classify("Results are shown in Table 2."))
+        self.assertIsNone(matcher.classify("3.1 Training (ours)"))
+        self.assertIsNone(matcher.classify("   "))
+
+    def test_backends_agree_on_page_count(self):
+        pdf_path = "../data/uploads/1301.3781v3.pdf"
+        if not os.path.exists(pdf_path):
+            self.fail(f"Please place a test PDF at {pdf_path}")
+
+        extractor = PDFExtractor(use_cache=False)
+        for backend in BACKENDS:
+            try:
+                open_pdf(pdf_path, backend).close()
+            except ImportError:
+                # Backend libraries are optional
+                continue
+            with self.subTest(backend=backend):
+                results = extractor.extract_text_with_sections(pdf_path, backend=backend)
+                self.assertNotIn('error', results["metadata"])
+                self.assertEqual(results['metadata']['total_pages'], 12)
+                self.assertIn('Word Representations', results['metadata']['title'])
+
+        with self.assertRaises(ValueError):
+            open_pdf(pdf_path, backend="missing")
+
+    def test_layout_mode_uses_typography(self):
+        pdf_path = "../data/uploads/1301.3781v3.pdf"
+        if not os.path.exists(pdf_path):
+            self.fail(f"Please place a test PDF at {pdf_path}")
+
+        extractor = PDFExtractor(use_cache=False, layout=True)
+        results = extractor.extract_text_with_sections(pdf_path)
+
+        self.assertNotIn('error', results["metadata"])
+        self.assertEqual(
+            results['metadata']['title'],
+            "Efficient Estimation of Word Representations in Vector Space"
+        )
+        for section in ('abstract', 'introduction', 'results', 'conclusion', 'references'):
+            self.assertIn(section, results['metadata']['sections_found'])
+        self.assertEqual(results, extractor.extract_text_with_sections(pdf_path, workers=2))
+
+        with self.assertRaises(NotImplementedError):
+            list(extractor.iter_sections(pdf_path, backend="pypdfium2"))
+
+    def test_low_memory_mode_keeps_rss_flat(self):
+        with tempfile.TemporaryDirectory() as storage_path:
+            extractor = PDFExtractor(storage_path=storage_path, use_cache=False, low_memory=True)
+
+            # Warm up imports and allocator arenas before measuring
+            warmup_path = os.path.join(storage_path, "warmup.pdf")
+            write_synthetic_pdf(warmup_path, 10)
+            extractor.extract_text_with_sections(warmup_path)
+
+            growth = {}
+            for pages in (20, 160):
+                pdf_path = os.path.join(storage_path, f"synthetic_{pages}.pdf")
+                write_synthetic_pdf(pdf_path, pages)
+
+                baseline = current_rss_mb()
+                metadata: Dict[str, Any] = {}
+                for _ in extractor.iter_sections(pdf_path, metadata=metadata):
+                    pass
+                self.assertEqual(metadata["total_pages"], pages)
+                self.assertIn("results", metadata["sections_found"])
+                growth[pages] = metadata["peak_rss_mb"] - baseline
+
+            # 8x the pages must not mean noticeably more memory
+            self.assertLess(growth[160] - growth[20], 20)
+
+    def test_rss_ceiling_aborts_document(self):
+        with tempfile.TemporaryDirectory() as storage_path:
+            pdf_path = os.path.join(storage_path, "synthetic.pdf")
+            write_synthetic_pdf(pdf_path, 5)
+            extractor = PDFExtractor(storage_path=storage_path, max_rss_mb=1)
+
+            results = extractor.extract_text_with_sections(pdf_path)
+
+            self.assertIn("ceiling", results["metadata"]["error"])
+            self.assertEqual(extractor.cache.stats()["size_bytes"], 0)
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', "patches must reach the workers")
+    def test_page_timeout_skips_hung_page(self):
+        pdf_path = "../data/uploads/1301.3781v3.pdf"
+        if not os.path.exists(pdf_path):
+            self.fail(f"Please place a test PDF at {pdf_path}")
+
+        original_page_text = PdfPlumberDocument.page_text
+
+        def hanging_page_text(document, page_num):
+            if page_num == 1:
+                time.sleep(60)
+            return original_page_text(document, page_num)
+
+        extractor = PDFExtractor(use_cache=False, page_timeout=5)
+        with mock.patch.object(PdfPlumberDocument, 'page_text', hanging_page_text):
+            start = time.monotonic()
+            results = extractor.extract_text_with_sections(pdf_path, workers=2)
+
+        self.assertLess(time.monotonic() - start, 60)
+        self.assertNotIn('error', results["metadata"])
+        self.assertEqual(results["metadata"]["skipped_pages"], [{'page': 1, 'reason': 'timeout'}])
+        self.assertTrue(results["metadata"]["title"])
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', "patches must reach the workers")
+    def test_time_budgets_are_not_cached_and_cover_opening(self):
+        pdf_path = "../data/uploads/1301.3781v3.pdf"
+        if not os.path.exists(pdf_path):
+            self.fail(f"Please place a test PDF at {pdf_path}")
+
+        original_page_text = PdfPlumberDocument.page_text
+
+        def failing_page_text(document, page_num):
+            if page_num == 1:
+                raise RuntimeError("transient failure")
+            return original_page_text(document, page_num)
+
+        def hanging_open(pdf_path, backend):
+            time.sleep(60)
+
+        with tempfile.TemporaryDirectory() as storage_path:
+            extractor = PDFExtractor(storage_path=storage_path, page_timeout=5)
+            with mock.patch.object(PdfPlumberDocument, 'page_text', failing_page_text):
+                partial = extractor.extract_text_with_sections(pdf_path)
+            self.assertEqual([skip['page'] for skip in partial["metadata"]["skipped_pages"]], [1])
+
+            # The hole is not cached: the next run reads page 1
+            complete = extractor.extract_text_with_sections(pdf_path)
+            self.assertEqual(complete["metadata"]["skipped_pages"], [])
+            self.assertGreater(len(complete["full_text"]), len(partial["full_text"]))
+
+            # A PDF that hangs on open is stopped by the budget too
+            extractor = PDFExtractor(storage_path=storage_path, use_cache=False, page_timeout=1)
+            with mock.patch('research_copilot.core.pdf_processing.workers.open_pdf', hanging_open):
+                start = time.monotonic()
+                results = extractor.extract_text_with_sections(pdf_path)
+            self.assertLess(time.monotonic() - start, 30)
+            self.assertIn("took longer than", results["metadata"]["error"])
+
 
 if __name__ == '__main__':
     unittest.main()
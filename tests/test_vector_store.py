@@ -0,0 +1,350 @@
+import sys
+import collections
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from research_copilot.core.vector_store.binary_store import VectorTable, convert_simple_vector_store
+from research_copilot.core.vector_store.hnsw import HnswIndex, HnswlibIndex, open_hnsw_index
+from research_copilot.core.vector_store.ivfpq import IvfPqIndex
+from research_copilot.core.vector_store.local import ExactIndex, LocalVectorStore
+from research_copilot.core.vector_store.projection import Projection
+from research_copilot.core.vector_store.quantization import QuantizedVectors, normalize_rows, recall_at_k, top_k
+
+
+class TestVectorStore(unittest.TestCase):
+    def test_quantized_search_rescores_to_exact(self):
+        rng = np.random.default_rng(0)
+        # Clustered vectors sharing a common direction, like sentence embeddings
+        centres = rng.standard_normal((50, 64))
+        vectors = normalize_rows(centres[rng.integers(0, 50, 2000)] + 0.5 * rng.standard_normal((2000, 64))
+                                 + rng.standard_normal(64))
+        queries = normalize_rows(vectors[:20] + 0.05 * rng.standard_normal((20, 64)))
+        expected = [top_k(vectors @ query, 10) for query in queries]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for kind, code_bytes, oversampling in (("int8", 64, 2), ("binary", 8, 10)):
+                store = QuantizedVectors.build(vectors, kind, path=os.path.join(directory, kind))
+                self.assertEqual(store.code_bytes, 2000 * code_bytes)
+                self.assertIsInstance(store.vectors, np.memmap)
+                found = [store.search(query, 10, oversampling=oversampling)[0] for query in queries]
+                self.assertGreaterEqual(recall_at_k(found, expected), 0.95, kind)
+                # Rescored scores are exact cosine similarities, best first
+                ids, scores = store.search(queries[0], 10, oversampling=oversampling)
+                np.testing.assert_allclose(scores, vectors[ids] @ queries[0], rtol=1e-5)
+                self.assertTrue(np.all(np.diff(scores) <= 0))
+
+    def test_projection_preserves_similarities(self):
+        rng = np.random.default_rng(0)
+        # 96-d vectors spanning a 16-d subspace: PCA to 16 dims loses nothing
+        vectors = normalize_rows(rng.standard_normal((500, 16)) @ rng.standard_normal((16, 96)))
+        projection = Projection.fit(vectors[:200], 16)
+        projected = projection.apply(vectors)
+        self.assertEqual(projected.shape, (500, 16))
+        np.testing.assert_allclose(projected @ projected[0], vectors @ vectors[0], atol=1e-4)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "projection.npz")
+            projection.save(path)
+            loaded = Projection.load(path)
+            self.assertEqual((loaded.method, loaded.input_dim, loaded.dim), ("pca", 96, 16))
+            np.testing.assert_allclose(loaded.apply(vectors[0]), projected[0], rtol=1e-5)
+        with self.assertRaises(ValueError):
+            projection.apply(np.ones(16))
+        self.assertEqual(Projection.fit(vectors, 32, "random").apply(vectors).shape, (500, 32))
+
+    def test_local_index_matches_exact_search(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((600, 32)).astype(np.float32)
+        queries = rng.standard_normal((20, 32)).astype(np.float32)
+        ids = [f"chunk_{i}" for i in range(len(vectors))]
+        expected = [top_k(normalize_rows(vectors) @ query, 5) for query in normalize_rows(queries)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Stored in two saves, the second one appended to the memory map
+            index = ExactIndex(directory)
+            index.add(ids[:400], vectors[:400], [{'row': i} for i in range(400)])
+            index.save()
+            index = ExactIndex(directory)
+            index.add(ids[400:], vectors[400:], [{'row': i} for i in range(400, 600)])
+            index.save()
+
+            index = ExactIndex(directory)
+            self.assertIsInstance(index._vectors, np.memmap)
+            found = [[hit.payload['row'] for hit in index.search(query, 5)] for query in queries]
+            self.assertEqual(found, [list(rows) for rows in expected])
+
+            # Removed rows are never returned, also after a reload
+            index.remove(ids[:300])
+            index.save()
+            index = ExactIndex(directory)
+            self.assertEqual(len(index), 300)
+            self.assertTrue(all(hit.payload['row'] >= 300 for query in queries for hit in index.search(query, 5)))
+
+        # Qdrant-style calls, as made by DataIngestion
+        point = collections.namedtuple('Point', 'id vector payload')
+        selector = collections.namedtuple('Selector', 'points')
+        config = collections.namedtuple('Config', 'size distance')
+        with tempfile.TemporaryDirectory() as directory:
+            store = LocalVectorStore(directory)
+            store.create_collection('papers', vectors_config=config(32, 'Cosine'))
+            store.upsert('papers', [point(i, vectors[i].tolist(), {'text': str(i)}) for i in range(10)])
+            store.delete('papers', selector([3]))
+            store.save()
+            hits = LocalVectorStore(directory).query_points('papers', query=vectors[3].tolist(), limit=3).points
+            self.assertEqual(len(hits), 3)
+            self.assertNotIn('3', [hit.id for hit in hits])
+            self.assertAlmostEqual(LocalVectorStore(directory).query_points('papers', vectors[4], limit=1).points[0].score,
+                                   1.0, places=5)
+
+    def test_hnsw_recall_and_persistence(self):
+        rng = np.random.default_rng(0)
+        centres = rng.standard_normal((50, 32))
+        vectors = (centres[rng.integers(0, 50, 2100)] + rng.standard_normal((2100, 32)) * 0.5).astype(np.float32)
+        vectors, queries = vectors[:2000], vectors[2000:]
+        ids = [str(i) for i in range(len(vectors))]
+        expected = [top_k(normalize_rows(vectors) @ query, 10) for query in normalize_rows(queries)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.hnsw')
+            index = HnswIndex(path, m=8, ef_construction=64)
+            index.add(ids[:1500], vectors[:1500])
+            index.add(ids[1500:], vectors[1500:])  # incremental insert
+            found = [[int(hit.id) for hit in index.search(query, 10, ef=64)] for query in queries]
+            self.assertGreaterEqual(recall_at_k(found, expected), 0.9)
+            index.save()
+
+            # The reloaded file is memory-mapped and answers identically
+            loaded = HnswIndex(path)
+            self.assertIsInstance(loaded._links0, np.memmap)
+            self.assertEqual([[int(hit.id) for hit in loaded.search(query, 10, ef=64)] for query in queries], found)
+
+            # Tombstoned rows are skipped, still k results are returned
+            loaded.remove([str(row) for row in found[0]])
+            hits = loaded.search(queries[0], 10, ef=16)
+            self.assertEqual(len(hits), 10)
+            self.assertFalse(set(found[0]) & {int(hit.id) for hit in hits})
+
+    def test_hnsw_compacts_tombstones(self):
+        rng = np.random.default_rng(1)
+        vectors = rng.standard_normal((800, 16)).astype(np.float32)
+        queries = rng.standard_normal((20, 16)).astype(np.float32)
+        ids = [str(i) for i in range(len(vectors))]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.hnsw')
+            index = HnswIndex(path, m=8, ef_construction=32)
+            index.add(ids, vectors)
+            index.remove(ids[:100])
+            index.save()
+            # A few tombstones are kept and skipped
+            self.assertEqual((HnswIndex(path)._count, len(HnswIndex(path))), (800, 700))
+
+            index = HnswIndex(path)
+            index.remove(ids[100:300])
+            index.save()
+            # Past a quarter of the nodes the graph is rebuilt from the live rows
+            loaded = HnswIndex(path)
+            self.assertEqual((loaded._count, len(loaded)), (500, 500))
+            self.assertFalse(loaded._removed.any())
+            live = normalize_rows(vectors[300:])
+            expected = [(top_k(live @ query, 10) + 300).tolist() for query in normalize_rows(queries)]
+            found = [[int(hit.id) for hit in loaded.search(query, 10, ef=64)] for query in queries]
+            self.assertGreaterEqual(recall_at_k(found, expected), 0.9)
+
+    @unittest.skipUnless(importlib.util.find_spec('hnswlib'), "hnswlib is not installed")
+    def test_hnswlib_index_behaves_like_hnsw_index(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((1200, 32)).astype(np.float32)
+        ids = [str(i) for i in range(1000)]
+        expected = [top_k(normalize_rows(vectors[:1000]) @ query, 10) for query in normalize_rows(vectors[1000:])]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.hnsw')
+            self.assertIsInstance(open_hnsw_index(path), HnswIndex)
+            index = open_hnsw_index(path, native=True, m=8, ef_construction=64)
+            self.assertIsInstance(index, HnswlibIndex)
+            index.add(ids, vectors[:1000], [{'row': i} for i in range(1000)])
+            found = [[int(hit.id) for hit in index.search(query, 10, ef=64)] for query in vectors[1000:]]
+            self.assertGreaterEqual(recall_at_k(found, expected), 0.9)
+
+            # Replacing ids reuses deleted slots instead of growing the graph
+            index.add(ids[:100], vectors[1000:1100], [{'row': i, 'replaced': True} for i in range(100)])
+            self.assertEqual((len(index), index._index.get_current_count()), (1000, 1000))
+            index.save()
+            self.assertEqual(os.listdir(directory), ['index.hnsw'])
+
+            loaded = open_hnsw_index(path)
+            self.assertIsInstance(loaded, HnswlibIndex)
+            hit = loaded.search(vectors[1000], 1)[0]
+            self.assertEqual((hit.id, hit.payload), ('0', {'row': 0, 'replaced': True}))
+            self.assertAlmostEqual(hit.score, 1.0, places=5)
+            loaded.remove(['0'])
+            self.assertNotEqual(loaded.search(vectors[1000], 1)[0].id, '0')
+
+    def test_ivfpq_train_add_search(self):
+        rng = np.random.default_rng(0)
+        centres = rng.standard_normal((50, 32))
+        vectors = (centres[rng.integers(0, 50, 4100)] + rng.standard_normal((4100, 32)) * 0.5).astype(np.float32)
+        vectors, queries = vectors[:4000], vectors[4000:]
+        expected = [top_k(normalize_rows(vectors) @ query, 10) for query in normalize_rows(queries)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            index = IvfPqIndex(directory)
+            with self.assertRaises(ValueError):
+                index.add(['0'], vectors[:1])
+            index.train(vectors[:2000], nlist=16, subvectors=8)
+
+            # Streamed in blocks; codes take 8 bytes per 32-d vector
+            for start in range(0, len(vectors), 1000):
+                index.add([str(i) for i in range(start, start + 1000)], vectors[start:start + 1000],
+                          [{'row': i} for i in range(start, start + 1000)])
+            candidates = [[hit.payload['row'] for hit in index.search(query, 50, nprobe=4)] for query in queries]
+            found = np.mean([len(set(hits) & set(truth)) / 10 for hits, truth in zip(candidates, expected)])
+            self.assertGreaterEqual(found, 0.9)
+            index.save()
+
+            # Reloaded lists are memory-mapped, give the same results and accept more vectors
+            loaded = IvfPqIndex(directory)
+            self.assertEqual(len(loaded), len(vectors))
+            self.assertIsInstance(loaded._codes, np.memmap)
+            self.assertEqual([[hit.payload['row'] for hit in loaded.search(query, 50, nprobe=4)]
+                              for query in queries], candidates)
+            loaded.add(['extra'], queries[0])
+            self.assertEqual(loaded.search(queries[0], 1, nprobe=4)[0].id, 'extra')
+
+            # Reranking the PQ candidates by full vectors recovers the exact order
+            reranked = [[hit.payload['row'] for hit in loaded.search(query, 10, nprobe=4, oversample=5)]
+                        for query in queries[1:]]
+            recall = np.mean([len(set(hits) & set(truth)) / 10 for hits, truth in zip(reranked, expected[1:])])
+            pq_recall = np.mean([len(set(hits[:10]) & set(truth)) / 10
+                                 for hits, truth in zip(candidates[1:], expected[1:])])
+            self.assertGreaterEqual(recall, 0.95)
+            self.assertGreater(recall, pq_recall + 0.2)
+
+            # Saving again appends one segment to the changed list instead of rewriting all of them
+            sizes = {name: os.path.getsize(os.path.join(directory, name)) for name in ('codes.u8', 'rows.i64')}
+            loaded.save()
+            self.assertEqual(os.path.getsize(os.path.join(directory, 'codes.u8')), sizes['codes.u8'] + 8)
+            self.assertEqual(os.path.getsize(os.path.join(directory, 'rows.i64')), sizes['rows.i64'] + 8)
+            appended = IvfPqIndex(directory)
+            self.assertEqual(len(appended._segment_table), len(loaded._segment_table))
+            self.assertEqual(len(appended), len(vectors) + 1)
+            self.assertEqual(appended.search(queries[0], 1, nprobe=4, oversample=5)[0].id, 'extra')
+            self.assertAlmostEqual(appended.search(queries[0], 1, nprobe=4, oversample=5)[0].score, 1.0, places=5)
+
+            # Fragmented lists are rewritten contiguously with the same results
+            for i in range(1, 8 * 16):
+                appended.add([f"more{i}"], queries[i % len(queries)])
+                appended.save()
+            self.assertLess(len(appended._segment_table), 4 * 16)
+            rewritten = IvfPqIndex(directory)
+            self.assertEqual(len(rewritten), len(vectors) + 8 * 16)
+            self.assertEqual([[hit.id for hit in rewritten.search(query, 20, nprobe=4)] for query in queries],
+                             [[hit.id for hit in appended.search(query, 20, nprobe=4)] for query in queries])
+
+    def test_batched_search_matches_single_queries(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((3000, 32)).astype(np.float32)
+        queries = rng.standard_normal((70, 32)).astype(np.float32)
+        request = collections.namedtuple('Request', 'query limit params filter')
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = LocalVectorStore(directory)
+            index = store.collection('papers', 32)
+            index.add([str(i) for i in range(2000)], vectors[:2000])
+            index.save()
+            index.add([str(i) for i in range(2000, 3000)], vectors[2000:])  # pending rows are searched too
+            index.remove(['5', '17'])
+
+            single = [[hit.id for hit in index.search(query, 7)] for query in queries]
+            self.assertEqual([[hit.id for hit in hits] for hits in index.search_batch(queries, 7)], single)
+
+            # Per-request limits, results in request order
+            limits = [1 + i % 7 for i in range(len(queries))]
+            batched = store.query_batch_points('papers', [request(query.tolist(), limit, None, None)
+                                                          for query, limit in zip(queries, limits)])
+            self.assertEqual([[hit.id for hit in response.points] for response in batched],
+                             [ids[:limit] for ids, limit in zip(single, limits)])
+            self.assertEqual([hit.id for hit in store.query_points('papers', queries[0].tolist(), limit=7).points],
+                             single[0])
+            with self.assertRaises(ValueError):
+                store.query_points('papers', queries[0].tolist(), query_filter=object())
+
+    def test_binary_vector_store_conversion(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((50, 24)).astype(np.float32)
+        vectors[7] = 0
+        ids = [f"node-{i}" for i in range(50)]
+        data = {
+            'embedding_dict': {node_id: vector for node_id, vector in zip(ids, vectors.tolist())},
+            'text_id_to_ref_doc_id': {node_id: f"doc-é{i // 10}" for i, node_id in enumerate(ids)},
+            'metadata_dict': {node_id: {'page_label': str(i)} for i, node_id in enumerate(ids) if i != 3},
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'default__vector_store.json')
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            path = convert_simple_vector_store(json_path)
+            self.assertEqual(path, os.path.join(directory, 'default__vector_store.bin'))
+            self.assertLess(os.path.getsize(path), os.path.getsize(json_path))
+
+            table = VectorTable(path)
+            self.assertIsInstance(table._vectors, np.memmap)
+            self.assertEqual((len(table), table.dim, table.dtype), (50, 24, 'float32'))
+            self.assertEqual(table.id(12), 'node-12')
+            self.assertEqual(table.row('node-12'), 12)
+            self.assertIsNone(table.row('missing'))
+            self.assertEqual(table.ref_doc_id(12), 'doc-é1')
+            self.assertEqual(table.rows_of('doc-é1').tolist(), list(range(10, 20)))
+            self.assertEqual(table.metadata(12), {'page_label': '12'})
+            self.assertIsNone(table.metadata(3))
+            np.testing.assert_array_equal(table.vectors([4, 9]), vectors[[4, 9]])
+
+            # Cosine scores, 0 for the zero vector
+            expected = normalize_rows(vectors) @ (vectors[4] / np.linalg.norm(vectors[4]))
+            expected[7] = 0
+            np.testing.assert_allclose(table.scores(vectors[4]), expected, atol=1e-5)
+
+            half = VectorTable(convert_simple_vector_store(json_path, 'float16', os.path.join(directory, 'f16.bin')))
+            self.assertEqual(half.dtype, 'float16')
+            np.testing.assert_allclose(half.scores(vectors[4]), expected, atol=2e-3)
+            self.assertEqual(int(np.argmax(half.scores(vectors[4]))), 4)
+            with self.assertRaises(ValueError):
+                convert_simple_vector_store(json_path, 'int8')
+
+    @unittest.skipUnless(importlib.util.find_spec('llama_index'), "llama-index is not installed")
+    def test_binary_vector_store_keeps_json_files(self):
+        from research_copilot.api.binary_vector_store import BinaryVectorStore
+
+        rng = np.random.default_rng(0)
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'default__vector_store.json')
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump({'embedding_dict': {f"node-{i}": rng.standard_normal(8).tolist() for i in range(5)}}, f)
+            with open(json_path, 'rb') as f:
+                original = f.read()
+
+            store = BinaryVectorStore.from_persist_path(json_path)
+            store.delete_nodes(['node-0'])
+            store.persist(json_path)
+            with open(json_path, 'rb') as f:
+                self.assertEqual(f.read(), original)
+            self.assertEqual(len(BinaryVectorStore.from_persist_path(json_path)._table), 4)
+
+            # A JSON file written after the binary one is converted again
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump({'embedding_dict': {f"node-{i}": rng.standard_normal(8).tolist() for i in range(3)}}, f)
+            binary_mtime = os.path.getmtime(os.path.join(directory, 'default__vector_store.bin'))
+            os.utime(json_path, (binary_mtime + 10, binary_mtime + 10))
+            self.assertEqual(len(BinaryVectorStore.from_persist_path(json_path)._table), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()